@@ -0,0 +1,39 @@
+from fastapi import HTTPException, APIRouter
+from pathlib import Path
+from typing import Dict, Tuple
+import asyncio
+
+from diagnostic import CATFLOWDiagnostic, FileIndex
+from state import TEMPLATE_FOLDER
+
+router = APIRouter(prefix="/api/diagnostic")
+
+# folder -> (index signature, report). A re-run is only needed once a file was added, removed or touched.
+_report_cache: Dict[str, Tuple[str, Dict]] = {}
+
+
+def _run_diagnostic(folder: Path, force: bool) -> Dict:
+    index = FileIndex.build(str(folder))
+    cached = _report_cache.get(str(folder))
+    if not force and cached and cached[0] == index.signature:
+        return {**cached[1], "cached": True}
+
+    report = CATFLOWDiagnostic(str(folder), index=index).run_full_diagnostic()
+    report["n_files"] = len(index.files)
+    _report_cache[str(folder)] = (index.signature, report)
+    return {**report, "cached": False}
+
+
+@router.get("/{folder_name}")
+async def diagnose_template(folder_name: str, force: bool = False):
+    """Run the project diagnostic on a template folder (cached until the folder changes)"""
+    root = Path(TEMPLATE_FOLDER).resolve()
+    folder = (root / folder_name).resolve()
+    if root not in folder.parents or not folder.is_dir():
+        raise HTTPException(status_code=404, detail=f"Project folder not found: {folder_name}")
+
+    try:
+        return await asyncio.to_thread(_run_diagnostic, folder, force)
+    except Exception as e:
+        print(f"Error running diagnostic: {e}")
+        raise HTTPException(status_code=500, detail=f"Diagnostic failed: {str(e)}")
@@ -1,6 +1,10 @@
 from fastapi import HTTPException, APIRouter
+from fastapi.responses import StreamingResponse
 from typing import List
 from pathlib import Path
+from model.export import iter_zip_stream
+from model.timing import NULL_RECORDER, PhaseRecorder, timing_enabled
+import metrics
 from response import WritePreview
 from state import get_project_or_404, project_source_path
 
@@ -71,16 +75,43 @@ async def preview_export(target_folder: str):
 
 
 @router.post("/write")
-async def write_project(target_folder: str):
-    """Export the project to a new folder"""
+async def write_project(target_folder: str, timing: bool = False):
+    """Export the project to a new folder (timing=true returns per-file timing spans)"""
     project = get_project_or_404()
     
     try:
-        project.write_to_folder(target_folder, project_source_path)
+        recorder = PhaseRecorder("export") if timing_enabled(timing) else NULL_RECORDER
+        with metrics.project_export_duration.time("folder"):
+            writer = project.write_to_folder(target_folder, project_source_path, recorder=recorder)
+        recorder.log()
         return {
             "status": "success",
             "message": f"Project written to {target_folder}",
-            "folder": target_folder
+            "folder": target_folder,
+            "written": writer.written,
+            "unchanged": writer.skipped,
+            "timing": recorder.report()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+
+
+@router.get("/zip")
+async def download_project_zip():
+    """Stream the complete CATFLOW folder as a ZIP, serialized file by file from memory"""
+    project = get_project_or_404()
+    if not project.run_control:
+        raise HTTPException(status_code=400, detail="Cannot export project: RunControl is missing")
+    
+    name = project.name or "catflow_project"
+    return StreamingResponse(
+        _timed_stream(iter_zip_stream(project.iter_export_files(project_source_path), archive_root=name)),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{name}.zip"'}
+    )
+
+
+def _timed_stream(chunks):
+    """Observes the export duration once the last chunk has been sent"""
+    with metrics.project_export_duration.time("zip"):
+        yield from chunks
@@ -1,7 +1,8 @@
 from fastapi import HTTPException, APIRouter
-from typing import List
+from typing import List, Literal, Optional
 from api.utils import numpy_to_list
-from response import HillSummary, InitialConditionData, MeshCoordinates, SoilMapData
+from model.inputs.boundaries.initital import SoilWaterIC
+from response import HillSummary, InitialConditionData, MeshCoordinates, PointsRequest, SoilMapData
 from state import get_project_or_404
 import numpy as np
 
@@ -45,8 +46,8 @@ async def get_hill_mesh(hill_id: int):
     n_columns = hill.mesh.header.iacnl
     
     # Extracts X (sko) and Z (hko) for EVERY node.
-    x_grid = hill.mesh.data['sko'] # Shape (cols, rows)
-    z_grid = hill.mesh.data['hko'] # Shape (cols, rows)
+    x_grid = hill.mesh.fields['sko'] # Shape (cols, rows)
+    z_grid = hill.mesh.fields['hko'] # Shape (cols, rows)
     
     # Convert to standard Python lists
     # Note: If you want [row][col] format (n_layers, n_columns), transpose (.T)
@@ -168,24 +169,173 @@ async def get_theta_heterogeneity(hill_id: int):
         }
     }
 
+@router.get("/{hill_id}/effective-parameters")
+async def get_effective_parameters(hill_id: int):
+    """Get node-wise effective Ks (soil Ks * k scaling * fmac) and theta_s (* theta scaling)"""
+    project = get_project_or_404()
+    hill = next((h for h in project.hills if h.id == hill_id), None)
+    if not hill or not hill.soil_map:
+        raise HTTPException(status_code=404, detail="Soil map not found")
+    if not project.soil_library:
+        raise HTTPException(status_code=404, detail="No soil library loaded")
+
+    try:
+        params = hill.effective_parameters(project.soil_library)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    def field_stats(values: np.ndarray):
+        known = values[~np.isnan(values)]
+        if known.size == 0:
+            return {"min": None, "max": None, "mean": None}
+        return {"min": float(known.min()), "max": float(known.max()), "mean": float(known.mean())}
+
+    return {
+        "ks": numpy_to_list(np.where(np.isnan(params.ks), None, params.ks)),
+        "theta_s": numpy_to_list(np.where(np.isnan(params.theta_s), None, params.theta_s)),
+        "stats": {"ks": field_stats(params.ks), "theta_s": field_stats(params.theta_s)},
+        "unknown_soil_nodes": int(np.count_nonzero(params.soil_index < 0)),
+        "n_layers": params.shape[1],  # Shape is (n_columns, n_layers)
+        "n_columns": params.shape[0]
+    }
+
+@router.get("/{hill_id}/geometry")
+async def get_mesh_geometry(hill_id: int, arrays: Optional[str] = None):
+    """Get derived mesh geometry; arrays is a comma separated subset (default: all)"""
+    project = get_project_or_404()
+    hill = next((h for h in project.hills if h.id == hill_id), None)
+    if not hill or not hill.mesh:
+        raise HTTPException(status_code=404, detail=f"Hill {hill_id} or mesh not found")
+
+    names = [a.strip() for a in arrays.split(",") if a.strip()] if arrays else None
+    try:
+        return hill.mesh.geometry.to_dict(names)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def _points_array(request: PointsRequest) -> np.ndarray:
+    """(n, 2) float array; PointsRequest already rejects entries that are not [x, y] pairs"""
+    return np.asarray(request.points, dtype=np.float64).reshape(-1, 2)
+
+@router.post("/locate")
+async def locate_points(request: PointsRequest):
+    """Map points to hills and node polygons (first hill whose BNA contains the point)"""
+    project = get_project_or_404()
+    points = _points_array(request)
+    hill_ids = np.full(len(points), -1, dtype=np.int64)
+    record_ids = np.full(len(points), -1, dtype=np.int64)
+
+    for hill in project.hills:
+        if hill.bna is None:
+            continue
+        open_points = np.flatnonzero(hill_ids < 0)
+        if open_points.size == 0:
+            break
+        found = hill.bna.locate(points[open_points])
+        hit = found >= 0
+        hill_ids[open_points[hit]] = hill.id
+        record_ids[open_points[hit]] = hill.bna.ids[found[hit]]
+
+    return {
+        "hill_ids": [int(h) if h >= 0 else None for h in hill_ids],
+        "record_ids": [int(r) if r >= 0 else None for r in record_ids],
+        "n_located": int(np.count_nonzero(hill_ids >= 0)),
+    }
+
+def _bna_or_404(hill_id: int):
+    project = get_project_or_404()
+    hill = next((h for h in project.hills if h.id == hill_id), None)
+    if not hill or hill.bna is None:
+        raise HTTPException(status_code=404, detail=f"Hill {hill_id} or BNA polygons not found")
+    return hill.bna
+
+@router.get("/{hill_id}/bna")
+async def get_bna_summary(hill_id: int):
+    """Get record count, bounds and spatial index layout of the hill's BNA polygons"""
+    bna = _bna_or_404(hill_id)
+    return {
+        "n_records": bna.n_records,
+        "n_vertices": int(bna.vertices.shape[0]),
+        "bounds": list(bna.bounds),
+        "quoted": bna.quoted,
+        "index_shape": list(bna.index.shape),
+    }
+
+@router.get("/{hill_id}/bna/bbox")
+async def query_bna_bbox(hill_id: int, xmin: float, ymin: float, xmax: float, ymax: float):
+    """Get the polygons whose bounding box intersects the query box"""
+    bna = _bna_or_404(hill_id)
+    if xmin > xmax or ymin > ymax:
+        raise HTTPException(status_code=422, detail="Empty box: min exceeds max")
+    records = bna.query_bbox(xmin, ymin, xmax, ymax)
+    return {
+        "record_ids": bna.ids[records].tolist(),
+        "polygons": [bna.polygon(r).tolist() for r in records],
+    }
+
+@router.post("/{hill_id}/bna/locate")
+async def locate_in_hill(hill_id: int, request: PointsRequest):
+    """Map points to the node polygons of one hill (-1 / null outside)"""
+    bna = _bna_or_404(hill_id)
+    found = bna.locate(_points_array(request))
+    return {
+        "record_ids": [int(bna.ids[r]) if r >= 0 else None for r in found],
+        "inside": (found >= 0).tolist(),
+    }
+
+def _convert_initial_condition(project, hill, target: str, source: Optional[str]) -> np.ndarray:
+    if not project.soil_library or not hill.soil_map:
+        raise HTTPException(status_code=404, detail="Conversion needs a soil library and a soil map")
+    try:
+        params = hill.effective_parameters(project.soil_library)
+        hko = hill.mesh.fields['hko'] if hill.mesh else None
+        values = hill.initial_cond_sat.as_state(target, params, hko, source)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if np.isnan(values).any():
+        raise HTTPException(status_code=422, detail="Soil map contains soil ids missing from the library")
+    return values
+
 @router.get("/{hill_id}/initial-condition", response_model=InitialConditionData)
-async def get_initial_condition(hill_id: int):
-    """Get initial condition matrix"""
+async def get_initial_condition(hill_id: int, representation: Optional[str] = None, source: Optional[str] = None):
+    """
+    Get initial condition matrix, optionally converted to PSI, THETA, SAT (relative saturation) or PHI.
+    source overrides the stored type (blockwise files with ischal=0 hold SAT but load as THETA).
+    """
     project = get_project_or_404()
     hill = next((h for h in project.hills if h.id == hill_id), None)
     if not hill or not hill.initial_cond_sat:
         raise HTTPException(status_code=404, detail="Initial condition not found")
-        
+
     vals = hill.initial_cond_sat.data
+    type_id = hill.initial_cond_sat.type
+    if representation:
+        vals = _convert_initial_condition(project, hill, representation, source)
+        type_id = representation.upper()
+
     return InitialConditionData(
         values=numpy_to_list(vals),
-        type_id=hill.initial_cond_sat.type,
+        type_id=type_id,
         n_layers=vals.shape[1],  # Shape is (n_columns, n_layers)
         n_columns=vals.shape[0],
         min_value=float(np.min(vals)),
         max_value=float(np.max(vals))
     )
 
+@router.post("/{hill_id}/initial-condition/convert")
+async def convert_initial_condition(hill_id: int, target: Literal['PSI', 'THETA', 'PHI'], source: Optional[str] = None):
+    """Replace the initial condition by its PSI / THETA / PHI equivalent (written as such on export)"""
+    project = get_project_or_404()
+    hill = next((h for h in project.hills if h.id == hill_id), None)
+    if not hill or not hill.initial_cond_sat:
+        raise HTTPException(status_code=404, detail="Initial condition not found")
+
+    values = _convert_initial_condition(project, hill, target, source)
+    previous = source or hill.initial_cond_sat.type
+    hill.initial_cond_sat = SoilWaterIC(values, type=target)
+    return {"status": "success", "from": previous, "to": target,
+            "min_value": float(values.min()), "max_value": float(values.max())}
+
 @router.get("/{hill_id}/printout")
 async def get_printout_config(hill_id: int):
     """Get printout times configuration"""
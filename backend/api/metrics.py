@@ -0,0 +1,26 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+import metrics
+import state
+from model.timing import array_nbytes
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Computed at scrape time, nothing is tracked on the request path
+metrics.registry.gauge(
+    "catflow_projects_in_memory", "Projects currently held by the backend",
+    callback=lambda: int(state.current_project is not None)
+)
+metrics.registry.gauge(
+    "catflow_project_array_bytes", "Bytes of numpy array data held by loaded projects",
+    callback=lambda: array_nbytes(state.current_project) if state.current_project is not None else 0
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus text exposition of all backend metrics"""
+    return PlainTextResponse(metrics.registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
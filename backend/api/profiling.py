@@ -0,0 +1,39 @@
+from fastapi import HTTPException, APIRouter
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from profiling import PROFILING_ENV, profile_store, profiling_enabled
+
+router = APIRouter(prefix="/api/profiles")
+
+
+def _require_enabled():
+    if not profiling_enabled():
+        raise HTTPException(status_code=404, detail=f"Profiling is disabled (set {PROFILING_ENV}=1)")
+
+
+@router.get("/")
+async def list_profiles():
+    """Captured request profiles, newest first"""
+    _require_enabled()
+    return {"status": "success", "data": profile_store.list()}
+
+
+@router.get("/{profile_id}", response_class=PlainTextResponse)
+async def get_profile_summary(profile_id: str):
+    """Text summary (top functions by cumulative and own time)"""
+    _require_enabled()
+    path = profile_store.path(profile_id, ".txt")
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    with open(path, 'r') as f:
+        return PlainTextResponse(f.read())
+
+
+@router.get("/{profile_id}/download")
+async def download_profile(profile_id: str):
+    """Raw pstats dump, e.g. for snakeviz or `python -m pstats`"""
+    _require_enabled()
+    path = profile_store.path(profile_id, ".prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
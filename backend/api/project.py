@@ -14,6 +14,9 @@ import os
 from state import get_project_or_404, set_current_project, project_source_path, TEMPLATE_FOLDER
 from response import ProjectLoadRequest, ProjectSummary
 from model.project import CATFLOWProject
+from model.compact import compact_enabled, compact_project
+from model.timing import NULL_RECORDER, PhaseRecorder, timing_enabled
+import metrics
 
 router = APIRouter(prefix="/api/project")
 
@@ -50,7 +53,14 @@ async def load_project(request: ProjectLoadRequest):
             raise HTTPException(status_code=404, detail=f"Project folder not found: {folder_name}")
             
         print(f"Loading project from: {full_path}")
-        current_project = CATFLOWProject.from_legacy_folder(str(full_path))
+        recorder = PhaseRecorder("load") if timing_enabled(request.timing) else NULL_RECORDER
+        with metrics.project_load_duration.time():
+            current_project = CATFLOWProject.from_legacy_folder(str(full_path), recorder=recorder)
+        recorder.log()
+        compact = None
+        if compact_enabled(request.compact):
+            compact = compact_project(current_project).to_dict()
+            print(f"Compact mode: saved {compact['bytes_saved']} bytes")
         set_current_project(current_project)
         project_source_path = str(full_path)
         
@@ -58,7 +68,9 @@ async def load_project(request: ProjectLoadRequest):
         return {
             "status": "success",
             "message": f"Loaded project {folder_name}",
-            "summary": summary_data
+            "summary": summary_data,
+            "timing": recorder.report(),
+            "compact": compact
         }
     except Exception as e:
         print(f"Error loading project: {e}")
@@ -1,11 +1,47 @@
 from fastapi import HTTPException, APIRouter
+from fastapi.responses import Response
 from typing import Dict, List, Optional
+import json
 import numpy as np
 from api.utils import numpy_to_list, dataframe_to_json
+from response import ProbeRequest
 from state import get_project_or_404
 
 router = APIRouter(prefix="/api/results")
 
+def _series_or_404(variable: str):
+    project = get_project_or_404()
+    if not hasattr(project, 'results') or not project.results:
+        raise HTTPException(status_code=404, detail="No simulation results found")
+    try:
+        return project.results.variable(variable)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown result variable '{variable}' (moisture or pressure)")
+
+
+def _step_or_404(series, time_idx: int) -> int:
+    if not 0 <= time_idx < series.n_steps:
+        raise HTTPException(status_code=404, detail=f"Time index {time_idx} not found")
+    return time_idx
+
+
+def _nearest_step_or_404(series, time: float) -> int:
+    """Step nearest to a simulation time [s]"""
+    try:
+        return series.nearest_index(time)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="No output steps")
+
+
+def _field_response(series, step: int) -> Dict:
+    return {
+        "time_index": step,
+        "time": float(series.times[step]),
+        "data": numpy_to_list(series.data[step]),
+        "stats": series.step_stats(step)
+    }
+
+
 @router.get("/available")
 async def check_results_availability():
     """Check if simulation results are loaded"""
@@ -14,10 +50,13 @@ async def check_results_availability():
     
     if not has_results:
         return {"available": False, "timesteps": []}
-        
+
+    results = project.results
     return {
         "available": True,
-        "timesteps": list(project.results.times) if hasattr(project.results, 'times') else []
+        "timesteps": results.moisture.times.tolist(),
+        "pressure_timesteps": results.pressure.times.tolist(),
+        "stats": {name: values.tolist() for name, values in results.moisture.stats.items()}
     }
 
 @router.get("/balance")
@@ -27,71 +66,144 @@ async def get_water_balance():
     if not hasattr(project, 'results') or not project.results:
         raise HTTPException(status_code=404, detail="No simulation results found")
         
-    return dataframe_to_json(project.results.water_balance)
+    results = project.results
+    # Encoded once per balance table (assigning water_balance bumps balance_version), served as raw
+    # bytes so FastAPI does not walk every cell through jsonable_encoder on each call
+    key = results.balance_version
+    cached = getattr(results, "_balance_json_cache", None)
+    if cached is None or cached[0] != key:
+        body = json.dumps(dataframe_to_json(results.water_balance), allow_nan=False, separators=(",", ":"))
+        cached = (key, body.encode())
+        results._balance_json_cache = cached
+    return Response(cached[1], media_type="application/json")
+
+# Declared before the index routes, /moisture/{time_idx} would otherwise claim "at"
+@router.get("/moisture/at")
+async def get_moisture_field_at(time: float):
+    """Get the spatial moisture field of the step nearest to ?time= (simulation seconds)"""
+    series = _series_or_404("moisture")
+    return _field_response(series, _nearest_step_or_404(series, time))
+
+@router.get("/pressure/at")
+async def get_pressure_field_at(time: float):
+    """Get the spatial pressure (psi) field of the step nearest to ?time= (simulation seconds)"""
+    series = _series_or_404("pressure")
+    return _field_response(series, _nearest_step_or_404(series, time))
 
 @router.get("/moisture/{time_idx}")
 async def get_moisture_field(time_idx: int):
-    """Get spatial moisture field for a specific time index"""
-    project = get_project_or_404()
-    if not hasattr(project, 'results') or not project.results:
-        raise HTTPException(status_code=404, detail="No simulation results found")
-        
-    if time_idx not in project.results.moisture_fields:
-        raise HTTPException(status_code=404, detail=f"Time index {time_idx} not found")
-        
-    data = project.results.moisture_fields[time_idx]
-    return {
-        "time_index": time_idx,
-        "data": numpy_to_list(data),
-        "stats": {
-            "min": float(np.min(data)),
-            "max": float(np.max(data)),
-            "mean": float(np.mean(data))
-        }
-    }
+    """Get spatial moisture field for a step index"""
+    series = _series_or_404("moisture")
+    return _field_response(series, _step_or_404(series, time_idx))
 
 @router.get("/pressure/{time_idx}")
 async def get_pressure_field(time_idx: int):
-    """Get spatial pressure (psi) field for a specific time index"""
-    project = get_project_or_404()
-    if not hasattr(project, 'results') or not project.results:
-        raise HTTPException(status_code=404, detail="No simulation results found")
-        
-    if time_idx not in project.results.pressure_fields:
-        raise HTTPException(status_code=404, detail=f"Time index {time_idx} not found")
-        
-    data = project.results.pressure_fields[time_idx]
-    return {
-        "time_index": time_idx,
-        "data": numpy_to_list(data),
-        "stats": {
-            "min": float(np.min(data)),
-            "max": float(np.max(data)),
-            "mean": float(np.mean(data))
-        }
-    }
+    """Get spatial pressure (psi) field for a step index"""
+    series = _series_or_404("pressure")
+    return _field_response(series, _step_or_404(series, time_idx))
 
 @router.get("/compare/{time1}/{time2}")
 async def compare_timesteps(time1: int, time2: int):
-    """Compare moisture fields between two timesteps"""
-    project = get_project_or_404()
-    if not hasattr(project, 'results') or not project.results:
-        raise HTTPException(status_code=404, detail="No simulation results found")
-    
-    if time1 not in project.results.moisture_fields or time2 not in project.results.moisture_fields:
-        raise HTTPException(status_code=404, detail="One or more time indices not found")
-        
-    field1 = project.results.moisture_fields[time1]
-    field2 = project.results.moisture_fields[time2]
-    
-    diff = field2 - field1
+    """Compare moisture fields between two step indices"""
+    series = _series_or_404("moisture")
+    _step_or_404(series, time1)
+    _step_or_404(series, time2)
+
+    diff = series.data[time2] - series.data[time1]
     
     return {
         "time_start": time1,
         "time_end": time2,
+        "times": [float(series.times[time1]), float(series.times[time2])],
         "difference_matrix": numpy_to_list(diff),
         "stats": {
             "max_change": float(np.max(np.abs(diff))),
             "mean_change": float(np.mean(diff))
         }
     }
+
+@router.get("/storage/{hill_id}")
+async def get_storage_series(hill_id: int, column: Optional[str] = None):
+    """
+    Water storage of a hill (total and per control volume block) integrated from the theta fields.
+    With column, the storage change is compared against that bilanz.csv column.
+    """
+    from model.storage import compare_with_bilanz, integrate_storage
+
+    project = get_project_or_404()
+    if not hasattr(project, 'results') or not project.results:
+        raise HTTPException(status_code=404, detail="No simulation results found")
+    hill = next((h for h in project.hills if h.id == hill_id), None)
+    if not hill or not hill.mesh:
+        raise HTTPException(status_code=404, detail="Hill mesh not found")
+
+    try:
+        series = integrate_storage(hill.mesh, project.results.moisture, hill.cv_def)
+        response = {"hill_id": hill_id, **series.to_dict()}
+        if column:
+            response["comparison"] = compare_with_bilanz(series, project.results.water_balance, column, hill_id)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return response
+
+
+@router.get("/probe/{variable}/node")
+async def probe_node(variable: str, layer: int, col: int):
+    """Time series of one node"""
+    series = _series_or_404(variable)
+    try:
+        values = series.node_series(layer, col)
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"times": series.times.tolist(), "layer": layer, "col": col, "values": values.tolist()}
+
+
+@router.get("/probe/{variable}/column/{col}")
+async def probe_column(variable: str, col: int, step: Optional[int] = None):
+    """Vertical profile of a column at one step index, or for all steps (steps x layers)"""
+    series = _series_or_404(variable)
+    if step is not None and not 0 <= step < series.n_steps:
+        raise HTTPException(status_code=404, detail=f"Step {step} not found")
+    try:
+        values = series.column_profile(col, step)
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"times": series.times.tolist() if step is None else [float(series.times[step])], "col": col, "values": values.tolist()}
+
+
+@router.get("/probe/{variable}/layer/{layer}")
+async def probe_layer(variable: str, layer: int, step: Optional[int] = None):
+    """Lateral profile of a layer at one step index, or for all steps (steps x columns)"""
+    series = _series_or_404(variable)
+    if step is not None and not 0 <= step < series.n_steps:
+        raise HTTPException(status_code=404, detail=f"Step {step} not found")
+    try:
+        values = series.layer_profile(layer, step)
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"times": series.times.tolist() if step is None else [float(series.times[step])], "layer": layer, "values": values.tolist()}
+
+
+@router.post("/probe/{variable}")
+async def probe_batch(variable: str, request: ProbeRequest):
+    """
+    Many probes in one request: node time series (one fancy-indexed read for all nodes)
+    plus column and layer profiles over all steps.
+    """
+    series = _series_or_404(variable)
+    try:
+        response = {"times": series.times.tolist(), "nodes": [], "columns": {}, "layers": {}}
+        if request.nodes:
+            layers, cols = np.asarray(request.nodes, dtype=np.int64).T
+            values = series.node_series(layers, cols)  # (n_steps, n_probes)
+            response["nodes"] = [
+                {"layer": int(l), "col": int(c), "values": values[:, i].tolist()}
+                for i, (l, c) in enumerate(zip(layers, cols))
+            ]
+        for col in request.columns:
+            response["columns"][str(col)] = series.column_profile(col).tolist()
+        for layer in request.layers:
+            response["layers"][str(layer)] = series.layer_profile(layer).tolist()
+    except IndexError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return response
@@ -1,6 +1,9 @@
-from fastapi import HTTPException, APIRouter
+from fastapi import HTTPException, APIRouter, Query
+from fastapi.responses import Response
 from typing import List, Dict
+import io
 import numpy as np
+from model.hydraulics import DEFAULT_POINTS, DEFAULT_PSI_RANGE, MUALEM_L, VAN_GENUCHTEN, hydraulic_tables, soil_curves
 from state import get_project_or_404
 from response import SoilTypeDTO
 
@@ -27,6 +30,52 @@ async def get_soil_library():
         for s in project.soil_library.soils
     ]
 
+def _curves_or_404(points: int, psi_min: float, psi_max: float):
+    project = get_project_or_404()
+    if not project.soil_library:
+        raise HTTPException(status_code=404, detail="No soil library loaded")
+    if points < 2 or not 0 < psi_min < psi_max:
+        raise HTTPException(status_code=400, detail="Need points >= 2 and 0 < psi_min < psi_max")
+    return soil_curves(project.soil_library, points, psi_min, psi_max)
+
+
+@router.get("/curves")
+async def get_all_soil_curves(points: int = Query(DEFAULT_POINTS, le=10000),
+                              psi_min: float = DEFAULT_PSI_RANGE[0], psi_max: float = DEFAULT_PSI_RANGE[1]):
+    """Hydraulic curves theta(psi), K(psi) and C(psi) of every soil on one shared psi grid"""
+    curves = _curves_or_404(points, psi_min, psi_max)
+    return {
+        "psi": curves.psi.tolist(),
+        "soils": [
+            {
+                "id": int(soil_id),
+                "supported": int(model_id) == VAN_GENUCHTEN,
+                "theta": curves.theta[i].tolist(),
+                "conductivity": curves.conductivity[i].tolist(),
+                "capacity": curves.capacity[i].tolist()
+            }
+            for i, (soil_id, model_id) in enumerate(zip(curves.soil_ids, curves.model_ids))
+        ],
+        "metadata": {"model": "Van Genuchten / Mualem", "mualem_l": MUALEM_L, "units": {"psi": "m", "conductivity": "m/s", "capacity": "1/m"}}
+    }
+
+def _tables_or_404():
+    project = get_project_or_404()
+    if not project.soil_library:
+        raise HTTPException(status_code=404, detail="No soil library loaded")
+    return hydraulic_tables(project.soil_library)
+
+
+@router.get("/tables")
+async def download_soil_tables():
+    """Tabulated hydraulic functions (table_size entries per soil) of all soils as compressed .npz"""
+    buf = io.BytesIO()
+    _tables_or_404().to_file(buf)
+    return Response(
+        buf.getvalue(), media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="soil_tables.npz"'}
+    )
+
 @router.get("/{soil_id}")
 async def get_soil_details(soil_id: int):
     """Get detailed parameters for a specific soil type"""
@@ -55,33 +104,33 @@ async def get_soil_details(soil_id: int):
     }
 
 @router.get("/{soil_id}/curves")
-async def get_soil_curves(soil_id: int, points: int = 100):
-    """Generate hydraulic property curves (Theta vs Psi)"""
-    project = get_project_or_404()
-    soil = next((s for s in project.soil_library.soils if s.id == soil_id), None)
-    if not soil:
+async def get_soil_curves(soil_id: int, points: int = Query(DEFAULT_POINTS, le=10000)):
+    """Hydraulic property curves (theta, K and capacity vs psi) of one soil"""
+    curves = _curves_or_404(points, *DEFAULT_PSI_RANGE)
+    try:
+        i = curves.index_of(soil_id)
+    except KeyError:
         raise HTTPException(status_code=404, detail=f"Soil ID {soil_id} not found")
+    soil = get_project_or_404().soil_library.soils[i]
 
-    # Van Genuchten Model Implementation
-    # range for psi (suction) in cm: 0 to -15000 (wilting point approx)
-    psi = -np.logspace(-2, 4.2, points) # Log scale from -0.01 to -15000
-    
-    # Parameters
-    tr = soil.theta_r
-    ts = soil.theta_s
-    alpha = soil.alpha
-    n = soil.n_param
-    m = 1 - (1/n)
-    
-    # Calculate Theta
-    # Formula: theta = tr + (ts - tr) / (1 + (alpha * |psi|)^n)^m
-    theta = tr + (ts - tr) / ((1 + (alpha * np.abs(psi))**n)**m)
-    
     return {
-        "psi": psi.tolist(),
-        "theta": theta.tolist(),
+        "psi": curves.psi.tolist(),
+        "theta": curves.theta[i].tolist(),
+        "conductivity": curves.conductivity[i].tolist(),
+        "capacity": curves.capacity[i].tolist(),
         "metadata": {
-            "model": "Van Genuchten",
-            "params": {"alpha": alpha, "n": n, "theta_s": ts, "theta_r": tr}
+            "model": "Van Genuchten / Mualem",
+            "supported": soil.model_id == VAN_GENUCHTEN,
+            "params": {"alpha": soil.alpha, "n": soil.n_param, "theta_s": soil.theta_s, "theta_r": soil.theta_r, "ks": soil.ks}
         }
     }
+
+@router.get("/{soil_id}/table")
+async def get_soil_table(soil_id: int):
+    """Tabulated hydraulic functions of one soil (as generated from table_size)"""
+    tables = _tables_or_404()
+    try:
+        table = tables.table(soil_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Soil ID {soil_id} not found")
+    return {"table_size": len(table["psi"]), **{k: v.tolist() for k, v in table.items()}}
@@ -1,6 +1,8 @@
-from typing import List, Dict, Any, Union
+from typing import TYPE_CHECKING, List, Dict, Any, Union
 import numpy as np
-import pandas as pd
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 def numpy_to_list(arr: Union[np.ndarray, List]) -> List:
     """Recursively convert numpy arrays to lists"""
@@ -10,10 +12,25 @@ def numpy_to_list(arr: Union[np.ndarray, List]) -> List:
         return [numpy_to_list(x) for x in arr]
     return arr
 
-def dataframe_to_json(df: pd.DataFrame) -> Dict[str, Any]:
+def dataframe_to_json(df: 'pd.DataFrame') -> Dict[str, Any]:
     """Convert DataFrame to a JSON-friendly format (split orientation)"""
     if df is None:
         return {}
-    # Replaces Infinity and NaN with None for valid JSON
-    df_clean = df.replace([np.inf, -np.inf], None).where(pd.notnull(df), None)
-    return df_clean.to_dict(orient="split")
+    import pandas as pd  # Only the results endpoints need pandas, keep it out of server start-up
+
+    numeric = all(pd.api.types.is_numeric_dtype(dt) for dt in df.dtypes)
+    if not numeric:
+        # Replaces Infinity and NaN with None for valid JSON
+        df_clean = df.replace([np.inf, -np.inf], None).where(pd.notnull(df), None)
+        return df_clean.to_dict(orient="split")
+
+    # Numeric frames: convert column by column (ints stay ints), patch only non-finite cells
+    columns = []
+    for name in df.columns:
+        arr = df[name].to_numpy()
+        values = arr.tolist()
+        if np.issubdtype(arr.dtype, np.floating):
+            for i in np.flatnonzero(~np.isfinite(arr)).tolist():
+                values[i] = None
+        columns.append(values)
+    return {"index": df.index.tolist(), "columns": df.columns.tolist(), "data": [list(row) for row in zip(*columns)]}
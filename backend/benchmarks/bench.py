@@ -0,0 +1,191 @@
+"""
+Parser / writer benchmarks on synthetic projects.
+
+    python -m benchmarks.bench --nodes 225 10000 100000 --hills 1 --forcing-steps 10000 -o bench.json
+    python -m benchmarks.bench ... --compare old_bench.json
+
+Every case is timed `repeat` times (min / median / mean in seconds) and written to
+JSON together with commit and environment, so runs on different commits can be diffed.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.synthetic import SyntheticSpec, write_synthetic_project
+from model.heterogeneity import HeterogeneityMap
+from model.fields import compute_effective_parameters
+from model.geometry import compute_geometry
+from model.hydraulics import HydraulicTables
+from model.inputs.assigments.macropores import MacroporeDef
+from model.inputs.assigments.soil import SoilAssignment
+from model.inputs.boundaries.initital import SoilWaterIC
+from model.inputs.boundaries.map import BoundaryConditions
+from model.inputs.forcing.configuration import ForcingConfiguration
+from model.inputs.mesh import HillslopeMesh
+from model.outputs import SimulationResults
+from model.project import CATFLOWProject
+from model.storage import integrate_storage
+
+HILL = "in/hill_1"
+
+
+def time_call(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    runs = []
+    for _ in range(repeat):
+        # The model classes print progress, keep it out of the timings and the console
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            fn()
+            runs.append(time.perf_counter() - t0)
+    return {
+        "min": min(runs),
+        "median": statistics.median(runs),
+        "mean": statistics.fmean(runs),
+        "repeat": repeat,
+    }
+
+
+def bench_cases(root: Path, scratch: Path, project: CATFLOWProject, spec: SyntheticSpec) -> Dict[str, Callable]:
+    nl, nc = spec.n_layers, spec.n_cols
+    hill = project.hills[0]
+    p = lambda rel: str(root / rel)
+    w = lambda name: str(scratch / name)
+    tables = HydraulicTables.from_library(project.soil_library)
+    results = SimulationResults.load_from_folder(str(root), nl, nc)
+    psi_field = -np.logspace(-2, 3, hill.soil_map.assignment_matrix.size).reshape(hill.soil_map.assignment_matrix.shape)
+
+    return {
+        # Parsers
+        "parse.mesh": lambda: HillslopeMesh.from_file(p(f"{HILL}/hang.geo")),
+        "parse.boden": lambda: SoilAssignment.from_file(p(f"{HILL}/soils.bod"), nl, nc),
+        "parse.initial": lambda: SoilWaterIC.from_file(p(f"{HILL}/initial.ini"), nl, nc),
+        "parse.macropores": lambda: MacroporeDef.from_file(p(f"{HILL}/profil.mak"), nl, nc),
+        "parse.boundary": lambda: BoundaryConditions.from_file(p(f"{HILL}/boundary.rb"), nl, nc),
+        "parse.heterogeneity": lambda: HeterogeneityMap.from_file(p(f"{HILL}/kstat.dat")),
+        "parse.forcing": lambda: ForcingConfiguration.from_file(p("in/control/timeser.def")),
+        "parse.results": lambda: SimulationResults.load_from_folder(str(root), nl, nc),
+
+        # Writers
+        "write.mesh": lambda: hill.mesh.to_file(w("hang.geo")),
+        "write.boden": lambda: hill.soil_map.to_file(w("soils.bod")),
+        "write.initial": lambda: hill.initial_cond_sat.to_file(w("initial.ini")),
+        "write.macropores": lambda: hill.macropores.to_file(w("profil.mak")),
+        "write.boundary": lambda: hill.boundary.to_file(w("boundary.rb")),
+        "write.heterogeneity": lambda: hill.k_scaling.to_file(w("kstat.dat")),
+        "write.forcing": lambda: project.forcing.to_file(str(scratch / "forcing" / "in/control/timeser.def")),
+
+        # Soil hydraulics
+        "hydraulics.tables": lambda: HydraulicTables.from_library(project.soil_library),
+        "hydraulics.lookup": lambda: tables.lookup("conductivity", hill.soil_map.assignment_matrix, psi_field),
+        "fields.effective": lambda: compute_effective_parameters(hill, project.soil_library),
+        "fields.effective_cached": lambda: hill.effective_parameters(project.soil_library),
+        "fields.ic_to_theta": lambda: hill.initial_cond_sat.converted(
+            "THETA", hill.effective_parameters(project.soil_library), hill.mesh.fields['hko']),
+        "mesh.geometry": lambda: compute_geometry(hill.mesh),
+        "mesh.geometry_cached": lambda: hill.mesh.geometry,
+
+        # Results analysis
+        "results.storage": lambda: integrate_storage(hill.mesh, results.moisture_fields, hill.cv_def),
+
+        # Full cycle
+        "project.load": lambda: CATFLOWProject.from_legacy_folder(str(root)),
+        "project.export": lambda: project.write_to_folder(str(scratch / "export"), force=True),
+    }
+
+
+def run_spec(spec: SyntheticSpec, repeat: int, only: List[str]) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="catflow-bench-") as tmp:
+        root = Path(tmp) / "project"
+        scratch = Path(tmp) / "scratch"
+        scratch.mkdir()
+        with contextlib.redirect_stdout(io.StringIO()):
+            project = write_synthetic_project(str(root), spec)
+
+        bytes_on_disk = sum(f.stat().st_size for f in root.rglob("*") if f.is_file())
+        timings = {}
+        for name, fn in bench_cases(root, scratch, project, spec).items():
+            if only and not any(name.startswith(o) for o in only):
+                continue
+            timings[name] = time_call(fn, repeat)
+            print(f"  {name:<22} {timings[name]['median'] * 1000:10.2f} ms")
+
+    return {"spec": spec.to_dict(), "bytes_on_disk": bytes_on_disk, "timings": timings}
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(current: Dict, baseline_path: str):
+    """Prints median ratios current / baseline for every case present in both runs"""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    key = lambda r: (r["spec"]["n_nodes"], r["spec"]["n_hills"], r["spec"]["forcing_steps"])
+    old = {key(r): r for r in baseline["results"]}
+
+    print(f"\nCompared to {baseline['environment'].get('commit')} ({baseline_path}):")
+    for result in current["results"]:
+        ref = old.get(key(result))
+        if ref is None:
+            continue
+        print(f"  nodes={result['spec']['n_nodes']} hills={result['spec']['n_hills']}")
+        for name, t in result["timings"].items():
+            if name in ref["timings"]:
+                ratio = t["median"] / ref["timings"][name]["median"]
+                flag = "  <-- slower" if ratio > 1.2 else ""
+                print(f"    {name:<22} x{ratio:6.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CATFLOW parser/writer benchmarks on synthetic projects")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[225, 10_000], help="Nodes per hill")
+    parser.add_argument("--hills", type=int, nargs="+", default=[1])
+    parser.add_argument("--forcing-steps", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--result-steps", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", default=[], help="Case name prefixes, e.g. parse.mesh write.")
+    parser.add_argument("-o", "--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Previous JSON output to compare against")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n_nodes in args.nodes:
+        for n_hills in args.hills:
+            for steps in args.forcing_steps:
+                spec = SyntheticSpec.from_nodes(n_nodes, n_hills=n_hills, forcing_steps=steps, result_steps=args.result_steps)
+                print(f"nodes={spec.n_nodes} ({spec.n_layers}x{spec.n_cols}) hills={n_hills} forcing_steps={steps}")
+                results.append(run_spec(spec, args.repeat, args.only))
+
+    report = {"environment": environment(), "results": results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Benchmark results written to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Server start-up import cost.
+
+    python -m benchmarks.importtime [--runs 5] [--budget-ms 800] [--forbid pandas ...] [-o importtime.json]
+
+Runs `python -X importtime -c "import run"` in a fresh interpreter (best of --runs) and reports
+the total and the modules with the highest cumulative cost. Heavy modules that are only needed
+by some endpoints (pandas for results, process pools for export) must not be imported eagerly;
+the check fails if one of them shows up or the total exceeds the budget. Exits with 1 then.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Only used by single endpoints, imported inside the functions that need them
+DEFAULT_FORBIDDEN = ("pandas", "model.outputs", "concurrent.futures.process")
+
+
+def measure_once(target: str = "run") -> Dict[str, Tuple[int, int]]:
+    """module -> (self us, cumulative us) of one cold import of target"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+def measure(target: str = "run", runs: int = 5) -> Dict[str, Tuple[int, int]]:
+    """Best of several runs (the first one usually pays for a cold file system cache)"""
+    best = None
+    for _ in range(max(runs, 1)):
+        modules = measure_once(target)
+        if best is None or modules.get(target, (0, 0))[1] < best.get(target, (0, 0))[1]:
+            best = modules
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import time of the backend server module")
+    parser.add_argument("--target", default="run", help="Module to import (default: run)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the total import time exceeds this")
+    parser.add_argument("--forbid", nargs="*", default=list(DEFAULT_FORBIDDEN),
+                        help="Modules that must not be imported at start-up")
+    parser.add_argument("-o", "--output", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    modules = measure(args.target, args.runs)
+    total_ms = modules.get(args.target, (0, 0))[1] / 1000
+
+    print(f"import {args.target}: {total_ms:.1f} ms ({len(modules)} modules, best of {args.runs})")
+    print(f"\nTop {args.top} by cumulative time:")
+    ranked = sorted(modules.items(), key=lambda kv: kv[1][1], reverse=True)
+    for name, (self_us, cumulative_us) in ranked[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:6.1f} ms)  {name}")
+
+    violations: List[str] = []
+    for name in args.forbid:
+        if name in modules:
+            violations.append(f"{name} is imported at start-up ({modules[name][1] / 1000:.1f} ms)")
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        violations.append(f"total import time {total_ms:.1f} ms > budget {args.budget_ms:.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "target": args.target,
+                "total_ms": round(total_ms, 3),
+                "violations": violations,
+                "modules": {name: {"self_us": s, "cumulative_us": c} for name, (s, c) in ranked},
+            }, f, indent=2)
+
+    if violations:
+        print("\n❌ IMPORT BUDGET EXCEEDED:")
+        for v in violations:
+            print(f"   • {v}")
+        return 1
+    print("\n✅ Import budget met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
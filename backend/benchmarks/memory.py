@@ -0,0 +1,173 @@
+"""
+Allocation profile of the parsers on synthetic inputs of growing size.
+
+    python -m benchmarks.memory --nodes 1000 10000 50000 [--budgets budgets.json] [-o memory.json]
+
+For every case the peak (highest traced allocation during the call) and retained
+(still allocated while the parsed object is alive) bytes are measured with tracemalloc.
+Budgets are bytes per unit (node, node x time step, forcing row) and are checked against
+the slope between the measured sizes, so fixed overhead does not count against them.
+Exits with 1 if any budget is exceeded.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas  # noqa: F401  results loading imports it lazily, keep the import out of the measurement
+
+from benchmarks.synthetic import SyntheticSpec, write_synthetic_project
+from model.heterogeneity import HeterogeneityMap
+from model.inputs.assigments.macropores import MacroporeDef
+from model.inputs.assigments.soil import SoilAssignment
+from model.inputs.boundaries.initital import SoilWaterIC
+from model.inputs.boundaries.map import BoundaryConditions
+from model.inputs.forcing.configuration import ForcingConfiguration
+from model.inputs.mesh import HillslopeMesh
+from model.outputs import SimulationResults
+
+HILL = "in/hill_1"
+
+# case -> (unit, peak bytes per unit, retained bytes per unit)
+# Retained budgets sit just above the array payload (e.g. 52 B/node for the mesh dtype),
+# a python list of floats alone costs 32 B per element and fails them.
+DEFAULT_BUDGETS: Dict[str, Tuple[str, float, float]] = {
+    "mesh":          ("node", 400, 80),
+    "boden":         ("node", 64, 16),
+    "initial":       ("node", 100, 16),
+    "macropores":    ("node", 64, 40),
+    "boundary":      ("node", 32, 16),
+    "heterogeneity": ("node", 100, 16),
+    "results":       ("node_step", 64, 24),
+    "forcing":       ("row", 400, 100),
+}
+
+
+def measure(fn: Callable[[], object]) -> Dict[str, int]:
+    """Peak and retained traced bytes of a single call"""
+    gc.collect()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    del result
+    return {"peak": peak - base, "retained": current - base}
+
+
+def memory_cases(root: Path, spec: SyntheticSpec) -> Dict[str, Tuple[Callable, int]]:
+    """case -> (call, number of units)"""
+    nl, nc = spec.n_layers, spec.n_cols
+    p = lambda rel: str(root / rel)
+    return {
+        "mesh": (lambda: HillslopeMesh.from_file(p(f"{HILL}/hang.geo")), spec.n_nodes),
+        "boden": (lambda: SoilAssignment.from_file(p(f"{HILL}/soils.bod"), nl, nc), spec.n_nodes),
+        "initial": (lambda: SoilWaterIC.from_file(p(f"{HILL}/initial.ini"), nl, nc), spec.n_nodes),
+        "macropores": (lambda: MacroporeDef.from_file(p(f"{HILL}/profil.mak"), nl, nc), spec.n_nodes),
+        "boundary": (lambda: BoundaryConditions.from_file(p(f"{HILL}/boundary.rb"), nl, nc), spec.n_nodes),
+        "heterogeneity": (lambda: HeterogeneityMap.from_file(p(f"{HILL}/kstat.dat")), spec.n_nodes),
+        "results": (lambda: SimulationResults.load_from_folder(str(root), nl, nc), spec.n_nodes * spec.result_steps),
+        "forcing": (lambda: ForcingConfiguration.from_file(p("in/control/timeser.def")), spec.forcing_steps),
+    }
+
+
+def profile_sizes(node_counts: List[int], forcing_steps_per_node: float, result_steps: int) -> Dict[str, List[Dict]]:
+    """case -> one measurement per size (units, peak, retained)"""
+    series: Dict[str, List[Dict]] = {}
+    for n_nodes in node_counts:
+        spec = SyntheticSpec.from_nodes(
+            n_nodes, forcing_steps=max(100, int(n_nodes * forcing_steps_per_node)), result_steps=result_steps
+        )
+        print(f"nodes={spec.n_nodes} ({spec.n_layers}x{spec.n_cols}) forcing_steps={spec.forcing_steps}")
+        with tempfile.TemporaryDirectory(prefix="catflow-mem-") as tmp:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                write_synthetic_project(tmp, spec)
+            for name, (fn, units) in memory_cases(Path(tmp), spec).items():
+                m = measure(fn)
+                series.setdefault(name, []).append({"units": units, **m})
+                print(f"  {name:<14} peak {m['peak'] / 1024:10.1f} KiB   retained {m['retained'] / 1024:10.1f} KiB")
+    return series
+
+
+def per_unit(points: List[Dict], key: str) -> float:
+    """Marginal bytes per unit: slope of a least squares fit, plain ratio for a single size"""
+    units = np.array([p["units"] for p in points], dtype=float)
+    values = np.array([p[key] for p in points], dtype=float)
+    if len(points) < 2 or np.ptp(units) == 0:
+        return float(values[-1] / max(units[-1], 1))
+    return float(np.polyfit(units, values, 1)[0])
+
+
+def check_budgets(series: Dict[str, List[Dict]], budgets: Dict[str, Tuple[str, float, float]]) -> Tuple[Dict, List[str]]:
+    report, violations = {}, []
+    for name, points in series.items():
+        unit, peak_budget, retained_budget = budgets.get(name, ("unit", float("inf"), float("inf")))
+        entry = {
+            "unit": unit,
+            "peak_per_unit": per_unit(points, "peak"),
+            "retained_per_unit": per_unit(points, "retained"),
+            "budget": {"peak_per_unit": peak_budget, "retained_per_unit": retained_budget},
+            "points": points,
+        }
+        for key, budget in (("peak_per_unit", peak_budget), ("retained_per_unit", retained_budget)):
+            if entry[key] > budget:
+                violations.append(f"{name}: {key} {entry[key]:.1f} B/{unit} exceeds budget {budget} B/{unit}")
+        report[name] = entry
+    return report, violations
+
+
+def load_budgets(path: str) -> Dict[str, Tuple[str, float, float]]:
+    """JSON: {"mesh": {"unit": "node", "peak": 1200, "retained": 160}, ...} overrides the defaults"""
+    budgets = dict(DEFAULT_BUDGETS)
+    if path:
+        with open(path, 'r') as f:
+            for name, b in json.load(f).items():
+                unit, peak, retained = budgets.get(name, ("unit", float("inf"), float("inf")))
+                budgets[name] = (b.get("unit", unit), b.get("peak", peak), b.get("retained", retained))
+    return budgets
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="tracemalloc allocation budgets for the CATFLOW parsers")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[2_000, 10_000, 40_000])
+    parser.add_argument("--forcing-steps-per-node", type=float, default=1.0)
+    parser.add_argument("--result-steps", type=int, default=5)
+    parser.add_argument("--budgets", help="JSON file overriding the default budgets")
+    parser.add_argument("-o", "--output", help="Write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    tracemalloc.start()
+    try:
+        series = profile_sizes(args.nodes, args.forcing_steps_per_node, args.result_steps)
+    finally:
+        tracemalloc.stop()
+
+    report, violations = check_budgets(series, load_budgets(args.budgets))
+
+    print("\nBytes per unit (slope over sizes):")
+    for name, e in report.items():
+        print(f"  {name:<14} peak {e['peak_per_unit']:8.1f} / {e['budget']['peak_per_unit']:<8}"
+              f" retained {e['retained_per_unit']:7.1f} / {e['budget']['retained_per_unit']:<6} B/{e['unit']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"budgets_exceeded": violations, "cases": report}, f, indent=2)
+
+    if violations:
+        print("\n❌ MEMORY BUDGETS EXCEEDED:")
+        for v in violations:
+            print(f"   • {v}")
+        return 1
+    print("\n✅ All memory budgets met")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Synthetic CATFLOW projects for benchmarks.
+Builds a complete in-memory project of arbitrary size (nodes per hill, hill count,
+forcing length) from the model classes, so it always round-trips through our own
+parsers and writers. write_synthetic_project() also writes fake simulation outputs.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from model.config import GlobalConfig, RunControl
+from model.heterogeneity import HeterogeneityMap
+from model.inputs.assigments.macropores import MACROPORE_DTYPE, MacroporeDef, MacroporeHeader
+from model.inputs.assigments.soil import SoilAssignment
+from model.inputs.assigments.surface import SurfaceAssignment, SurfaceRow
+from model.inputs.boundaries.initital import SoilWaterIC
+from model.inputs.boundaries.map import BC_ATMOSPHERIC, BC_FREE_FLOW, BoundaryConditions
+from model.inputs.controll_volume import ControlVolumeDef
+from model.inputs.forcing.climate import ClimateData
+from model.inputs.forcing.configuration import ForcingConfiguration
+from model.inputs.forcing.landuse.library import LandUseLibrary, LandUseType
+from model.inputs.forcing.landuse.lookup import LandUseLookup
+from model.inputs.forcing.landuse.plants import PlantDefinition, PlantParameterRow
+from model.inputs.forcing.landuse.timeline import LandUsePeriod, LandUseTimeline
+from model.inputs.forcing.precipitation import PrecipitationData
+from model.inputs.mesh import HILLSLOPE_DTYPE, LATERAL_VECTOR_DTYPE, HillslopeMesh, HillslopeMeshCoordsVectors, HillslopeMeshHeader
+from model.inputs.soil import SoilLibrary, SoilType
+from model.inputs.wind import WindLibrary, WindSector
+from model.printout import PrintoutTimes
+from model.project import CATFLOWProject, Hill
+
+START = datetime(2004, 1, 1)
+START_STR = "01.01.2004 00:00:00.00"
+
+BILANZ_COLUMNS = 18
+
+# Same output block as the shipped templates (the run file parser expects a long flag line)
+OUTPUT_FILES = (
+    "out/log.out", "out/vg_tab.out", "out/bilanz.csv", "out/theta.out", "out/psi.out", "out/psi.fin",
+    "out/fl_xsi.out", "out/fl_eta.out", "out/senken.out", "out/qoben.out", "out/evapo.out", "out/gang.out",
+    "out/ve.out", "out/vx.out", "out/c.out", "out/hko.out", "out/sko.out", "out/relsat.out",
+)
+
+
+@dataclass
+class SyntheticSpec:
+    n_layers: int = 15          # Vertical nodes per hill (iacnv)
+    n_cols: int = 15            # Lateral nodes per hill (iacnl)
+    n_hills: int = 1
+    forcing_steps: int = 1000   # Rows per precipitation / climate series
+    result_steps: int = 10      # Time steps in theta.out / psi.out
+    n_soils: int = 3
+    seed: int = 0
+
+    @property
+    def n_nodes(self) -> int:
+        return self.n_layers * self.n_cols
+
+    @classmethod
+    def from_nodes(cls, n_nodes: int, **kwargs) -> 'SyntheticSpec':
+        """Hillslopes are long and shallow: 1 layer per ~4 columns"""
+        n_layers = max(2, int(round(np.sqrt(n_nodes / 4))))
+        n_cols = max(2, int(round(n_nodes / n_layers)))
+        return cls(n_layers=n_layers, n_cols=n_cols, **kwargs)
+
+    def to_dict(self) -> dict:
+        return {**self.__dict__, "n_nodes": self.n_nodes}
+
+
+def build_synthetic_project(spec: SyntheticSpec) -> CATFLOWProject:
+    rng = np.random.default_rng(spec.seed)
+    project = CATFLOWProject(name=f"synthetic_{spec.n_nodes}x{spec.n_hills}")
+
+    project.config = GlobalConfig(run_filename="run_01.in", scale_factor=2.0)
+    end = START + timedelta(days=max(1, spec.forcing_steps // 240))
+    project.run_control = RunControl(
+        start_time=START_STR, end_time=end.strftime("%d.%m.%Y %H:%M:%S.00"), offset=0.0, method="pic",
+        dt_bach=3600.0, qtol=1e-4, dt_max=3600.0, dt_min=0.01, dt_init=10.0,
+        d_th_opt=0.03, d_phi_opt=0.03, n_gr=4, it_max=8, piceps=1e-3, cgeps=1e-6,
+        rlongi=15.0, longi=8.683, lati=49.03, istact=0, seed=1234, noiact=0,
+        output_files=list(OUTPUT_FILES)
+    )
+
+    project.soil_library = SoilLibrary(soils=[
+        SoilType(
+            id=i + 1, name=f"Synthetic soil {i + 1}", model_id=1, table_size=800,
+            anisotropy_x=1.0, anisotropy_z=1.0, s_null=0.09,
+            ks=float(10 ** rng.uniform(-7, -4)), theta_s=float(rng.uniform(0.35, 0.5)),
+            theta_r=float(rng.uniform(0.02, 0.1)), alpha=float(rng.uniform(0.5, 5.0)),
+            n_param=float(rng.uniform(1.1, 2.5)), extra_params=[0.5, 1.0]
+        )
+        for i in range(spec.n_soils)
+    ])
+
+    project.forcing = _build_forcing(spec, rng)
+    project.land_use_library = LandUseLibrary(types=[
+        LandUseType(id=i + 1, name=name, definition=_plant(name, rng), original_rel_path=f"in/landuse/{name}.par")
+        for i, name in enumerate(["wiese", "laubwald", "nadelwald"])
+    ])
+    project.wind_library = WindLibrary(sectors=[WindSector(a, 1.0) for a in (90.0, 180.0, 270.0, 360.0)])
+
+    project.hills = [_build_hill(h + 1, spec, rng) for h in range(spec.n_hills)]
+    return project
+
+
+def _build_forcing(spec: SyntheticSpec, rng: np.random.Generator) -> ForcingConfiguration:
+    t = np.arange(spec.forcing_steps, dtype=float) / 240.0   # 6 min steps in days
+    rain = np.where(rng.random(spec.forcing_steps) < 0.1, rng.gamma(0.8, 2.0, spec.forcing_steps), 0.0)
+    precip = PrecipitationData(
+        filename="precip.dat", header_date=START_STR, factor_t=86400.0, factor_v=0.277e-5,
+        data=np.column_stack([t, rain])
+    )
+
+    climate_values = np.column_stack([
+        t,
+        rng.uniform(0, 1, spec.forcing_steps),
+        rng.uniform(0, 1, spec.forcing_steps),
+        10 + 8 * np.sin(2 * np.pi * t) + rng.normal(0, 1, spec.forcing_steps),
+        rng.uniform(40, 100, spec.forcing_steps),
+        rng.uniform(0, 5, spec.forcing_steps),
+        rng.uniform(0, 360, spec.forcing_steps),
+    ])
+    climate = ClimateData("climate.dat", "1 1", START_STR, 86400.0, [8.0, -6.0, 0.7, 0.28e-3, 1.5, 0.1], climate_values)
+
+    timeline = LandUseTimeline(
+        periods=[LandUsePeriod(START_STR, LandUseLookup("lu_set1.dat", 1, {11: 1, 22: 2, 33: 3}))],
+        end_time="01.01.2010 00:00:00.00"
+    )
+    return ForcingConfiguration(precip_data=[precip], climate_data=[climate], landuse_timeline=timeline)
+
+
+def _plant(name: str, rng: np.random.Generator) -> PlantDefinition:
+    labels = ["KST", "MAK", "BFI", "BBG", "TWU", "PFH", "PALB", "RSTMIN", "WP_BFW", "F_BFW"]
+    rows = [PlantParameterRow(day=d, params=list(np.round(rng.uniform(0.1, 5.0, len(labels)), 3)))
+            for d in (0, 90, 180, 270, 365)]
+    return PlantDefinition(name=name, filename=f"{name}.par", header_labels=labels, table=rows)
+
+
+def _build_hill(hill_id: int, spec: SyntheticSpec, rng: np.random.Generator) -> Hill:
+    nl, nc = spec.n_layers, spec.n_cols
+    hill = Hill(id=hill_id, name=f"Hill {hill_id}")
+
+    # Mesh: 2 m deep, 10 m lateral spacing, gently sloping surface
+    length = 10.0 * (nc - 1)
+    xsi = np.linspace(0.0, 1.0, nc)
+    header = HillslopeMeshHeader(
+        iacnv=nl, iacnl=nc, w_fix=0.0, hangnr=hill_id, hgobfl=length * 10.0, hgbreit=10.0, hglang=length,
+        refrence_kords={"xkobez": 3480100.0, "ykobez": 5445400.0, "hkobez": 200.0}
+    )
+    xsis = np.zeros(nc, dtype=LATERAL_VECTOR_DTYPE)
+    xsis['xsi'] = xsi
+    xsis['xko'] = xsi * length
+    xsis['yko'] = 0.0
+    xsis['varbr'] = 10.0
+    mesh = HillslopeMesh(header=header, vector_definition=HillslopeMeshCoordsVectors(
+        etas=np.linspace(0.0, 1.0, nl), xsis=xsis
+    ))
+
+    eta = np.linspace(0.0, 1.0, nl)
+    surface = 200.0 + 0.05 * length * (1.0 - xsi) + rng.normal(0, 0.05, nc)
+    soil_ids = 1 + np.minimum((spec.n_soils * (1.0 - eta)).astype(int), spec.n_soils - 1)
+
+    data = np.zeros((nc, nl), dtype=HILLSLOPE_DTYPE)
+    data['hko'] = surface[:, None] - 2.0 * (1.0 - eta[None, :])
+    data['sko'] = (xsi * length)[:, None]
+    data['f_eta'] = 2.0
+    data['f_xsi'] = length
+    data['iboden'] = soil_ids[None, :]
+    mesh.data = data
+    hill.mesh = mesh
+
+    # Soil map with some lateral variation so the BODEN matrix is not trivial
+    matrix = np.broadcast_to(soil_ids[None, :], (nc, nl)).copy()
+    patches = rng.random((nc, nl)) < 0.05
+    matrix[patches] = rng.integers(1, spec.n_soils + 1, int(patches.sum()))
+    hill.soil_map = SoilAssignment(assignment_matrix=matrix)
+
+    hill.k_scaling = HeterogeneityMap(factors=np.round(rng.lognormal(0.0, 0.3, (nl, nc)), 3))
+    hill.theta_scaling = HeterogeneityMap(factors=np.round(rng.lognormal(0.0, 0.1, (nl, nc)), 3))
+
+    # Macropores: topsoil only, fmac changing every 5 columns
+    macropores = MacroporeDef(header=MacroporeHeader(velocity_method='ari', anisotropy=1, assignment_mode=1))
+    mak = np.zeros((nc, nl), dtype=MACROPORE_DTYPE)
+    mak['fmac'] = 1.0
+    mak['amac'] = 1.0
+    mak['beta'] = 1.0
+    top = max(1, nl // 5)
+    mak['fmac'][:, nl - top:] = np.repeat(np.round(rng.uniform(1.0, 3.0, (nc + 4) // 5), 2), 5)[:nc, None]
+    macropores.data = mak
+    hill.macropores = macropores
+
+    hill.cv_def = ControlVolumeDef(blocks=[[0.0, 1.0, 0.0, 1.0], [0.8, 1.0, 0.0, 1.0]])
+    hill.initial_cond_sat = SoilWaterIC(data=np.round(-1.0 - 2.0 * eta[None, :] + rng.normal(0, 0.1, (nc, nl)), 4), type='PSI')
+    hill.printout = PrintoutTimes(
+        reference_time=START, time_factor=3600.0,
+        output_steps=[(float(t), 1) for t in range(spec.result_steps)]
+    )
+    hill.surface_map = SurfaceAssignment(
+        header={"n_attr_class": 3, "n_wind_dir": 4, "n_horizon": 0},
+        surface_data=[SurfaceRow(i, 11 * (1 + i % 3), 1, 1, ["1.00"] * 4) for i in range(nc)]
+    )
+
+    left = np.zeros(nl, dtype=int)
+    right = np.zeros(nl, dtype=int)
+    right[: nl // 2] = BC_FREE_FLOW
+    hill.boundary = BoundaryConditions(
+        left=left, right=right,
+        top=np.full(nc, BC_ATMOSPHERIC, dtype=int), bottom=np.full(nc, BC_FREE_FLOW, dtype=int),
+        sinks=np.zeros((nc, nl), dtype=int)
+    )
+    return hill
+
+
+def write_synthetic_project(folder: str, spec: SyntheticSpec) -> CATFLOWProject:
+    """Writes the synthetic project as a legacy folder, plus fake out/ files shaped like a CATFLOW run"""
+    project = build_synthetic_project(spec)
+    project.write_to_folder(folder, force=True)
+    write_synthetic_results(Path(folder) / "out", spec)
+    return project
+
+
+def write_synthetic_results(out_dir: Path, spec: SyntheticSpec):
+    rng = np.random.default_rng(spec.seed + 1)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    nl, nc = spec.n_layers, spec.n_cols
+
+    for name, low, high in (("theta.out", 0.05, 0.45), ("psi.out", -5.0, 0.0)):
+        with open(out_dir / name, 'w') as f:
+            for step in range(spec.result_steps):
+                f.write(f" Time:   {step * 3600.0:.1f}\n")
+                np.savetxt(f, rng.uniform(low, high, (nl, nc)), fmt="%.5f")
+
+    steps = np.arange(spec.result_steps * 10)
+    bilanz = np.column_stack([
+        np.ones_like(steps), steps, steps * 360.0,
+        rng.normal(0, 1e-3, (steps.size, BILANZ_COLUMNS - 3))
+    ])
+    np.savetxt(out_dir / "bilanz.csv", bilanz, delimiter=';', fmt="%.6g")
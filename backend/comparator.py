@@ -1,8 +1,92 @@
 import difflib
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Iterator, List, Dict, Optional, Tuple
 import re
 
+CHUNK_SIZE = 1024 * 1024
+MAX_DIFFS_TO_REPORT = 3
+
+
+def tokenize_line(line: str) -> List[str]:
+    # Remove comments
+    clean = line.split('%')[0].split('#')[0].strip()
+    if not clean: return []
+    
+    # Split tokens
+    raw_tokens = clean.split()
+    normalized = []
+    for t in raw_tokens:
+        try:
+            # Try to parse as float
+            val = float(t)
+            # Format consistently: 6 decimal places scientific
+            # This makes 1.00 and 1.0 equal string wise for diff
+            normalized.append(f"{val:.6e}")
+        except ValueError:
+            # Keep as string (e.g. 'pic', 'Laubwald')
+            # Remove quotes for comparison
+            normalized.append(t.replace("'", "").replace('"', ""))
+            
+    return normalized
+
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _content_lines(path: Path) -> Iterator[str]:
+    """Streams the comment-free, non-empty lines of a file"""
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            clean = line.split('%')[0].split('#')[0].strip()
+            if clean:
+                yield clean
+
+
+def diff_file_pair(file_a: str, file_b: str) -> Dict[str, Any]:
+    """
+    Semantic token comparison of two files, streamed line by line.
+    Lines are only tokenized (number normalization) when their raw text differs.
+    Module level so it can run in a process pool.
+    """
+    lines_a = _content_lines(Path(file_a))
+    lines_b = _content_lines(Path(file_b))
+    mismatches = []
+    n_mismatch = 0
+    n_a = n_b = 0
+    
+    # Compare line by line (best effort matching)
+    while True:
+        a = next(lines_a, None)
+        b = next(lines_b, None)
+        if a is None and b is None:
+            break
+        if a is not None: n_a += 1
+        if b is not None: n_b += 1
+        if a is None or b is None or a == b:
+            continue
+        
+        tok_a, tok_b = tokenize_line(a), tokenize_line(b)
+        if tok_a != tok_b:
+            n_mismatch += 1
+            if len(mismatches) < MAX_DIFFS_TO_REPORT:
+                mismatches.append({"line": n_a, "old": tok_a, "new": tok_b})
+    
+    equivalent = n_mismatch == 0 and n_a == n_b
+    return {
+        "status": "equivalent" if equivalent else "different",
+        "n_mismatched_lines": n_mismatch,
+        "line_count": [n_a, n_b],
+        "mismatches": mismatches
+    }
+
+
 class CATFLOWComparator:
     def __init__(self, folder_a: str, folder_b: str):
         self.a = Path(folder_a).resolve()
@@ -55,6 +139,77 @@ class CATFLOWComparator:
             elif path_b:
                 print(f" ➕ {label} added in New project (New: {path_b})")
 
+    def compare_report(self, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Machine-readable comparison.
+        File pairs are hashed first and byte-identical pairs are skipped;
+        only the differing pairs are tokenized, in a process pool.
+        Per-file status: identical | equivalent | different | missing_a | missing_b | missing_on_disk
+        """
+        report: Dict[str, Any] = {
+            "folder_a": str(self.a),
+            "folder_b": str(self.b),
+            "files": [],
+            "summary": {}
+        }
+        
+        run_a = self._find_run_file(self.a)
+        run_b = self._find_run_file(self.b)
+        if not run_a or not run_b or not run_a.exists() or not run_b.exists():
+            report["error"] = "Could not find run file in one or both folders"
+            return report
+        
+        # 1. Pair up files by role
+        pairs: List[Tuple[str, Optional[Path], Optional[Path]]] = [("run_file", run_a, run_b)]
+        roles_a = self._parse_run_roles(run_a)
+        roles_b = self._parse_run_roles(run_b)
+        for role in sorted(set(roles_a.keys()) | set(roles_b.keys())):
+            path_a = roles_a.get(role)
+            path_b = roles_b.get(role)
+            pairs.append((
+                role,
+                self.a / path_a if path_a else None,
+                self.b / path_b if path_b else None
+            ))
+        
+        # 2. Hash short-circuit
+        to_diff = []
+        for role, full_a, full_b in pairs:
+            entry = {
+                "role": role,
+                "path_a": str(full_a.relative_to(self.a)) if full_a else None,
+                "path_b": str(full_b.relative_to(self.b)) if full_b else None,
+            }
+            report["files"].append(entry)
+            
+            if full_a is None:
+                entry["status"] = "missing_a"
+            elif full_b is None:
+                entry["status"] = "missing_b"
+            elif not full_a.is_file() or not full_b.is_file():
+                entry["status"] = "missing_on_disk"
+            elif full_a.stat().st_size == full_b.stat().st_size and _file_digest(full_a) == _file_digest(full_b):
+                entry["status"] = "identical"
+            else:
+                to_diff.append((entry, full_a, full_b))
+        
+        # 3. Tokenize only the differing pairs
+        if len(to_diff) > 1 and max_workers != 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                results = pool.map(diff_file_pair, [str(a) for _, a, _ in to_diff], [str(b) for _, _, b in to_diff])
+                for (entry, _, _), result in zip(to_diff, results):
+                    entry.update(result)
+        else:
+            for entry, full_a, full_b in to_diff:
+                entry.update(diff_file_pair(str(full_a), str(full_b)))
+        
+        summary: Dict[str, int] = {}
+        for entry in report["files"]:
+            summary[entry["status"]] = summary.get(entry["status"], 0) + 1
+        report["summary"] = summary
+        report["equal"] = all(e["status"] in ("identical", "equivalent") for e in report["files"])
+        return report
+
     def _find_run_file(self, folder: Path) -> Path:
         # Check CATFLOW.IN first
         cf = folder / "CATFLOW.IN"
@@ -170,27 +325,7 @@ class CATFLOWComparator:
         except: pass
 
     def _tokenize_line(self, line: str) -> List[str]:
-        # Remove comments
-        clean = line.split('%')[0].split('#')[0].strip()
-        if not clean: return []
-        
-        # Split tokens
-        raw_tokens = clean.split()
-        normalized = []
-        
-        for t in raw_tokens:
-            try:
-                # Try to parse as float
-                val = float(t)
-                # Format consistently: 6 decimal places scientific
-                # This makes 1.00 and 1.0 equal string wise for diff
-                normalized.append(f"{val:.6e}")
-            except ValueError:
-                # Keep as string (e.g. 'pic', 'Laubwald')
-                # Remove quotes for comparison
-                normalized.append(t.replace("'", "").replace('"', ""))
-                
-        return normalized
+        return tokenize_line(line)
 
     def _compare_files(self, file_a: Path, file_b: Path, label: str = None):
         try:
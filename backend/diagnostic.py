@@ -2,17 +2,91 @@
 CATFLOW Project Diagnostic Tool v2
 Updated for Profile-based Soil Assignment and Flexible Headers
 """
+import hashlib
+import os
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 import re
 
+HILL_FILE_ROLES = ['geo', 'bod', 'kstat', 'thstat', 'mak', 'cv', 'ini', 'prt', 'pob', 'rb']
+ISTACT_LINE = 18  # Number of solutes, same position RunControl.from_file reads it from
+
+
+def hill_file_roles(istact: int) -> List[str]:
+    """Per-hill file roles of a run file; a solute IC file follows the water IC when istact > 0"""
+    if istact <= 0:
+        return HILL_FILE_ROLES
+    at = HILL_FILE_ROLES.index('ini') + 1
+    return HILL_FILE_ROLES[:at] + ['sol_ini'] + HILL_FILE_ROLES[at:]
+
+
+class FileIndex:
+    """
+    In-memory index of a project tree, built by a single os.scandir walk.
+    Lookups by extension, file name and relative path replace repeated rglob calls.
+    """
+    def __init__(self, root: Path):
+        self.root = root
+        self.files: List[Path] = []
+        self.by_ext: Dict[str, List[Path]] = {}
+        self.by_name: Dict[str, List[Path]] = {}
+        self.by_rel: Dict[str, Path] = {}
+        self.signature = ""
+
+    @classmethod
+    def build(cls, root: str) -> 'FileIndex':
+        index = cls(Path(root).resolve())
+        h = hashlib.sha1()
+        stack = [str(index.root)] if index.root.is_dir() else []
+        while stack:
+            current = stack.pop()
+            try:
+                entries = sorted(os.scandir(current), key=lambda e: e.name)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    path = Path(entry.path)
+                    rel = path.relative_to(index.root).as_posix()
+                    st = entry.stat()
+                    h.update(f"{rel}|{st.st_size}|{st.st_mtime_ns}\n".encode())
+                    
+                    index.files.append(path)
+                    index.by_ext.setdefault(path.suffix.lower(), []).append(path)
+                    index.by_name.setdefault(entry.name.lower(), []).append(path)
+                    index.by_rel[rel.lower()] = path
+        index.signature = h.hexdigest()
+        return index
+
+    def with_ext(self, ext: str) -> List[Path]:
+        return self.by_ext.get(ext.lower(), [])
+
+    def named(self, name: str) -> List[Path]:
+        return self.by_name.get(name.lower(), [])
+
+    def name_contains(self, part: str) -> List[Path]:
+        part = part.lower()
+        return [p for name, paths in self.by_name.items() if part in name for p in paths]
+
+    def get(self, rel_path: str) -> Optional[Path]:
+        """Case-insensitive lookup of a path relative to the root (as written in run files)"""
+        return self.by_rel.get(rel_path.replace('\\', '/').lower())
+
+
 class CATFLOWDiagnostic:
     
-    def __init__(self, project_folder: str):
+    def __init__(self, project_folder: str, index: Optional[FileIndex] = None):
         self.folder = Path(project_folder).resolve()
+        self.index = index
         self.issues = []
         self.warnings = []
         self.info = []
+        self.run_file: Optional[Path] = None
+        self.global_files: List[str] = []
+        self.hill_files: List[Dict[str, str]] = []
+        self.geo_dims_by_hill: Dict[int, Tuple[int, int]] = {}
         
     def run_full_diagnostic(self) -> Dict[str, List[str]]:
         print(f"\n{'='*70}")
@@ -20,6 +94,9 @@ class CATFLOWDiagnostic:
         print(f"{'='*70}")
         print(f"Location: {self.folder}\n")
         
+        if self.index is None:
+            self.index = FileIndex.build(str(self.folder))
+        
         self.check_folder_structure()
         self.check_control_files()
         self.check_geometry()
@@ -60,22 +137,84 @@ class CATFLOWDiagnostic:
                 return
                 
             self.info.append(f"Run file: {run_file_name}")
+            self.run_file = run_file
+            self.global_files, self.hill_files = self._parse_run_inputs(run_file)
+            self.info.append(f"Run file lists {len(self.hill_files)} hill(s)")
+            
+            for i, files in enumerate(self.hill_files):
+                for role, rel in files.items():
+                    if self.index.get(rel) is None:
+                        self.issues.append(f"MISSING: Hill {i+1} {role} file {rel}")
             print("   ✓ Control files checked\n")
             
         except Exception as e:
             self.issues.append(f"Error reading control files: {e}")
 
+    def _parse_run_inputs(self, run_file: Path) -> Tuple[List[str], List[Dict[str, str]]]:
+        """Global input files and per-hill file roles listed after the output block of the run file"""
+        with open(run_file, 'r', errors='replace') as f:
+            lines = [l.split('%')[0].strip() for l in f if l.split('%')[0].strip()]
+        
+        # Output block: Count -> Flags (0/1 sequence) -> Files
+        idx = None
+        for i, line in enumerate(lines):
+            if i > 0 and len(line) > 5 and all(c in '01 ' for c in line) and lines[i-1].lstrip('-').isdigit():
+                idx = i - 1
+                break
+        if idx is None:
+            self.warnings.append("Could not locate output block in run file")
+            return [], []
+        
+        try:
+            istact = int(lines[ISTACT_LINE]) if len(lines) > ISTACT_LINE else 0
+        except ValueError:
+            self.warnings.append(f"Could not read istact from run file: {lines[ISTACT_LINE]}")
+            istact = 0
+        roles = hill_file_roles(istact)
+        
+        try:
+            idx += 2 + abs(int(lines[idx]))
+            n_global = int(lines[idx]); idx += 1
+            global_files = lines[idx:idx + n_global]; idx += n_global
+            n_hills = abs(int(lines[idx])); idx += 1
+            
+            hills = []
+            for _ in range(n_hills):
+                block = lines[idx:idx + len(roles)]
+                idx += len(roles)
+                hills.append(dict(zip(roles, block)))
+            return global_files, hills
+        except (IndexError, ValueError) as e:
+            self.issues.append(f"Error parsing input files of run file: {e}")
+            return [], []
+
+    def _hill_files_for(self, role: str) -> List[Tuple[int, str, Path]]:
+        """(hill_no, label, path) of the given role for every hill in the run file whose file exists"""
+        found = []
+        for i, files in enumerate(self.hill_files):
+            path = self.index.get(files.get(role, ''))
+            if path is not None:
+                found.append((i, f"Hill {i+1}", path))
+        return found
+
     def check_geometry(self):
         """Check geometry file with flexible header"""
         print("🗺️  Checking geometry...")
-        geo_files = list(self.folder.rglob("*.geo"))
+        geo_files = self._hill_files_for('geo')
+        if not geo_files:
+            geo_files = [(i, p.name, p) for i, p in enumerate(self.index.with_ext(".geo"))]
         
         if not geo_files:
             self.issues.append("MISSING: No .geo file found")
             return
         
-        geo_file = geo_files[0]
-        self.info.append(f"Geometry file: {geo_file.relative_to(self.folder)}")
+        for hill_no, label, geo_file in geo_files:
+            self._check_geometry_file(hill_no, label, geo_file)
+        
+        print("   ✓ Geometry checked\n")
+
+    def _check_geometry_file(self, hill_no: int, label: str, geo_file: Path):
+        self.info.append(f"Geometry file ({label}): {geo_file.relative_to(self.folder)}")
         
         try:
             with open(geo_file, 'r') as f:
@@ -87,21 +226,22 @@ class CATFLOWDiagnostic:
                 n_layers = int(match.group(1))
                 n_cols = int(match.group(2))
                 self.info.append(f"   Dimensions: {n_layers} layers × {n_cols} columns")
-                self.geo_dims = (n_layers, n_cols)
+                self.geo_dims_by_hill[hill_no] = (n_layers, n_cols)
+                if hill_no == 0:
+                    self.geo_dims = (n_layers, n_cols)
             else:
-                self.issues.append("   Could not parse geometry dimensions (Header missing)")
-            
-            print("   ✓ Geometry checked\n")
+                self.issues.append(f"   {label}: Could not parse geometry dimensions (Header missing)")
             
         except Exception as e:
-            self.issues.append(f"Error reading geometry file: {e}")
+            self.issues.append(f"Error reading geometry file {geo_file.name}: {e}")
     
     def check_soil_files(self):
         """Check soils with multi-line parameters and profile definitions"""
         print("🌱 Checking soil files...")
         
-        # 1. Check definitions (soils.def)
-        soil_defs = list(self.folder.rglob("soils.def"))
+        # 1. Check definitions (soils.def, first global input of the run file)
+        soil_defs = [p for p in [self.index.get(self.global_files[0])] if p] if self.global_files else []
+        soil_defs = soil_defs or self.index.named("soils.def")
         if not soil_defs:
             self.issues.append("MISSING: soils.def")
             return
@@ -144,14 +284,21 @@ class CATFLOWDiagnostic:
         except Exception as e:
             self.issues.append(f"Error parsing soils.def: {e}")
 
-        # 2. Check assignments (.bod)
-        bod_files = list(self.folder.rglob("*.bod"))
+        # 2. Check assignments (.bod) of every hill
+        bod_files = self._hill_files_for('bod')
+        if not bod_files:
+            bod_files = [(i, p.name, p) for i, p in enumerate(self.index.with_ext(".bod"))]
         if not bod_files:
             self.warnings.append("No .bod file found")
             return
+        
+        for hill_no, label, bod_file in bod_files:
+            self._check_bod_file(hill_no, label, bod_file)
             
-        bod_file = bod_files[0]
-        self.info.append(f"Soil assignments: {bod_file.relative_to(self.folder)}")
+        print("   ✓ Soil files checked\n")
+
+    def _check_bod_file(self, hill_no: int, label: str, bod_file: Path):
+        self.info.append(f"Soil assignments ({label}): {bod_file.relative_to(self.folder)}")
         
         try:
             with open(bod_file, 'r') as f:
@@ -161,15 +308,16 @@ class CATFLOWDiagnostic:
             lines = [l for l in lines if not l.startswith('%')]
             
             # Detect if Matrix or Profile
-            data_lines = lines[1:] if len(lines[0].split()) <= 2 else lines
+            is_matrix = lines[0].upper().startswith("BODEN")
+            data_lines = lines[1:] if is_matrix or len(lines[0].split()) <= 2 else lines
             
             # Heuristic: Profile definition has floats (0.0 0.8), Matrix has ints (1 1 2)
-            is_profile = '.' in data_lines[0] 
+            is_profile = not is_matrix and '.' in data_lines[0] 
             
+            assigned_ids = set()
             if is_profile:
                 self.info.append("   Format: Profile/Horizon definition (Depth ranges)")
                 # Validate ranges
-                assigned_ids = set()
                 for line in data_lines:
                     clean = line.split('%')[0] # Remove trailing comments
                     parts = clean.split()
@@ -178,26 +326,29 @@ class CATFLOWDiagnostic:
                             sid = int(parts[4])
                             assigned_ids.add(sid)
                         except: pass
-                
-                undefined = assigned_ids - self.soil_ids
-                if undefined:
-                    self.issues.append(f"   Undefined soil IDs in profile: {undefined}")
-                else:
-                    self.info.append("   ✓ All referenced soil IDs are valid")
-                    
             else:
                 self.info.append("   Format: Node-by-node Matrix")
-                # (Existing matrix logic could go here)
+                tokens = [t for line in data_lines for t in line.split('%')[0].split()]
+                assigned_ids = {int(t) for t in tokens if t.lstrip('-').isdigit()}
+                dims = self.geo_dims_by_hill.get(hill_no)
+                if dims and len(tokens) != dims[0] * dims[1]:
+                    self.issues.append(
+                        f"   {label}: Matrix has {len(tokens)} entries, geometry has {dims[0] * dims[1]} nodes"
+                    )
+            
+            undefined = assigned_ids - getattr(self, 'soil_ids', set())
+            if undefined:
+                self.issues.append(f"   {label}: Undefined soil IDs in assignment: {undefined}")
+            else:
+                self.info.append("   ✓ All referenced soil IDs are valid")
                 
         except Exception as e:
-            self.issues.append(f"Error parsing .bod file: {e}")
-            
-        print("   ✓ Soil files checked\n")
+            self.issues.append(f"Error parsing .bod file {bod_file.name}: {e}")
 
     def check_forcing(self):
         print("🌦️  Checking forcing data...")
         # Simple existence check
-        forcing_files = list(self.folder.rglob("*precip*")) + list(self.folder.rglob("*timeser*"))
+        forcing_files = self.index.name_contains("precip") + self.index.name_contains("timeser")
         if not forcing_files:
             self.warnings.append("No forcing/rainfall files found")
         else:
@@ -209,10 +360,10 @@ class CATFLOWDiagnostic:
     def check_optional_files(self):
         print("📋 Checking optional files...")
         # Just report existence
-        for pattern in ['printout.prt', 'surface.pob', 'boundary.rb']:
-            found = list(self.folder.rglob(pattern))
-            if found:
-                self.info.append(f"Found {pattern}")
+        for role, pattern in [('prt', 'printout.prt'), ('pob', 'surface.pob'), ('rb', 'boundary.rb')]:
+            found = self._hill_files_for(role) or [(i, p.name, p) for i, p in enumerate(self.index.named(pattern))]
+            for _, label, path in found:
+                self.info.append(f"Found {pattern} ({label}): {path.relative_to(self.folder)}")
         print("   ✓ Optional files checked\n")
 
     def print_report(self):
@@ -0,0 +1,169 @@
+"""
+Semantic CATFLOW project diff.
+Compares two parsed CATFLOWProject objects component by component, so layout-only
+differences (reordered BODEN matrix, other RLE blocks in boundary.rb, 1.0 vs 1.00)
+vanish and numeric deviations are reported per field with tolerance.
+"""
+from dataclasses import fields, is_dataclass
+from numbers import Number
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from model.project import CATFLOWProject
+
+
+class CATFLOWDiffer:
+
+    def __init__(self, project_a: CATFLOWProject, project_b: CATFLOWProject,
+                 rtol: float = 1e-6, atol: float = 1e-9, max_locations: int = 10):
+        self.a = project_a
+        self.b = project_b
+        self.rtol = rtol
+        self.atol = atol
+        self.max_locations = max_locations
+        self.entries: List[Dict[str, Any]] = []
+
+    @classmethod
+    def from_folders(cls, folder_a: str, folder_b: str, **kwargs) -> 'CATFLOWDiffer':
+        return cls(
+            CATFLOWProject.from_legacy_folder(folder_a),
+            CATFLOWProject.from_legacy_folder(folder_b),
+            **kwargs
+        )
+
+    def diff(self) -> Dict[str, Any]:
+        """
+        Returns a report with one entry per compared array (status, node count,
+        mismatch count, max deviation, first mismatch locations) and per differing scalar.
+        """
+        self.entries = []
+        for name in ('config', 'run_control', 'soil_library', 'forcing', 'land_use_library', 'wind_library'):
+            self._walk(name, getattr(self.a, name), getattr(self.b, name))
+
+        hills_a = {h.id: h for h in self.a.hills}
+        hills_b = {h.id: h for h in self.b.hills}
+        for hill_id in sorted(set(hills_a) | set(hills_b)):
+            self._walk(f"hill_{hill_id}", hills_a.get(hill_id), hills_b.get(hill_id))
+
+        summary: Dict[str, int] = {}
+        for e in self.entries:
+            summary[e['status']] = summary.get(e['status'], 0) + 1
+
+        return {
+            "tolerance": {"rtol": self.rtol, "atol": self.atol},
+            "equal": all(e['status'] == 'equal' for e in self.entries),
+            "summary": summary,
+            "components": self.entries
+        }
+
+    def differences(self) -> List[Dict[str, Any]]:
+        return [e for e in self.diff()['components'] if e['status'] != 'equal']
+
+    # --- Walk ---
+
+    def _walk(self, path: str, a: Any, b: Any):
+        if a is None and b is None:
+            return
+        if a is None or b is None:
+            self.entries.append({"component": path, "status": "missing_a" if a is None else "missing_b"})
+            return
+
+        if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+            self._compare_arrays(path, np.asarray(a), np.asarray(b))
+        elif is_dataclass(a) and is_dataclass(b):
+            for f in fields(a):
+                self._walk(f"{path}.{f.name}", getattr(a, f.name, None), getattr(b, f.name, None))
+        elif isinstance(a, dict) and isinstance(b, dict):
+            for key in list(a.keys()) + [k for k in b.keys() if k not in a]:
+                self._walk(f"{path}[{key}]", a.get(key), b.get(key))
+        elif isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+            self._walk_sequence(path, a, b)
+        else:
+            self._compare_scalars(path, a, b)
+
+    def _walk_sequence(self, path: str, a: List, b: List):
+        # Lists of records: match by id / filename so reordering is not a difference
+        sample = a[0] if a else (b[0] if b else None)
+        if is_dataclass(sample):
+            key_attr = next((k for k in ('id', 'filename') if hasattr(sample, k)), None)
+            if key_attr:
+                map_a = {getattr(x, key_attr): x for x in a}
+                map_b = {getattr(x, key_attr): x for x in b}
+                for key in list(map_a.keys()) + [k for k in map_b.keys() if k not in map_a]:
+                    self._walk(f"{path}[{key_attr}={key}]", map_a.get(key), map_b.get(key))
+                return
+        else:
+            # Numeric tables (control volume blocks, printout steps, coefficients) -> one array compare
+            arr_a = _as_numeric(a)
+            arr_b = _as_numeric(b)
+            if arr_a is not None and arr_b is not None:
+                self._compare_arrays(path, arr_a, arr_b)
+                return
+
+        if len(a) != len(b):
+            self.entries.append({"component": path, "status": "length_mismatch", "length": [len(a), len(b)]})
+        for i, (x, y) in enumerate(zip(a, b)):
+            self._walk(f"{path}[{i}]", x, y)
+
+    # --- Leaves ---
+
+    def _compare_scalars(self, path: str, a: Any, b: Any):
+        if isinstance(a, Number) and isinstance(b, Number) and not isinstance(a, bool):
+            equal = bool(np.isclose(a, b, rtol=self.rtol, atol=self.atol, equal_nan=True))
+            if not equal:
+                self.entries.append({
+                    "component": path, "status": "different",
+                    "a": a, "b": b, "max_abs_dev": float(abs(a - b))
+                })
+        elif a != b:
+            self.entries.append({"component": path, "status": "different", "a": str(a), "b": str(b)})
+
+    def _compare_arrays(self, path: str, a: np.ndarray, b: np.ndarray):
+        if a.dtype.names or b.dtype.names:
+            for name in (a.dtype.names or b.dtype.names):
+                field_a = a[name] if a.dtype.names and name in a.dtype.names else None
+                field_b = b[name] if b.dtype.names and name in b.dtype.names else None
+                self._walk(f"{path}.{name}", field_a, field_b)
+            return
+
+        entry: Dict[str, Any] = {"component": path, "shape": list(a.shape), "n_nodes": int(a.size)}
+        self.entries.append(entry)
+
+        if a.shape != b.shape:
+            entry.update(status="shape_mismatch", shape=[list(a.shape), list(b.shape)])
+            return
+
+        numeric = np.issubdtype(a.dtype, np.number) and np.issubdtype(b.dtype, np.number)
+        if numeric:
+            if np.array_equal(a, b, equal_nan=np.issubdtype(a.dtype, np.floating)):
+                entry.update(status="equal", n_mismatch=0, max_abs_dev=0.0)
+                return
+            a_f = a.astype(np.float64, copy=False)
+            b_f = b.astype(np.float64, copy=False)
+            bad = ~np.isclose(a_f, b_f, rtol=self.rtol, atol=self.atol, equal_nan=True)
+            dev = np.abs(a_f - b_f)
+            max_dev = float(np.nanmax(dev)) if dev.size else 0.0
+        else:
+            bad = a != b
+            max_dev = None
+
+        n_bad = int(np.count_nonzero(bad))
+        entry.update(
+            status="equal" if n_bad == 0 else "different",
+            n_mismatch=n_bad,
+            max_abs_dev=max_dev
+        )
+        if n_bad:
+            entry["locations"] = np.argwhere(bad)[:self.max_locations].tolist()
+
+
+def _as_numeric(values: List) -> Optional[np.ndarray]:
+    """Numeric (possibly nested) list -> float array, None if ragged or non numeric"""
+    if not values:
+        return np.zeros(0)
+    try:
+        arr = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return None
+    return arr
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from model.config import GlobalConfig, RunControl
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Path) -> str:
+    """Streams a file through sha256 (no full read into memory)"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def collect_input_files(root: Path) -> List[Path]:
+    """
+    Collects every input file reachable from CATFLOW.IN.
+    Starts at the run file and follows every path-like token (contains '/')
+    through the definition files (timeser.def, lu_file.def, lu_ts.dat, ...).
+    Output files listed in the run file are excluded.
+    """
+    root = Path(root)
+    config = GlobalConfig.from_file(str(root / "CATFLOW.IN"))
+    run_path = root / config.run_filename
+    if not run_path.exists():
+        raise FileNotFoundError(f"Run file missing: {run_path}")
+
+    outputs = {Path(o.split()[0]).as_posix() for o in RunControl.from_file(str(run_path)).output_files if o.split()}
+
+    found: Dict[str, Path] = {}
+    queue = [root / "CATFLOW.IN", run_path]
+    while queue:
+        path = queue.pop()
+        rel = path.relative_to(root).as_posix()
+        if rel in found:
+            continue
+        found[rel] = path
+
+        # Data files (precip, geo, bna, ...) never reference other files,
+        # only tokens with a path separator are candidates.
+        with open(path, 'r', errors='replace') as f:
+            for line in f:
+                for token in line.split('%')[0].split():
+                    if '/' not in token and '\\' not in token:
+                        continue
+                    rel_token = token.replace('\\', '/')
+                    if rel_token in outputs:
+                        continue
+                    candidate = root / rel_token
+                    if candidate.is_file():
+                        queue.append(candidate)
+
+    return [found[k] for k in sorted(found)]
+
+
+class ResultCache:
+    """
+    Content-addressed store of simulation outputs.
+    Key = sha256 over (relative path, file hash) of every input file plus the binary hash.
+    Entries are evicted least-recently-used once the total size exceeds max_bytes.
+    """
+    def __init__(self, cache_dir: str = "./storage/result_cache", max_bytes: int = 2 * 1024**3):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._index_path = self.cache_dir / "index.json"
+        self._lock = threading.Lock()
+        self._binary_hashes: Dict[str, tuple] = {}  # path -> (mtime_ns, size, hash)
+        self._pins: Dict[str, int] = {}  # key -> number of restores copying from the entry
+
+    # --- Keys ---
+
+    def _binary_hash(self, binary: Path) -> str:
+        st = binary.stat()
+        cached = self._binary_hashes.get(str(binary))
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+        digest = hash_file(binary)
+        self._binary_hashes[str(binary)] = (st.st_mtime_ns, st.st_size, digest)
+        return digest
+
+    def compute_key(self, project_dir: Path, binary: Path) -> str:
+        project_dir = Path(project_dir)
+        h = hashlib.sha256()
+        h.update(f"binary {self._binary_hash(binary)}\n".encode())
+        for path in collect_input_files(project_dir):
+            rel = path.relative_to(project_dir).as_posix()
+            h.update(f"{rel} {hash_file(path)}\n".encode())
+        return h.hexdigest()
+
+    # --- Index ---
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if not self._index_path.exists():
+            return {}
+        try:
+            with open(self._index_path, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save_index(self, index: Dict[str, Dict]):
+        tmp = self._index_path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, self._index_path)
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    # --- Lookup / Store ---
+
+    def lookup(self, key: str, pin: bool = False) -> Optional[Path]:
+        """
+        Returns the cached out/ directory and marks it as recently used.
+        pin=True protects the entry from eviction and replacement until release(key).
+        """
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            path = self._entry_dir(key) / "out"
+            if entry is None or not path.is_dir():
+                if entry is not None:
+                    index.pop(key)
+                    self._save_index(index)
+                return None
+            entry['last_access'] = time.time()
+            self._save_index(index)
+            if pin:
+                self._pins[key] = self._pins.get(key, 0) + 1
+            return path
+
+    def release(self, key: str):
+        with self._lock:
+            count = self._pins.get(key, 0) - 1
+            if count > 0:
+                self._pins[key] = count
+            else:
+                self._pins.pop(key, None)
+
+    def restore(self, key: str, workspace: Path) -> bool:
+        """Copies the cached outputs into workspace/out; the entry stays pinned during the copy"""
+        cached_out = self.lookup(key, pin=True)
+        if cached_out is None:
+            return False
+        try:
+            copy_cached_outputs(cached_out, workspace)
+        finally:
+            self.release(key)
+        return True
+
+    def store(self, key: str, out_dir: Path):
+        """
+        Snapshots a finished run's out/ directory and evicts old entries. The copy runs without
+        the lock (into a private staging dir), the lock only covers the index and the swap.
+        Keys that are already cached are kept as they are.
+        """
+        out_dir = Path(out_dir)
+        if not out_dir.is_dir():
+            return
+
+        target = self._entry_dir(key)
+        with self._lock:
+            if key in self._load_index() and target.is_dir():
+                return
+
+        staging = self.cache_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        _copy_tree(out_dir, staging / "out")
+        size = sum(p.stat().st_size for p in staging.rglob("*") if p.is_file())
+
+        removed: List[Path] = []
+        with self._lock:
+            index = self._load_index()
+            if key in index and target.is_dir():
+                removed.append(staging)  # An identical run stored it meanwhile
+            else:
+                if target.exists():
+                    # Left over without an index entry, so nobody can have it pinned
+                    shutil.rmtree(target)
+                os.replace(staging, target)
+                index[key] = {"size": size, "last_access": time.time()}
+                removed.extend(self._evict(index))
+                self._save_index(index)
+
+        for path in removed:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _evict(self, index: Dict[str, Dict]) -> List[Path]:
+        """
+        Drops least recently used entries from the index, returns their dirs for removal. Pinned
+        entries are skipped and not counted, they may push the cache over max_bytes until released.
+        """
+        unpinned = [k for k in index if not self._pins.get(k)]
+        total = sum(index[k]['size'] for k in unpinned)
+        evicted = []
+        for key in sorted(unpinned, key=lambda k: index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= index[key]['size']
+            index.pop(key)
+            # Renamed under the lock, so a later lookup can't find a half-deleted entry
+            doomed = self.cache_dir / f".{key}.{uuid.uuid4().hex}.evicted"
+            if self._entry_dir(key).exists():
+                os.replace(self._entry_dir(key), doomed)
+                evicted.append(doomed)
+            print(f"Result cache: evicted {key[:12]}")
+        return evicted
+
+
+def _copy_tree(src: Path, dst: Path):
+    """
+    Copies a directory tree. No hard links: CATFLOW truncates and rewrites out/* in place,
+    a shared inode would let the next run in a workspace overwrite the cache entry.
+    """
+    shutil.copytree(src, dst, copy_function=shutil.copy2)
+
+
+def copy_cached_outputs(cached_out: Path, workspace: Path):
+    """Replaces workspace/out with a copy of the cached outputs"""
+    target = Path(workspace) / "out"
+    if target.is_symlink() or target.is_file():
+        target.unlink()
+    elif target.exists():
+        shutil.rmtree(target)
+    _copy_tree(cached_out, target)
+
+
+result_cache = ResultCache()
@@ -4,17 +4,25 @@ import subprocess
 import os
 import platform
 import asyncio
+import time
 from pathlib import Path
-from typing import Optional
-
+from typing import Optional, Tuple
 
+import metrics
+from managers.cache import ResultCache, result_cache
 from managers.sessions import session_store
 
 class WorkspaceManager:
-    def __init__(self, base_dir: str = "./workspaces", binary_path: str = "./bin/catflow"):
+    def __init__(self, base_dir: str = "./workspaces", binary_path: str = "./bin/catflow",
+                 cache: Optional[ResultCache] = result_cache, max_concurrent_runs: Optional[int] = None):
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
         self.binary_path = Path(binary_path)
+        self.cache = cache
+        
+        # Simulations beyond this wait for a free slot (reported as queue depth in /metrics)
+        self.max_concurrent_runs = max_concurrent_runs or os.cpu_count() or 1
+        self._run_slots = asyncio.Semaphore(self.max_concurrent_runs)
         
         # Ensure binary dir exists or print warning
         if not self.binary_path.parent.exists():
@@ -65,26 +73,67 @@ class WorkspaceManager:
             if not exe_path.exists():
                 raise FileNotFoundError(f"Binary not found at {exe_path}")
 
+            # 3a. Result Cache: identical inputs + identical binary -> reuse out/
+            cache_key = None
+            if self.cache:
+                try:
+                    cache_key = await asyncio.to_thread(self.cache.compute_key, cwd, exe_path)
+                except Exception as e:
+                    print(f"[{session_id}] Cache key failed, running without cache: {e}")
+
+            if cache_key:
+                if await asyncio.to_thread(self.cache.restore, cache_key, cwd):
+                    print(f"[{session_id}] Cache hit ({cache_key[:12]}), skipping simulation.")
+                    if session_data:
+                        session_data = session_store.get_session(session_id) or session_data
+                        session_data['status'] = 'completed'
+                        session_data['cache_key'] = cache_key
+                        session_data['cache_hit'] = True
+                        session_store.save_session(session_id, session_data)
+                    return
+
+            # 3. Wait for a free run slot
+            metrics.simulation_queue_depth.inc()
+            try:
+                await self._run_slots.acquire()
+            finally:
+                metrics.simulation_queue_depth.dec()
+
             print(f"[{session_id}] Starting simulation...")
-            
-            # 3. Run Process (Blocking call in a thread to avoid freezing async loop)
-            # We open the log file to redirect stdout/stderr
-            with open(log_file_path, "w") as log_file:
-                # We use asyncio.to_thread to run the blocking subprocess call safely
-                return_code = await asyncio.to_thread(
-                    self._execute_subprocess, 
-                    str(exe_path.resolve()), 
-                    str(cwd), 
-                    log_file
-                )
-
-            # 4. Update Status based on result
+            metrics.simulations_running.inc()
+            try:
+                # 4. Run Process (Blocking call in a thread to avoid freezing async loop)
+                # We open the log file to redirect stdout/stderr
+                t0 = time.perf_counter()
+                with open(log_file_path, "w") as log_file:
+                    # We use asyncio.to_thread to run the blocking subprocess call safely
+                    return_code, cpu_time = await asyncio.to_thread(
+                        self._execute_subprocess, 
+                        str(exe_path.resolve()), 
+                        str(cwd), 
+                        log_file
+                    )
+                wall_time = time.perf_counter() - t0
+            finally:
+                metrics.simulations_running.dec()
+                self._run_slots.release()
+
+            metrics.simulation_wall_seconds.observe(wall_time)
+            if cpu_time is not None:
+                metrics.simulation_cpu_seconds.observe(cpu_time)
+            metrics.simulations_total.inc(1, "completed" if return_code == 0 else "failed")
+
+            # 5. Update Status based on result
             if session_data:
                 # Reload session data in case it changed (unlikely here but good practice)
                 session_data = session_store.get_session(session_id) or session_data
+                session_data['wall_time_s'] = wall_time
+                session_data['cpu_time_s'] = cpu_time
                 
                 if return_code == 0:
                     session_data['status'] = 'completed'
+                    session_data['cache_key'] = cache_key
+                    session_data['cache_hit'] = False
                     print(f"[{session_id}] Simulation completed successfully.")
                 else:
                     session_data['status'] = 'failed'
@@ -93,8 +142,12 @@ class WorkspaceManager:
                 
                 session_store.save_session(session_id, session_data)
 
+            if return_code == 0 and cache_key:
+                await asyncio.to_thread(self.cache.store, cache_key, cwd / "out")
+
         except Exception as e:
             print(f"[{session_id}] Simulation Error: {e}")
+            metrics.simulations_total.inc(1, "error")
             if session_data:
                 session_data['status'] = 'error'
                 session_data['error'] = str(e)
@@ -104,14 +157,23 @@ class WorkspaceManager:
             with open(log_file_path, "a") as f:
                 f.write(f"\nCRITICAL ERROR: {str(e)}\n")
 
-    def _execute_subprocess(self, exe: str, cwd: str, log_file) -> int:
-        """Helper to run subprocess synchronously (to be threaded)"""
-        process = subprocess.run(
+    def _execute_subprocess(self, exe: str, cwd: str, log_file) -> Tuple[int, Optional[float]]:
+        """
+        Helper to run subprocess synchronously (to be threaded).
+        Returns (return code, CPU seconds of the process). CPU time comes from the
+        rusage of wait4 and is None where that is not available (Windows).
+        """
+        process = subprocess.Popen(
             [exe], 
             cwd=cwd,
             stdout=log_file,
             stderr=subprocess.STDOUT
         )
-        return process.returncode
+        if not hasattr(os, "wait4"):
+            return process.wait(), None
+        
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        return process.returncode, usage.ru_utime + usage.ru_stime
 
 workspace_manager = WorkspaceManager()
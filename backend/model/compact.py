@@ -0,0 +1,100 @@
+"""
+Opt-in compact memory mode.
+
+ID maps (soil assignment, boundary codes, sinks) are narrowed to the smallest integer type that
+holds their values, results fields are stored as float32. Float inputs (mesh, heterogeneity,
+initial conditions, macropores) keep float64: they are written back to the CATFLOW files and
+must round-trip exactly. Results are only read, float32 keeps ~7 significant digits.
+"""
+import os
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from model.outputs import SimulationResults
+    from model.project import CATFLOWProject
+
+COMPACT_ENV = "CATFLOW_COMPACT"
+RESULTS_DTYPE = np.float32
+
+
+def compact_enabled(requested: bool = False) -> bool:
+    """Compact mode is opt-in per load, or switched on for everything with CATFLOW_COMPACT=1"""
+    return requested or os.environ.get(COMPACT_ENV, "") not in ("", "0", "false")
+
+
+def narrow_int(arr: np.ndarray) -> np.ndarray:
+    """Same values in the smallest signed integer type (int8 / int16 / int32) that holds them"""
+    if arr.size == 0 or not np.issubdtype(arr.dtype, np.integer):
+        return arr
+    lo, hi = int(arr.min()), int(arr.max())
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return arr.astype(dtype) if np.dtype(dtype).itemsize < arr.dtype.itemsize else arr
+    return arr
+
+
+@dataclass
+class CompactReport:
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add(self, name: str, before: np.ndarray, after: np.ndarray):
+        self.entries.append({
+            "array": name, "dtype_before": before.dtype.name, "dtype_after": after.dtype.name,
+            "bytes_before": int(before.nbytes), "bytes_after": int(after.nbytes)
+        })
+
+    @property
+    def bytes_before(self) -> int:
+        return sum(e["bytes_before"] for e in self.entries)
+
+    @property
+    def bytes_after(self) -> int:
+        return sum(e["bytes_after"] for e in self.entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bytes_before": self.bytes_before,
+            "bytes_after": self.bytes_after,
+            "bytes_saved": self.bytes_before - self.bytes_after,
+            "arrays": [e for e in self.entries if e["bytes_before"] != e["bytes_after"]],
+        }
+
+
+def _narrow_attr(obj: Any, attr: str, name: str, report: CompactReport):
+    before = getattr(obj, attr)
+    after = narrow_int(before)
+    setattr(obj, attr, after)
+    report.add(name, before, after)
+
+
+def compact_results(results: 'SimulationResults', report: Optional[CompactReport] = None) -> CompactReport:
+    """Results fields to float32; per-step stats were computed in float64 at ingestion and stay"""
+    report = report if report is not None else CompactReport()
+    for name in ("moisture", "pressure"):
+        series = getattr(results, name)
+        before = series.data
+        if before.dtype != RESULTS_DTYPE:
+            series.data = before.astype(RESULTS_DTYPE)
+        report.add(f"results.{name}", before, series.data)
+    return report
+
+
+def compact_project(project: 'CATFLOWProject', report: Optional[CompactReport] = None) -> CompactReport:
+    """Narrows all ID maps of every hill (and results, if attached) in place"""
+    report = report if report is not None else CompactReport()
+    for hill in project.hills:
+        prefix = f"hill_{hill.id}"
+        if hill.soil_map is not None:
+            _narrow_attr(hill.soil_map, "assignment_matrix", f"{prefix}.soil_map", report)
+        if hill.boundary is not None:
+            for attr in ("left", "right", "top", "bottom", "sinks"):
+                _narrow_attr(hill.boundary, attr, f"{prefix}.boundary.{attr}", report)
+
+    results = getattr(project, "results", None)
+    if results is not None:
+        compact_results(results, report)
+    return report
@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import uuid
+from dataclasses import dataclass, fields, is_dataclass
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from model.timing import NULL_RECORDER, PhaseRecorder, timed_call
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+MANIFEST_FILENAME = ".catflow_manifest.json"
+ZIP_CHUNK_SIZE = 256 * 1024
+
+
+def fingerprint(component: Any) -> str:
+    """
+    Content hash of a model component (dataclasses, arrays, lists, scalars).
+    Two components with the same fingerprint serialize to the same file.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    _feed(h, component)
+    return h.hexdigest()
+
+
+def _feed(h, obj: Any):
+    if obj is None:
+        h.update(b'N;')
+    elif isinstance(obj, np.ndarray):
+        h.update(f"A{obj.dtype.str}{obj.dtype.names}{obj.shape};".encode())
+        if obj.dtype.hasobject:
+            for item in obj.ravel():
+                _feed(h, item)
+        else:
+            h.update(np.ascontiguousarray(obj).reshape(-1).view(np.uint8))
+    elif is_dataclass(obj) and not isinstance(obj, type):
+        h.update(f"D{type(obj).__qualname__};".encode())
+        for f in fields(obj):
+            h.update(f"{f.name}=".encode())
+            _feed(h, getattr(obj, f.name, None))
+    elif isinstance(obj, dict):
+        # Insertion order is kept on purpose: writers emit dicts in that order
+        h.update(f"M{len(obj)};".encode())
+        for k, v in obj.items():
+            _feed(h, k)
+            _feed(h, v)
+    elif isinstance(obj, (list, tuple)):
+        h.update(f"L{len(obj)};".encode())
+        for item in obj:
+            _feed(h, item)
+    elif isinstance(obj, datetime):
+        h.update(f"T{obj.isoformat()};".encode())
+    elif isinstance(obj, np.generic):
+        h.update(f"S{obj.dtype.str}{obj.item()!r};".encode())
+    else:
+        h.update(f"{type(obj).__name__}{obj!r};".encode())
+
+
+@dataclass
+class ExportFile:
+    """A single file of an export: where it goes, what it is made of and how to write it"""
+    rel_path: str                       # Relative to project root, e.g. "in/hill_1/hang.geo"
+    component: Any                      # Object that fully determines the file content
+    write: Callable[[str], None]        # Writes the file to the given absolute path
+
+
+def write_into_parent(component: Any, path: str):
+    """Adapter for components whose to_file() takes the target folder (file name is their own)"""
+    component.to_file(Path(path).parent)
+
+
+class ExportManifest:
+    """
+    Records which fingerprint produced each file of a previous export.
+    A file is current if the fingerprint matches and the file on disk is untouched
+    (same size and mtime as recorded).
+    """
+    def __init__(self, entries: Dict[str, Dict[str, Any]] = None):
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, root: Path) -> 'ExportManifest':
+        path = Path(root) / MANIFEST_FILENAME
+        if not path.exists():
+            return cls()
+        try:
+            with open(path, 'r') as f:
+                return cls(json.load(f).get("files", {}))
+        except Exception:
+            return cls()
+
+    def save(self, root: Path):
+        path = Path(root) / MANIFEST_FILENAME
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump({"version": 1, "files": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+    def is_current(self, rel_path: str, fp: str, path: Path) -> bool:
+        entry = self.entries.get(rel_path)
+        if not entry or entry.get("fingerprint") != fp:
+            return False
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        return st.st_size == entry.get("size") and st.st_mtime_ns == entry.get("mtime_ns")
+
+    def record(self, rel_path: str, fp: str, path: Path):
+        st = path.stat()
+        self.entries[rel_path] = {"fingerprint": fp, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+class ExportWriter:
+    """
+    Writes ExportFiles below root, skipping files whose component is unchanged
+    since the last export (see ExportManifest). force=True rewrites everything.
+
+    With max_workers > 0 files are written concurrently (threads, or processes for
+    the CPU-bound text formatting) into a staging directory next to root. close()
+    carries over untouched files from the old root and swaps the staging directory
+    in by rename, so a failed export never leaves a half-written target.
+
+    A PhaseRecorder gets one span per written file (named by its relative path) and
+    one per finishing step of close().
+    """
+    def __init__(self, root: str, force: bool = False, max_workers: int = 0, use_processes: bool = False,
+                 recorder: PhaseRecorder = None):
+        self.root = Path(root)
+        self.force = force
+        self.recorder = recorder or NULL_RECORDER
+        self.recover_interrupted_swap(self.root)
+        self.manifest = ExportManifest.load(self.root)
+        self.written: List[str] = []
+        self.skipped: List[str] = []
+
+        self.staging: Optional[Path] = None
+        self._pool: Optional[Executor] = None
+        self._pending: List[Tuple[str, str, Future]] = []
+        if max_workers > 0:
+            # Pools, tempfile and zipfile are only imported when needed (process pools alone cost ~10ms)
+            import tempfile
+            from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+            self.root.parent.mkdir(parents=True, exist_ok=True)
+            self.staging = Path(tempfile.mkdtemp(prefix=f".{self.root.name}.export-", dir=self.root.parent))
+            pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            self._pool = pool_cls(max_workers=max_workers)
+
+    @property
+    def out_dir(self) -> Path:
+        """Directory files are actually written to (staging dir in concurrent mode)"""
+        return self.staging or self.root
+
+    def write(self, file: ExportFile) -> bool:
+        with self.recorder.span("fingerprint", file=file.rel_path):
+            fp = fingerprint(file.component)
+        if not self.force and self.manifest.is_current(file.rel_path, fp, self.root / file.rel_path):
+            self.skipped.append(file.rel_path)
+            return False
+
+        target = self.out_dir / file.rel_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if self._pool:
+            # Timed inside the worker, the span is added once the result is collected in close()
+            task = partial(timed_call, file.write, str(target)) if self.recorder.enabled else partial(file.write, str(target))
+            self._pending.append((file.rel_path, fp, self._pool.submit(task)))
+        else:
+            with self.recorder.span(file.rel_path) as span:
+                file.write(str(target))
+                span.wrote(str(target))
+                span.arrays(file.component)
+            self.manifest.record(file.rel_path, fp, target)
+        self.written.append(file.rel_path)
+        return True
+
+    def close(self):
+        if self._pool is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self.manifest.save(self.root)
+            return
+
+        try:
+            for rel_path, fp, future in self._pending:
+                result = future.result()
+                if self.recorder.enabled:
+                    self.recorder.add(rel_path, *result, worker=True).wrote(str(self.staging / rel_path))
+                self.manifest.record(rel_path, fp, self.staging / rel_path)
+            self._pool.shutdown()
+            with self.recorder.span("carry_over"):
+                self._carry_over()
+            self.manifest.save(self.staging)
+            with self.recorder.span("swap"):
+                self._swap()
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        """Stops an unfinished export. Concurrent mode discards the staging dir, the target stays untouched."""
+        if self._pool is None:
+            self.manifest.save(self.root)
+            return
+        self._pool.shutdown(cancel_futures=True)
+        if self.staging and self.staging.exists():
+            shutil.rmtree(self.staging, ignore_errors=True)
+
+    def _carry_over(self):
+        """Links every file of the old target that this export did not (re)write into the staging dir"""
+        if not self.root.is_dir():
+            return
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            rel_dir = Path(dirpath).relative_to(self.root)
+            for name in dirnames + filenames:
+                src = Path(dirpath) / name
+                dst = self.staging / rel_dir / name
+                if name in filenames and rel_dir == Path('.') and name == MANIFEST_FILENAME:
+                    continue
+                if src.is_symlink():
+                    if not dst.exists() and not dst.is_symlink():
+                        dst.parent.mkdir(parents=True, exist_ok=True)
+                        os.symlink(os.readlink(src), dst)
+                elif name in filenames and not dst.exists():
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    try:
+                        os.link(src, dst)
+                    except OSError:
+                        shutil.copy2(src, dst)
+
+    def _swap(self):
+        """
+        Swaps staging and root in one atomic renameat2(RENAME_EXCHANGE) where the platform and
+        file system support it. Otherwise falls back to two renames (root -> backup, staging ->
+        root): a crash between them leaves no root, only the backup, which the next ExportWriter
+        for this root restores (see recover_interrupted_swap).
+        """
+        if not self.root.exists():
+            os.chmod(self.staging, 0o755)
+            os.replace(self.staging, self.root)
+            return
+
+        os.chmod(self.staging, self.root.stat().st_mode & 0o7777)
+        if _exchange_paths(self.staging, self.root):
+            # The old target now sits at the staging path
+            shutil.rmtree(self.staging, ignore_errors=True)
+            return
+
+        backup = self.root.with_name(f"{_backup_prefix(self.root)}{uuid.uuid4().hex[:8]}")
+        os.replace(self.root, backup)
+        try:
+            os.replace(self.staging, self.root)
+        except OSError:
+            os.replace(backup, self.root)
+            raise
+        shutil.rmtree(backup, ignore_errors=True)
+
+    @staticmethod
+    def recover_interrupted_swap(root: Path):
+        """
+        Restores the newest backup of an export that crashed between the two fallback renames,
+        and removes backups left behind after a completed swap.
+        """
+        backups = sorted(root.parent.glob(f"{_backup_prefix(root)}*"), key=lambda p: p.stat().st_mtime_ns)
+        if not backups:
+            return
+        if not root.exists():
+            print(f"Export: restoring {root} from interrupted swap backup {backups[-1].name}")
+            os.replace(backups.pop(), root)
+        for stale in backups:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+def _backup_prefix(root: Path) -> str:
+    return f".{root.name}.old-"
+
+
+def _exchange_paths(a: Path, b: Path) -> bool:
+    """Atomically exchanges two paths with Linux renameat2(RENAME_EXCHANGE); False if unavailable"""
+    if not sys.platform.startswith("linux"):
+        return False
+    import ctypes  # Only needed for the concurrent export swap
+
+    renameat2 = getattr(ctypes.CDLL(None, use_errno=True), "renameat2", None)
+    if renameat2 is None:
+        return False
+    at_fdcwd, rename_exchange = -100, 2
+    if renameat2(at_fdcwd, os.fsencode(a), at_fdcwd, os.fsencode(b), rename_exchange) == 0:
+        return True
+    # EINVAL / ENOSYS / EOPNOTSUPP: kernel or file system without exchange support
+    return False
+
+
+class _StreamSink(io.RawIOBase):
+    """Unseekable write target for ZipFile that hands out whatever was written since the last drain()"""
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip_stream(files: Iterable[ExportFile], archive_root: str = "") -> Iterator[bytes]:
+    """
+    Streams a ZIP archive of the given export files.
+    Each file is serialized to a scratch file, compressed into the stream in chunks
+    and deleted again, so neither the archive nor the full tree is ever held at once.
+    """
+    import tempfile
+    import zipfile
+
+    prefix = f"{archive_root.strip('/')}/" if archive_root else ""
+    sink = _StreamSink()
+    with tempfile.TemporaryDirectory(prefix="catflow-zip-") as scratch_dir:
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            for file in files:
+                scratch = Path(scratch_dir) / file.rel_path
+                scratch.parent.mkdir(parents=True, exist_ok=True)
+                file.write(str(scratch))
+
+                info = zipfile.ZipInfo.from_file(scratch, prefix + file.rel_path)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with open(scratch, 'rb') as src, zf.open(info, 'w') as dest:
+                    for chunk in iter(lambda: src.read(ZIP_CHUNK_SIZE), b''):
+                        dest.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                scratch.unlink()
+
+                data = sink.drain()
+                if data:
+                    yield data
+
+        # Central directory is written on close
+        data = sink.drain()
+        if data:
+            yield data
@@ -0,0 +1,118 @@
+"""
+Per-node parameter fields derived from a hill's maps and the soil library.
+
+All fields use the node layout of the assignment maps, (n_columns, n_layers). HeterogeneityMap
+stores (n_layers, n_columns) with index 0 = bottom layer, which is the same vertical order,
+so a transpose aligns it.
+"""
+import zlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import numpy as np
+
+from model.hydraulics import soil_parameters
+
+if TYPE_CHECKING:
+    from model.heterogeneity import HeterogeneityMap
+    from model.inputs.soil import SoilLibrary
+    from model.project import Hill
+
+
+@dataclass
+class EffectiveParameters:
+    """Node-wise soil parameters after heterogeneity and macropore scaling, NaN where no soil is assigned"""
+    ks: np.ndarray          # Ks * k_scaling * fmac [m/s]
+    theta_s: np.ndarray     # theta_s * theta_scaling [-]
+    theta_r: np.ndarray     # [-]
+    alpha: np.ndarray       # [1/m]
+    n: np.ndarray           # [-]
+    soil_index: np.ndarray  # Position in the soil library, -1 for unknown ids
+
+    @property
+    def shape(self):
+        return self.ks.shape
+
+
+def soil_index_field(soil_ids: np.ndarray, library: 'SoilLibrary') -> np.ndarray:
+    """Soil id map -> library positions via a lookup table (-1 where the id is not in the library)"""
+    ids = soil_parameters(library)["id"]
+    upper = max(int(ids.max(initial=0)), int(soil_ids.max(initial=0))) + 1
+    lut = np.full(upper, -1, dtype=np.int64)
+    lut[ids] = np.arange(len(ids))
+    index = np.full(soil_ids.shape, -1, dtype=np.int64)
+    valid = soil_ids >= 0
+    index[valid] = lut[soil_ids[valid]]
+    return index
+
+
+def _scaling(hmap: Optional['HeterogeneityMap'], shape) -> np.ndarray:
+    if hmap is None:
+        return np.ones(shape)
+    factors = hmap.factors.T
+    if factors.shape != shape:
+        raise ValueError(f"Heterogeneity map has {hmap.factors.shape} (layers, columns), expected {shape[::-1]}")
+    return factors
+
+
+def compute_effective_parameters(hill: 'Hill', library: 'SoilLibrary') -> EffectiveParameters:
+    if hill.soil_map is None:
+        raise ValueError(f"Hill {hill.id} has no soil map")
+    soil_ids = hill.soil_map.assignment_matrix
+    shape = soil_ids.shape
+
+    index = soil_index_field(soil_ids, library)
+
+    def gather(values: np.ndarray) -> np.ndarray:
+        # Trailing NaN entry, index -1 picks it for unknown soil ids
+        return np.append(values, np.nan)[index]
+
+    p = soil_parameters(library)
+    ks = gather(p["ks"]) * _scaling(hill.k_scaling, shape)
+    if hill.macropores is not None:
+        fmac = hill.macropores.data['fmac']
+        if fmac.shape != shape:
+            raise ValueError(f"Macropore map has shape {fmac.shape}, expected {shape}")
+        ks *= fmac
+
+    theta_s = gather(p["theta_s"]) * _scaling(hill.theta_scaling, shape)
+    return EffectiveParameters(
+        ks=ks, theta_s=theta_s, theta_r=gather(p["theta_r"]), alpha=gather(p["alpha"]), n=gather(p["n"]),
+        soil_index=index
+    )
+
+
+def array_key(arr: Optional[np.ndarray]) -> Optional[Tuple]:
+    # crc32 runs at several GB/s, the blake2b export fingerprint would cost more than the rebuild
+    if arr is None:
+        return None
+    return arr.shape, arr.dtype.str, zlib.crc32(np.ascontiguousarray(arr).reshape(-1).view(np.uint8))
+
+
+def library_key(library: 'SoilLibrary') -> Tuple:
+    """
+    Content key over the soil parameters the fields read. Cheaper than fingerprint(library),
+    which also hashes control and table settings the fields don't depend on.
+    """
+    return tuple((s.id, s.ks, s.theta_s, s.theta_r, s.alpha, s.n_param) for s in library.soils)
+
+
+def effective_parameters(hill: 'Hill', library: 'SoilLibrary') -> EffectiveParameters:
+    """
+    Cached on the hill (outside the dataclass fields, so export, diff and fingerprints ignore it)
+    and rebuilt once the soil parameters or any of the maps changed, in place or replaced.
+    """
+    key = (
+        library_key(library),
+        array_key(hill.soil_map.assignment_matrix if hill.soil_map else None),
+        array_key(hill.k_scaling.factors if hill.k_scaling else None),
+        array_key(hill.theta_scaling.factors if hill.theta_scaling else None),
+        array_key(hill.macropores.data if hill.macropores else None),
+    )
+    cached = getattr(hill, "_effective_cache", None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    params = compute_effective_parameters(hill, library)
+    hill._effective_cache = (key, params)
+    return params
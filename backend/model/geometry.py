@@ -0,0 +1,122 @@
+"""
+Derived mesh geometry, computed once per mesh and cached until the mesh changes.
+
+Nodes use the mesh layout (n_columns, n_layers); flat node ids are column * n_layers + layer,
+i.e. the C order of that layout. Elements are the quadrilaterals between neighbouring nodes,
+(n_columns - 1, n_layers - 1), with corners listed counter-clockwise in the (sko, hko) plane
+for a mesh whose columns run downslope and layers bottom-up.
+"""
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from model.fields import array_key
+from model.storage import node_volumes
+
+if TYPE_CHECKING:
+    from model.inputs.mesh import HillslopeMesh
+
+# Neighbour slots of `MeshGeometry.neighbours`
+NEIGHBOUR_DIRECTIONS = ("upslope", "downslope", "below", "above")
+GEOMETRY_ARRAYS = ("node_volumes", "cell_areas", "cell_centroids", "slopes", "connectivity", "neighbours")
+
+
+@dataclass
+class MeshGeometry:
+    node_volumes: np.ndarray    # (n_columns, n_layers) control volume [m3]
+    cell_areas: np.ndarray      # (n_columns - 1, n_layers - 1) element area in the (s, z) plane [m2]
+    cell_centroids: np.ndarray  # (n_columns - 1, n_layers - 1, 2) element centre (s, z) [m]
+    slopes: np.ndarray          # (n_columns, n_layers) dz/ds along the layers [-]
+    connectivity: np.ndarray    # (n_elements, 4) flat node ids per element
+    neighbours: np.ndarray      # (n_nodes, 4) flat node ids in NEIGHBOUR_DIRECTIONS order, -1 at the border
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.node_volumes.shape
+
+    @property
+    def total_volume(self) -> float:
+        return float(self.node_volumes.sum())
+
+    @property
+    def total_area(self) -> float:
+        return float(self.cell_areas.sum())
+
+    def to_dict(self, arrays: Optional[List[str]] = None) -> Dict:
+        """Flat value lists with their shapes; integer arrays stay integers"""
+        names = GEOMETRY_ARRAYS if not arrays else arrays
+        unknown = [n for n in names if n not in GEOMETRY_ARRAYS]
+        if unknown:
+            raise ValueError(f"Unknown geometry arrays {unknown}, expected some of {list(GEOMETRY_ARRAYS)}")
+        return {
+            "n_columns": self.shape[0],
+            "n_layers": self.shape[1],
+            "total_volume": self.total_volume,
+            "total_area": self.total_area,
+            "neighbour_directions": list(NEIGHBOUR_DIRECTIONS),
+            "arrays": {
+                name: {"shape": list(getattr(self, name).shape), "values": getattr(self, name).ravel().tolist()}
+                for name in names
+            },
+        }
+
+
+def _connectivity(n_cols: int, n_layers: int) -> np.ndarray:
+    ids = np.arange(n_cols * n_layers).reshape(n_cols, n_layers)
+    return np.stack([ids[:-1, :-1], ids[1:, :-1], ids[1:, 1:], ids[:-1, 1:]], axis=-1).reshape(-1, 4)
+
+
+def _neighbours(n_cols: int, n_layers: int) -> np.ndarray:
+    ids = np.arange(n_cols * n_layers).reshape(n_cols, n_layers)
+    out = np.full((n_cols, n_layers, 4), -1, dtype=ids.dtype)
+    out[1:, :, 0] = ids[:-1]
+    out[:-1, :, 1] = ids[1:]
+    out[:, 1:, 2] = ids[:, :-1]
+    out[:, :-1, 3] = ids[:, 1:]
+    return out.reshape(-1, 4)
+
+
+def _slopes(s: np.ndarray, z: np.ndarray) -> np.ndarray:
+    if s.shape[0] < 2:
+        return np.zeros_like(z)
+    ds = np.gradient(s, axis=0)
+    dz = np.gradient(z, axis=0)
+    return np.divide(dz, ds, out=np.full_like(dz, np.nan), where=ds != 0)
+
+
+def compute_geometry(mesh: 'HillslopeMesh') -> MeshGeometry:
+    s, z = mesh.fields['sko'], mesh.fields['hko']
+    n_cols, n_layers = s.shape
+
+    # Corners of every element, counter-clockwise: (i, j), (i+1, j), (i+1, j+1), (i, j+1)
+    cs = np.stack([s[:-1, :-1], s[1:, :-1], s[1:, 1:], s[:-1, 1:]])
+    cz = np.stack([z[:-1, :-1], z[1:, :-1], z[1:, 1:], z[:-1, 1:]])
+    # Shoelace formula over the four corners
+    twice_area = (cs * np.roll(cz, -1, axis=0) - np.roll(cs, -1, axis=0) * cz).sum(axis=0)
+
+    return MeshGeometry(
+        node_volumes=node_volumes(mesh),
+        cell_areas=0.5 * np.abs(twice_area),
+        cell_centroids=np.stack([cs.mean(axis=0), cz.mean(axis=0)], axis=-1),
+        slopes=_slopes(s, z),
+        connectivity=_connectivity(n_cols, n_layers),
+        neighbours=_neighbours(n_cols, n_layers),
+    )
+
+
+def mesh_geometry(mesh: 'HillslopeMesh') -> MeshGeometry:
+    """
+    Cached on the mesh (outside the dataclass fields) and rebuilt once coordinates, metric
+    coefficients or the coordinate vectors changed.
+    """
+    key = tuple(array_key(mesh.fields[name]) for name in ('sko', 'hko', 'f_eta', 'f_xsi')) + (
+        array_key(mesh.vector_definition.etas), array_key(mesh.vector_definition.xsis)
+    )
+    cached = getattr(mesh, "_geometry_cache", None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    geometry = compute_geometry(mesh)
+    mesh._geometry_cache = (key, geometry)
+    return geometry
@@ -0,0 +1,306 @@
+"""
+Vectorized van Genuchten / Mualem soil hydraulic functions.
+
+All functions broadcast over their arguments, so the same code evaluates one soil on a psi grid,
+every soil of a library at once ((n_soils, 1) parameters against a (n_points,) grid) or per-node
+parameter fields of a whole hill. Units follow soils.def: psi in m (negative = suction),
+alpha in 1/m, Ks in m/s.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+from model.inputs.soil import SoilLibrary
+
+VAN_GENUCHTEN = 1
+MUALEM_L = 0.5          # Pore connectivity of the Mualem model
+DEFAULT_POINTS = 100
+DEFAULT_PSI_RANGE = (1e-2, 10 ** 4.2)   # |psi| from 0.01 to ~15850 (log spaced)
+CURVE_CACHE_SIZE = 16
+
+
+def psi_grid(points: int = DEFAULT_POINTS, psi_min: float = DEFAULT_PSI_RANGE[0],
+             psi_max: float = DEFAULT_PSI_RANGE[1]) -> np.ndarray:
+    """Log spaced suction grid (negative values) from -psi_min to -psi_max"""
+    return -np.logspace(np.log10(psi_min), np.log10(psi_max), points)
+
+
+def effective_saturation(psi, alpha, n):
+    """Se(psi) = (1 + (alpha |psi|)^n)^-m, 1 for psi >= 0"""
+    psi = np.asarray(psi, dtype=np.float64)
+    n = np.asarray(n, dtype=np.float64)
+    m = 1.0 - 1.0 / n
+    se = (1.0 + (alpha * np.abs(psi)) ** n) ** -m
+    return np.where(psi >= 0.0, 1.0, se)
+
+
+def water_content(psi, theta_r, theta_s, alpha, n):
+    return theta_r + (theta_s - theta_r) * effective_saturation(psi, alpha, n)
+
+
+def hydraulic_properties(psi, theta_r, theta_s, alpha, n, ks, l: float = MUALEM_L
+                         ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    theta, K and capacity in one pass (Se and the power terms are computed once).
+    Arguments broadcast against each other.
+    """
+    psi = np.asarray(psi, dtype=np.float64)
+    n = np.asarray(n, dtype=np.float64)
+    m = 1.0 - 1.0 / n
+    suction = psi < 0.0
+
+    a_psi_n = (alpha * np.abs(psi)) ** n
+    base = 1.0 + a_psi_n
+    se = np.where(suction, base ** -m, 1.0)
+
+    theta = theta_r + (theta_s - theta_r) * se
+    k = ks * se ** l * (1.0 - (1.0 - se ** (1.0 / m)) ** m) ** 2
+    # a^(n-1) = a^n / a, a = 0 only for psi = 0 which is masked anyway
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c = (theta_s - theta_r) * n * m * a_psi_n / (np.abs(psi) * base ** (m + 1.0))
+    c = np.where(suction, c, 0.0)
+    return theta, k, c
+
+
+def soil_parameters(library: SoilLibrary) -> Dict[str, np.ndarray]:
+    """Soil parameters as (n_soils,) arrays in library order"""
+    soils = library.soils
+    return {
+        "id": np.array([s.id for s in soils], dtype=np.int64),
+        "model_id": np.array([s.model_id for s in soils], dtype=np.int64),
+        "table_size": np.array([s.table_size for s in soils], dtype=np.int64),
+        "ks": np.array([s.ks for s in soils], dtype=np.float64),
+        "theta_s": np.array([s.theta_s for s in soils], dtype=np.float64),
+        "theta_r": np.array([s.theta_r for s in soils], dtype=np.float64),
+        "alpha": np.array([s.alpha for s in soils], dtype=np.float64),
+        "n": np.array([s.n_param for s in soils], dtype=np.float64),
+    }
+
+
+@dataclass
+class SoilCurves:
+    """Hydraulic curves of every soil of a library on a shared psi grid"""
+    soil_ids: np.ndarray        # (n_soils,)
+    model_ids: np.ndarray       # (n_soils,)
+    psi: np.ndarray             # (n_points,) [m]
+    theta: np.ndarray           # (n_soils, n_points) [-]
+    conductivity: np.ndarray    # (n_soils, n_points) [m/s]
+    capacity: np.ndarray        # (n_soils, n_points) [1/m]
+
+    @classmethod
+    def from_library(cls, library: SoilLibrary, psi: np.ndarray) -> 'SoilCurves':
+        p = soil_parameters(library)
+        col = lambda a: a[:, None]
+        theta, k, c = hydraulic_properties(
+            psi[None, :], col(p["theta_r"]), col(p["theta_s"]), col(p["alpha"]), col(p["n"]), col(p["ks"])
+        )
+        return cls(soil_ids=p["id"], model_ids=p["model_id"], psi=psi, theta=theta, conductivity=k, capacity=c)
+
+    def index_of(self, soil_id: int) -> int:
+        hits = np.flatnonzero(self.soil_ids == soil_id)
+        if hits.size == 0:
+            raise KeyError(soil_id)
+        return int(hits[0])
+
+
+# (library fingerprint, points, psi_min, psi_max) -> curves, least recently used dropped first
+_curve_cache: 'OrderedDict[Tuple, SoilCurves]' = OrderedDict()
+
+
+def soil_curves(library: SoilLibrary, points: int = DEFAULT_POINTS, psi_min: float = DEFAULT_PSI_RANGE[0],
+                psi_max: float = DEFAULT_PSI_RANGE[1]) -> SoilCurves:
+    """
+    Curves of all soils, cached per library version: editing a soil changes the
+    fingerprint, so stale curves are never served.
+    """
+    from model.export import fingerprint
+
+    key = (fingerprint(library), points, psi_min, psi_max)
+    curves = _curve_cache.get(key)
+    if curves is not None:
+        _curve_cache.move_to_end(key)
+        return curves
+
+    curves = SoilCurves.from_library(library, psi_grid(points, psi_min, psi_max))
+    _curve_cache[key] = curves
+    while len(_curve_cache) > CURVE_CACHE_SIZE:
+        _curve_cache.popitem(last=False)
+    return curves
+
+
+@dataclass
+class HydraulicTables:
+    """
+    Tabulated soil functions as CATFLOW uses them: table_size entries per soil on a log spaced
+    psi axis (ascending, the last entry is psi = 0). Tables of all soils are concatenated,
+    soil i occupies offsets[i]:offsets[i + 1], so soils with different table_size share one array.
+    """
+    soil_ids: np.ndarray        # (n_soils,)
+    offsets: np.ndarray         # (n_soils + 1,)
+    psi: np.ndarray             # (total,) [m]
+    theta: np.ndarray           # (total,) [-]
+    conductivity: np.ndarray    # (total,) [m/s]
+    capacity: np.ndarray        # (total,) [1/m]
+    psi_range: Tuple[float, float] = DEFAULT_PSI_RANGE
+
+    PROPERTIES = ("theta", "conductivity", "capacity")
+
+    @classmethod
+    def from_library(cls, library: SoilLibrary, psi_min: float = DEFAULT_PSI_RANGE[0],
+                     psi_max: float = DEFAULT_PSI_RANGE[1]) -> 'HydraulicTables':
+        p = soil_parameters(library)
+        sizes = np.maximum(p["table_size"], 2)
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        total = int(offsets[-1])
+        psi = np.empty(total)
+        theta = np.empty(total)
+        k = np.empty(total)
+        c = np.empty(total)
+
+        # One broadcasted evaluation per distinct table size (usually a single one)
+        for size in np.unique(sizes):
+            members = np.flatnonzero(sizes == size)
+            axis = np.append(psi_grid(size - 1, psi_min, psi_max)[::-1], 0.0)
+            col = lambda a: a[members, None]
+            t, kk, cc = hydraulic_properties(
+                axis[None, :], col(p["theta_r"]), col(p["theta_s"]), col(p["alpha"]), col(p["n"]), col(p["ks"])
+            )
+            rows = offsets[members, None] + np.arange(size)
+            psi[rows] = axis
+            theta[rows], k[rows], c[rows] = t, kk, cc
+
+        return cls(soil_ids=p["id"], offsets=offsets, psi=psi, theta=theta, conductivity=k, capacity=c,
+                   psi_range=(psi_min, psi_max))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'HydraulicTables':
+        with np.load(path) as data:
+            return cls(
+                soil_ids=data["soil_ids"], offsets=data["offsets"], psi=data["psi"], theta=data["theta"],
+                conductivity=data["conductivity"], capacity=data["capacity"],
+                psi_range=tuple(float(x) for x in data["psi_range"])
+            )
+
+    def to_file(self, filepath):
+        """Compressed .npz (filepath may also be a binary file object)"""
+        np.savez_compressed(
+            filepath, soil_ids=self.soil_ids, offsets=self.offsets, psi=self.psi, theta=self.theta,
+            conductivity=self.conductivity, capacity=self.capacity, psi_range=np.asarray(self.psi_range)
+        )
+
+    def table(self, soil_id: int) -> Dict[str, np.ndarray]:
+        i = self.positions(np.asarray([soil_id]))[0]
+        sl = slice(self.offsets[i], self.offsets[i + 1])
+        return {"psi": self.psi[sl], **{name: getattr(self, name)[sl] for name in self.PROPERTIES}}
+
+    def positions(self, soil_ids: np.ndarray) -> np.ndarray:
+        """Soil ids (any shape) -> table positions, KeyError for ids without a table"""
+        order = np.argsort(self.soil_ids, kind="stable")
+        sorted_ids = self.soil_ids[order]
+        idx = np.clip(np.searchsorted(sorted_ids, soil_ids), 0, len(sorted_ids) - 1)
+        unknown = sorted_ids[idx] != soil_ids
+        if np.any(unknown):
+            raise KeyError(f"No hydraulic table for soil id(s) {np.unique(np.asarray(soil_ids)[unknown]).tolist()}")
+        return order[idx]
+
+    def lookup(self, name: str, soil_ids: np.ndarray, psi: np.ndarray) -> np.ndarray:
+        """
+        Interpolates a tabulated property for every node: soil_ids and psi are broadcast
+        to a common shape (e.g. a hill's soil map and a psi field). Values outside the table are
+        clamped to its ends, psi >= 0 gives the saturated value.
+        """
+        if name not in self.PROPERTIES:
+            raise ValueError(f"Unknown property '{name}', expected one of {self.PROPERTIES}")
+        soil_ids, psi = np.broadcast_arrays(np.asarray(soil_ids), np.asarray(psi, dtype=np.float64))
+        values = getattr(self, name)
+        pos = self.positions(soil_ids)
+        out = np.empty(psi.shape)
+        # Few soils, many nodes: one np.interp over all nodes of a soil
+        for i in np.unique(pos):
+            mask = pos == i
+            sl = slice(self.offsets[i], self.offsets[i + 1])
+            out[mask] = np.interp(psi[mask], self.psi[sl], values[sl])
+        return out
+
+
+_table_cache: 'OrderedDict[Tuple, HydraulicTables]' = OrderedDict()
+
+
+def hydraulic_tables(library: SoilLibrary, psi_min: float = DEFAULT_PSI_RANGE[0],
+                     psi_max: float = DEFAULT_PSI_RANGE[1]) -> HydraulicTables:
+    """Tables of all soils, cached per library version like soil_curves"""
+    from model.export import fingerprint
+
+    key = (fingerprint(library), psi_min, psi_max)
+    tables = _table_cache.get(key)
+    if tables is not None:
+        _table_cache.move_to_end(key)
+        return tables
+
+    tables = HydraulicTables.from_library(library, psi_min, psi_max)
+    _table_cache[key] = tables
+    while len(_table_cache) > CURVE_CACHE_SIZE:
+        _table_cache.popitem(last=False)
+    return tables
+
+
+# --- State conversion (initial conditions) ---
+
+STATE_REPRESENTATIONS = ("PSI", "THETA", "SAT", "PHI")
+SE_MIN = 1e-6   # Se is clipped here when inverting, theta <= theta_r has no finite suction
+SE_TOL = 1e-6   # Rounding slack when checking THETA / SAT input against [theta_r, theta_s]
+
+
+def psi_from_saturation(se, alpha, n):
+    """Inverse van Genuchten: psi = -((Se^(-1/m) - 1)^(1/n)) / alpha, 0 at Se = 1"""
+    n = np.asarray(n, dtype=np.float64)
+    m = 1.0 - 1.0 / n
+    se = np.clip(se, SE_MIN, 1.0)
+    return -((se ** (-1.0 / m) - 1.0) ** (1.0 / n)) / alpha
+
+
+def convert_state(values, source: str, target: str, theta_r, theta_s, alpha, n, hko=None) -> np.ndarray:
+    """
+    Converts a soil water state between suction (PSI [m]), water content (THETA), relative
+    saturation (SAT = (theta - theta_r) / (theta_s - theta_r)) and total potential (PHI = psi + hko [m]).
+    Parameters are node-wise fields (or scalars) broadcast against values, hko is needed for PHI.
+    THETA / SAT input outside [theta_r, theta_s] / [0, 1] raises ValueError instead of being clipped.
+    """
+    source, target = source.upper(), target.upper()
+    for rep in (source, target):
+        if rep not in STATE_REPRESENTATIONS:
+            raise ValueError(f"Unknown state representation '{rep}', expected one of {STATE_REPRESENTATIONS}")
+    if "PHI" in (source, target) and hko is None:
+        raise ValueError("PHI conversion needs the node heights (hko)")
+
+    values = np.asarray(values, dtype=np.float64)
+    if source == target:
+        return values.copy()
+
+    # Relative saturation is the hub between the water content and the potential side
+    if source in ("THETA", "SAT"):
+        se = (values - theta_r) / (theta_s - theta_r) if source == "THETA" else values
+        outside = np.count_nonzero((se < -SE_TOL) | (se > 1.0 + SE_TOL))  # NaN (unknown soil) passes
+        if outside:
+            hint = " If they are relative saturation, convert with source='SAT'." if source == "THETA" else ""
+            raise ValueError(
+                f"{outside} {source} values lie outside the physical range "
+                f"({'[theta_r, theta_s]' if source == 'THETA' else '[0, 1]'}), Se from "
+                f"{np.nanmin(se):.3g} to {np.nanmax(se):.3g}.{hint}"
+            )
+    else:
+        psi = values - hko if source == "PHI" else values
+        if target == "PSI":
+            return psi
+        if target == "PHI":
+            return psi + hko
+        se = effective_saturation(psi, alpha, n)
+
+    if target == "SAT":
+        return se
+    if target == "THETA":
+        return theta_r + (theta_s - theta_r) * se
+    psi = psi_from_saturation(se, alpha, n)
+    return psi + hko if target == "PHI" else psi
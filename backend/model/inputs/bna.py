@@ -0,0 +1,356 @@
+"""
+BNA boundary polygons (hillgeo/*.bna, written next to the .geo by the CATFLOW preprocessor).
+
+Two dialects are read:
+- CATFLOW: record header "id n x y" (x y = label point, the mesh node) followed by n vertex
+  lines "x y". Record k belongs to mesh node k in the (n_columns, n_layers) order.
+- Quoted (ESRI / Atlas): header "name1","name2",...,n followed by n lines "x,y". n > 2 is a
+  polygon, n < 0 a polyline of |n| vertices, n = 2 a rectangle (two corners), n = 1 a point.
+
+Vertices of all records are stored in one (n_vertices, 2) array with CSR style offsets.
+"""
+import csv
+from dataclasses import dataclass
+from itertools import compress
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from model.fields import array_key
+
+LOCATE_CHUNK = 1 << 16  # Points per batch in point-in-polygon queries
+CELLS_PER_RECORD = 4    # Upper bound of grid cells per record in the spatial index
+
+
+@dataclass
+class BNA:
+    ids: np.ndarray                     # (n_records,) record ids
+    offsets: np.ndarray                 # (n_records + 1,) vertex offsets of each record
+    vertices: np.ndarray                # (n_vertices, 2) x / y
+    labels: np.ndarray                  # (n_records, 2) header label point, NaN for quoted BNA
+    closed: np.ndarray                  # (n_records,) False for polylines and points (never contain anything)
+    names: Optional[List[List[str]]] = None  # Quoted BNA name fields per record
+    quoted: bool = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_index_cache", None)  # Spatial index, rebuilt on the first query
+        return state
+
+    @property
+    def n_records(self) -> int:
+        return self.ids.size
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """xmin, ymin, xmax, ymax of all vertices"""
+        if self.vertices.size == 0:
+            return (np.nan,) * 4
+        lo, hi = self.vertices.min(axis=0), self.vertices.max(axis=0)
+        return float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1])
+
+    def polygon(self, record: int) -> np.ndarray:
+        return self.vertices[self.offsets[record]:self.offsets[record + 1]]
+
+    # --- Parsing ---
+
+    @classmethod
+    def from_file(cls, path: str) -> 'BNA':
+        try:
+            with open(path, 'r') as f:
+                text = f.read().strip()
+            quoted = text.startswith('"')
+            if text and not quoted:
+                bna = cls._parse_catflow_tokens(text, text.count("\n") + 1)
+                if bna is not None:
+                    return bna
+
+            # Lines stay unstripped: the value blocks are whitespace split anyway
+            lines = [l for l in text.splitlines() if l and not l.isspace()]
+            return cls._parse_quoted(lines) if quoted else cls._parse_catflow(lines)
+        except Exception as e:
+            raise ValueError(f"Failed to parse BNA file {path}: {e}")
+
+    @classmethod
+    def _parse_catflow_tokens(cls, text: str, n_lines: int) -> Optional['BNA']:
+        """
+        Fast path for the preprocessor's output: the whole file is converted in one go and the
+        records are walked in token space (4 header values, then 2 per vertex). Returns None when
+        the layout does not add up to the line count (blank lines, headers without label point),
+        the line based parser then takes over.
+        """
+        try:
+            values = np.array(text.split(), dtype=np.float64)
+        except ValueError:
+            return None
+        tokens = values.tolist()
+        heads, p = [], 0
+        while p + 4 <= len(tokens):
+            n = tokens[p + 1]
+            if n < 0 or n != int(n):
+                return None
+            heads.append(p)
+            p += 4 + 2 * int(n)
+        heads = np.array(heads, dtype=np.int64)
+        counts = values[heads + 1].astype(np.int64)
+        if p != len(tokens) or heads.size + counts.sum() != n_lines:
+            return None
+
+        header_tokens = heads[:, None] + np.arange(4)
+        is_vertex = np.ones(values.size, dtype=bool)
+        is_vertex[header_tokens] = False
+        return cls(
+            ids=values[heads].astype(np.int64),
+            offsets=np.concatenate([[0], np.cumsum(counts)]),
+            vertices=values[is_vertex].reshape(-1, 2),
+            labels=values[header_tokens[:, 2:]],
+            closed=counts >= 3,
+        )
+
+    @staticmethod
+    def _walk_headers(lines: List[str], count_of) -> Tuple[List[int], List[int]]:
+        """Header line positions and vertex counts; only the count of each header is read here"""
+        positions, counts = [], []
+        i = 0
+        while i < len(lines):
+            try:
+                n = count_of(lines[i])
+            except (ValueError, IndexError):
+                raise ValueError(f"Record line {i + 1}: expected a record header, got '{lines[i].strip()}'")
+            positions.append(i)
+            counts.append(n)
+            i += 1 + abs(n)
+        if i != len(lines):
+            raise ValueError("Unexpected end of file in the last record")
+        return positions, counts
+
+    @staticmethod
+    def _value_block(lines, n_values: int, comma: bool = False) -> np.ndarray:
+        """Lines of n_values numbers each as one (n_lines, n_values) float array, converted in a single pass"""
+        lines = list(lines)
+        text = " ".join(lines)
+        if comma:
+            text = text.replace(",", " ")
+        values = np.array(text.split(), dtype=np.float64)
+        if values.size != n_values * len(lines):
+            raise ValueError(f"Expected {n_values} values on each of {len(lines)} lines, got {values.size} values")
+        return values.reshape(len(lines), n_values)
+
+    @classmethod
+    def _vertex_block(cls, lines: List[str], positions: List[int], comma: bool = False) -> np.ndarray:
+        mask = np.ones(len(lines), dtype=bool)
+        mask[positions] = False
+        return cls._value_block(compress(lines, mask), 2, comma)
+
+    @classmethod
+    def _parse_catflow(cls, lines: List[str]) -> 'BNA':
+        positions, counts = cls._walk_headers(lines, lambda line: int(line.split(None, 2)[1]))
+        counts = np.array(counts, dtype=np.int64)
+        if np.any(counts < 0):
+            raise ValueError("Negative vertex count in a CATFLOW record")
+        # Header "id n x y", parsed together once all records are known; the label point is optional
+        try:
+            headers = cls._value_block((lines[i] for i in positions), 4)
+        except ValueError:
+            headers = np.array([(lines[i].split() + ["nan", "nan"])[:4] for i in positions], dtype=np.float64)
+        return cls(
+            ids=headers[:, 0].astype(np.int64),
+            offsets=np.concatenate([[0], np.cumsum(counts)]),
+            vertices=cls._vertex_block(lines, positions),
+            labels=headers[:, 2:4].copy(),
+            closed=counts >= 3,
+        )
+
+    @classmethod
+    def _parse_quoted(cls, lines: List[str]) -> 'BNA':
+        positions, raw_counts = cls._walk_headers(lines, lambda line: int(line.rsplit(",", 1)[1]))
+        names = [next(csv.reader([lines[i].strip()]))[:-1] for i in positions]
+        vertices = cls._vertex_block(lines, positions, comma=True)
+        raw_counts = np.array(raw_counts, dtype=np.int64)
+
+        # Rectangles (n = 2) are stored as closed 5 vertex rings
+        counts = np.abs(raw_counts)
+        if np.any(raw_counts == 2):
+            pieces = np.split(vertices, np.cumsum(counts)[:-1])
+            for r in np.flatnonzero(raw_counts == 2):
+                (x0, y0), (x1, y1) = pieces[r]
+                pieces[r] = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]])
+            vertices = np.concatenate(pieces)
+            counts = np.array([len(p) for p in pieces], dtype=np.int64)
+
+        n = len(names)
+        return cls(
+            ids=np.arange(1, n + 1, dtype=np.int64),
+            offsets=np.concatenate([[0], np.cumsum(counts)]),
+            vertices=vertices,
+            labels=np.full((n, 2), np.nan),
+            closed=(raw_counts >= 2),
+            names=names,
+            quoted=True,
+        )
+
+    def to_file(self, filepath: str):
+        """Writes the dialect that was read; CATFLOW records use the preprocessor's fixed format"""
+        try:
+            counts = self.counts
+            with open(filepath, 'w') as f:
+                for r in range(self.n_records):
+                    ring = self.vertices[self.offsets[r]:self.offsets[r + 1]].tolist()
+                    if self.quoted:
+                        names = ",".join(f'"{n}"' for n in (self.names[r] if self.names else [str(self.ids[r])]))
+                        n = counts[r] if self.closed[r] else (1 if counts[r] == 1 else -counts[r])
+                        f.write(f"{names},{n}\n")
+                        f.writelines(f"{x},{y}\n" for x, y in ring)
+                    else:
+                        lx, ly = self.labels[r]
+                        f.write(f"{self.ids[r]:5d}{counts[r]:5d}{lx:12.4f}{ly:12.4f}\n")
+                        f.writelines(f"{x:12.4f}{y:12.4f}\n" for x, y in ring)
+        except Exception as e:
+            raise IOError(f"Failed to write BNA file to {filepath}: {e}")
+
+    # --- Spatial queries ---
+
+    @property
+    def index(self) -> 'GridIndex':
+        """Uniform grid over the record bounding boxes, cached until the vertices change"""
+        key = (array_key(self.vertices), array_key(self.offsets), array_key(self.closed))
+        cached = getattr(self, "_index_cache", None)
+        if cached is None or cached[0] != key:
+            cached = (key, GridIndex.build(self))
+            self._index_cache = cached
+        return cached[1]
+
+    def locate(self, points: np.ndarray, chunk: int = LOCATE_CHUNK) -> np.ndarray:
+        """Record position containing each point (even-odd rule), -1 outside every polygon"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        result = np.full(len(points), -1, dtype=np.int64)
+        index = self.index
+        for start in range(0, len(points), chunk):
+            block = points[start:start + chunk]
+            pt, cand = index.candidates(block)
+            # Bounding boxes are cheap to test and drop most candidates of thin or slanted polygons
+            box = index.boxes[cand]
+            px, py = block[pt, 0], block[pt, 1]
+            near = (px >= box[:, 0]) & (px <= box[:, 2]) & (py >= box[:, 1]) & (py <= box[:, 3])
+            pt, cand = pt[near], cand[near]
+            if pt.size == 0:
+                continue
+            inside = self._inside_pairs(block[pt], cand, index.edges)
+            hit_pt, first = np.unique(pt[inside], return_index=True)
+            result[start + hit_pt] = cand[inside][first]
+        return result
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """Point-in-hill test: inside any of the polygons"""
+        return self.locate(points) >= 0
+
+    def query_bbox(self, xmin: float, ymin: float, xmax: float, ymax: float) -> np.ndarray:
+        """Positions of the records whose bounding box intersects the query box"""
+        index = self.index
+        cand = index.cells_items(xmin, ymin, xmax, ymax)
+        box = index.boxes[cand]
+        hit = (box[:, 0] <= xmax) & (box[:, 2] >= xmin) & (box[:, 1] <= ymax) & (box[:, 3] >= ymin)
+        return np.unique(cand[hit])
+
+    def _inside_pairs(self, pts: np.ndarray, records: np.ndarray, edges: np.ndarray) -> np.ndarray:
+        """Even-odd test of (point, record) pairs, every edge of every pair evaluated at once"""
+        starts, n_edges = self.offsets[records], self.counts[records]
+        pair = np.repeat(np.arange(len(records)), n_edges)
+        edge = np.arange(pair.size) + np.repeat(starts - (np.cumsum(n_edges) - n_edges), n_edges)
+        ax, ay, bx, by = edges[:, edge]
+        px, py = pts[pair, 0], pts[pair, 1]
+
+        spans = (ay > py) != (by > py)
+        dy = np.where(spans, by - ay, 1.0)
+        x_cross = ax + (bx - ax) * (py - ay) / dy
+        crossings = np.bincount(pair, weights=spans & (px < x_cross), minlength=len(records))
+        return crossings.astype(np.int64) % 2 == 1
+
+
+@dataclass
+class GridIndex:
+    """Records bucketed by the grid cells their bounding box overlaps (CSR: cell_start / items)"""
+    origin: np.ndarray      # (2,) lower left corner
+    cell_size: np.ndarray   # (2,)
+    shape: Tuple[int, int]  # (nx, ny)
+    cell_start: np.ndarray  # (nx * ny + 1,)
+    items: np.ndarray       # Record positions, grouped by cell
+    boxes: np.ndarray       # (n_records, 4) xmin, ymin, xmax, ymax
+    edges: np.ndarray       # (4, n_vertices) ax, ay, bx, by: edge from each vertex to the next of its ring
+
+    @classmethod
+    def build(cls, bna: BNA) -> 'GridIndex':
+        nonempty = bna.counts > 0
+        boxes = np.full((bna.n_records, 4), np.nan)
+        if nonempty.any():
+            # Empty records own no vertices, so each segment ends where the next record starts
+            starts = bna.offsets[:-1][nonempty]
+            boxes[nonempty, 0] = np.minimum.reduceat(bna.vertices[:, 0], starts)
+            boxes[nonempty, 1] = np.minimum.reduceat(bna.vertices[:, 1], starts)
+            boxes[nonempty, 2] = np.maximum.reduceat(bna.vertices[:, 0], starts)
+            boxes[nonempty, 3] = np.maximum.reduceat(bna.vertices[:, 1], starts)
+        # The last vertex of a ring connects back to the first one
+        nxt = np.arange(1, len(bna.vertices) + 1)
+        nxt[bna.offsets[1:][nonempty] - 1] = bna.offsets[:-1][nonempty]
+        edges = np.ascontiguousarray(np.concatenate([bna.vertices, bna.vertices[nxt]], axis=1).T)
+
+        records = np.flatnonzero(bna.closed & nonempty)
+        empty = np.zeros(0, dtype=np.int64)
+        if records.size == 0:
+            return cls(np.zeros(2), np.ones(2), (1, 1), np.zeros(2, dtype=np.int64), empty, boxes, edges)
+
+        b = boxes[records]
+        origin = b[:, :2].min(axis=0)
+        extent = np.maximum(b[:, 2:].max(axis=0) - origin, 1e-12)
+        # Cells about the size of a typical record, at most CELLS_PER_RECORD cells per record overall
+        typical = np.maximum(np.median(b[:, 2:] - b[:, :2], axis=0), extent / np.sqrt(CELLS_PER_RECORD * records.size))
+        nx, ny = np.maximum(np.ceil(extent / typical).astype(np.int64), 1)
+        excess = nx * ny / (CELLS_PER_RECORD * records.size)
+        if excess > 1:
+            nx, ny = max(1, int(nx / np.sqrt(excess))), max(1, int(ny / np.sqrt(excess)))
+        cell_size = extent / (nx, ny)
+
+        index = cls(origin, cell_size, (int(nx), int(ny)), empty, empty, boxes, edges)
+        ix0, iy0 = index._cell_xy(b[:, 0], b[:, 1])
+        ix1, iy1 = index._cell_xy(b[:, 2], b[:, 3])
+        nxr, nyr = ix1 - ix0 + 1, iy1 - iy0 + 1
+        n_cells = nxr * nyr
+        rec = np.repeat(np.arange(records.size), n_cells)
+        local = np.arange(rec.size) - np.repeat(np.cumsum(n_cells) - n_cells, n_cells)
+        cell = (ix0[rec] + local // nyr[rec]) * ny + iy0[rec] + local % nyr[rec]
+
+        order = np.argsort(cell, kind="stable")
+        index.items = records[rec[order]]
+        index.cell_start = np.searchsorted(cell[order], np.arange(nx * ny + 1))
+        return index
+
+    def _cell_xy(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        ix = np.clip(((np.asarray(x) - self.origin[0]) / self.cell_size[0]).astype(np.int64), 0, self.shape[0] - 1)
+        iy = np.clip(((np.asarray(y) - self.origin[1]) / self.cell_size[1]).astype(np.int64), 0, self.shape[1] - 1)
+        return ix, iy
+
+    def candidates(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(point position, record position) pairs of every point with the records of its cell"""
+        lo = self.origin
+        hi = self.origin + self.cell_size * self.shape
+        inside = np.all((points >= lo) & (points <= hi), axis=1)
+        pts = np.flatnonzero(inside)
+        ix, iy = self._cell_xy(points[pts, 0], points[pts, 1])
+        cell = ix * self.shape[1] + iy
+        start, n = self.cell_start[cell], self.cell_start[cell + 1] - self.cell_start[cell]
+        pair_pt = np.repeat(pts, n)
+        local = np.arange(pair_pt.size) - np.repeat(np.cumsum(n) - n, n)
+        return pair_pt, self.items[np.repeat(start, n) + local]
+
+    def cells_items(self, xmin: float, ymin: float, xmax: float, ymax: float) -> np.ndarray:
+        """Records registered in the cells overlapped by a box (may repeat, unfiltered)"""
+        hi = self.origin + self.cell_size * self.shape
+        if xmax < self.origin[0] or ymax < self.origin[1] or xmin > hi[0] or ymin > hi[1] or self.items.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        (ix0, ix1), (iy0, iy1) = self._cell_xy([xmin, xmax], [ymin, ymax])
+        cells = (np.arange(ix0, ix1 + 1)[:, None] * self.shape[1] + np.arange(iy0, iy1 + 1)[None, :]).ravel()
+        return np.concatenate([self.items[self.cell_start[c]:self.cell_start[c + 1]] for c in cells])
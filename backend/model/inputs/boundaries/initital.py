@@ -1,12 +1,43 @@
 import numpy as np
 from dataclasses import dataclass
-from typing import Literal
+from typing import TYPE_CHECKING, Literal, Optional
+
+if TYPE_CHECKING:
+    from model.fields import EffectiveParameters
 
 @dataclass
 class SoilWaterIC:
     data: np.ndarray  # Shape (n_columns, n_layers)
     type: Literal['PSI', 'THETA', 'PHI'] = 'PSI'
 
+    @classmethod
+    def from_state(cls, values, source: str, target: Literal['PSI', 'THETA', 'PHI'],
+                   params: 'EffectiveParameters', hko: Optional[np.ndarray] = None) -> 'SoilWaterIC':
+        """
+        Builds an IC from any state representation (PSI, THETA, SAT, PHI), e.g. a uniform
+        relative saturation: values broadcast against the (n_columns, n_layers) parameter fields.
+        """
+        from model.hydraulics import convert_state
+        data = convert_state(np.broadcast_to(values, params.shape), source, target,
+                             params.theta_r, params.theta_s, params.alpha, params.n, hko)
+        return cls(data, type=target)
+
+    def as_state(self, target: str, params: 'EffectiveParameters', hko: Optional[np.ndarray] = None,
+                 source: Optional[str] = None) -> np.ndarray:
+        """
+        Whole-grid conversion of the stored values to PSI, THETA, SAT or PHI.
+        source overrides self.type, e.g. 'SAT' for blockwise files written with ischal = 0
+        (relative saturation), which are loaded as THETA.
+        """
+        from model.hydraulics import convert_state
+        return convert_state(self.data, source or self.type, target,
+                             params.theta_r, params.theta_s, params.alpha, params.n, hko)
+
+    def converted(self, target: Literal['PSI', 'THETA', 'PHI'], params: 'EffectiveParameters',
+                  hko: Optional[np.ndarray] = None, source: Optional[str] = None) -> 'SoilWaterIC':
+        """Same IC in another representation, ready for to_file"""
+        return SoilWaterIC(self.as_state(target, params, hko, source), type=target)
+
     @classmethod
     def from_file(cls, path: str, n_layers: int, n_columns: int) -> 'SoilWaterIC':
         data = np.zeros((n_columns, n_layers))
@@ -1,8 +1,10 @@
 
 from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional
 
+from model.export import ExportFile, write_into_parent
 from model.inputs.forcing.climate import ClimateData
 from model.inputs.forcing.landuse.timeline import LandUseTimeline
 from model.inputs.forcing.precipitation import PrecipitationData
@@ -20,8 +22,10 @@ class ForcingConfiguration:
     sink_files: List[str] = field(default_factory=list)
 
     @classmethod
-    def from_file(cls, def_path: str) -> 'ForcingConfiguration':
+    def from_file(cls, def_path: str, on_read: Optional[Callable[[str], None]] = None) -> 'ForcingConfiguration':
+        """on_read is called with the resolved path of every data file timeser.def references"""
         config = cls()
+        on_read = on_read or (lambda path: None)
         p_def = Path(def_path)
         source_root = p_def.parents[2] # Assuming in/control/timeser.def -> root is up 2 levels
         # Better: Pass source_root explicitly if possible, but this heuristic works for standard layout
@@ -42,12 +46,14 @@ class ForcingConfiguration:
                     for _ in range(count):
                         rel_p = next(iterator)
                         # Load Data Immediately
+                        on_read(str(source_root / rel_p))
                         config.precip_data.append(PrecipitationData.from_file(str(source_root / rel_p)))
                 
                 elif "KLIMA" in header:
                     count = int(next(iterator))
                     for _ in range(count):
                         rel_p = next(iterator)
+                        on_read(str(source_root / rel_p))
                         config.climate_data.append(ClimateData.from_file(str(source_root / rel_p)))
                 
                 elif "RANDBEDINGUNGEN" in header:
@@ -68,65 +74,79 @@ class ForcingConfiguration:
                         ts_rel_path = val
                     
                     if ts_rel_path:
+                        on_read(str(source_root / ts_rel_path))
                         config.landuse_timeline = LandUseTimeline.from_file(str(source_root / ts_rel_path), source_root)
 
         except StopIteration:
             pass
         return config
 
-    def to_file(self, filepath: str):
+    def iter_export_files(self, def_rel_path: str = "in/control/timeser.def") -> Iterator[ExportFile]:
         """
-        Writes timeser.def AND all the data files it references.
-        filepath: path to 'in/control/timeser.def'
+        Yields timeser.def AND all the data files it references (paths relative to project root).
+        timeser.def comes last, its content depends on the data file names.
         """
-        base_def = Path(filepath)
-        root = base_def.parents[2] # project root
-        
-        # 1. Write Precip Data
-        precip_folder = root / "in" / "precip"
-        precip_folder.mkdir(parents=True, exist_ok=True)
+        # 1. Precip Data
         precip_paths = []
         for p in self.precip_data:
-            p.to_file(precip_folder)
-            precip_paths.append(f"in/precip/{p.filename}")
-            
-        # 2. Write Climate Data
-        clim_folder = root / "in" / "climate"
-        clim_folder.mkdir(parents=True, exist_ok=True)
+            rel = f"in/precip/{p.filename}"
+            precip_paths.append(rel)
+            yield ExportFile(rel, p, partial(write_into_parent, p))
+
+        # 2. Climate Data
         clim_paths = []
         for c in self.climate_data:
-            c.to_file(clim_folder)
-            clim_paths.append(f"in/climate/{c.filename}")
-            
-        # 3. Write Land Use Timeline & Lookups
-        lu_folder = root / "in" / "landuse"
+            rel = f"in/climate/{c.filename}"
+            clim_paths.append(rel)
+            yield ExportFile(rel, c, partial(write_into_parent, c))
+
+        # 3. Land Use Timeline & Lookups
         lu_ts_path = None
         if self.landuse_timeline:
-            self.landuse_timeline.to_file(lu_folder)
+            yield from self.landuse_timeline.iter_export_files("in/landuse")
             lu_ts_path = f"in/landuse/{self.landuse_timeline.filename}"
-            
-        # 4. Write the Definition File
-        with open(filepath, 'w') as f:
-            f.write(f"NIEDERSCHLAG\n{len(precip_paths)}\n")
-            for p in precip_paths: f.write(f"{p}\n")
-            f.write("\n")
-            
-            f.write(f"RANDBEDINGUNGEN\n{len(self.boundary_files)}\n")
-            for p in self.boundary_files: f.write(f"{p}\n")
-            f.write("\n")
-            
-            f.write(f"SENKEN\n{len(self.sink_files)}\n")
-            for p in self.sink_files: f.write(f"{p}\n")
-            f.write("\n")
-            
-            f.write("Masse an Stoffen\n0\n\n")
-            
-            f.write("LANDNUTZUNG\n")
-            if lu_ts_path:
-                f.write(f"{lu_ts_path}\n")
-            else:
-                f.write("0\n")
-            f.write("\n")
-            
-            f.write(f"KLIMA\n{len(clim_paths)}\n")
-            for p in clim_paths: f.write(f"{p}\n")
\ No newline at end of file
+
+        # 4. The Definition File
+        definition = (precip_paths, self.boundary_files, self.sink_files, lu_ts_path, clim_paths)
+        yield ExportFile(def_rel_path, definition, partial(_write_definition, *definition))
+
+    def to_file(self, filepath: str):
+        """
+        Writes timeser.def AND all the data files it references.
+        filepath: path to 'in/control/timeser.def'
+        """
+        base_def = Path(filepath)
+        root = base_def.parents[2] # project root
+        
+        for export_file in self.iter_export_files(base_def.relative_to(root).as_posix()):
+            target = root / export_file.rel_path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            export_file.write(str(target))
+
+
+def _write_definition(precip_paths: List[str], boundary_files: List[str], sink_files: List[str],
+                      lu_ts_path: Optional[str], clim_paths: List[str], filepath: str):
+    with open(filepath, 'w') as f:
+        f.write(f"NIEDERSCHLAG\n{len(precip_paths)}\n")
+        for p in precip_paths: f.write(f"{p}\n")
+        f.write("\n")
+        
+        f.write(f"RANDBEDINGUNGEN\n{len(boundary_files)}\n")
+        for p in boundary_files: f.write(f"{p}\n")
+        f.write("\n")
+        
+        f.write(f"SENKEN\n{len(sink_files)}\n")
+        for p in sink_files: f.write(f"{p}\n")
+        f.write("\n")
+        
+        f.write("Masse an Stoffen\n0\n\n")
+        
+        f.write("LANDNUTZUNG\n")
+        if lu_ts_path:
+            f.write(f"{lu_ts_path}\n")
+        else:
+            f.write("0\n")
+        f.write("\n")
+        
+        f.write(f"KLIMA\n{len(clim_paths)}\n")
+        for p in clim_paths: f.write(f"{p}\n")
@@ -1,7 +1,10 @@
+import shutil
 from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
+from model.export import ExportFile, write_into_parent
 from model.inputs.forcing.landuse.plants import PlantDefinition
 
 @dataclass
@@ -49,6 +52,40 @@ class LandUseLibrary:
                 
         return lib
 
+    def iter_export_files(self, def_rel_path: str = "in/landuse/lu_file.def",
+                          source_root: Optional[Path] = None) -> Iterator[ExportFile]:
+        """
+        Yields the .par files and lu_file.def itself.
+        Parsed definitions are always written from memory (and fingerprinted by content), so
+        edits reach the export. Only types without a definition fall back to a verbatim copy of
+        the original .par file, if source_root still holds it.
+        """
+        seen = set()
+        def_lines = []
+        for lu in self.types:
+            # Decide filename
+            fname = lu.definition.filename if lu.definition else Path(lu.original_rel_path).name
+            
+            # CRITICAL: Must be relative from PROJECT ROOT, e.g. "in/landuse/wiese.par"
+            # We assume standard structure:
+            std_path = f"in/landuse/{fname}"
+            def_lines.append(f"{lu.id:<5} {lu.name:<35} {std_path}\n")
+            
+            if std_path in seen:
+                continue
+            seen.add(std_path)
+            
+            if lu.definition:
+                # Write the .par file if we have the data
+                yield ExportFile(std_path, lu.definition, partial(write_into_parent, lu.definition))
+                continue
+            src = Path(source_root) / lu.original_rel_path if source_root and lu.original_rel_path else None
+            if src and src.is_file():
+                st = src.stat()
+                yield ExportFile(std_path, (str(src), st.st_size, st.st_mtime_ns), partial(shutil.copy2, str(src)))
+        
+        yield ExportFile(def_rel_path, def_lines, partial(_write_definition, def_lines))
+
     def to_file(self, def_filepath: str):
         # 1. Determine where to write .par files
         # def_filepath is "ft_backend/in/landuse/lu_file.def"
@@ -56,17 +93,13 @@ class LandUseLibrary:
         base_dir = Path(def_filepath).parent
         base_dir.mkdir(parents=True, exist_ok=True)
         
-        with open(def_filepath, 'w') as f:
-            for lu in self.types:
-                # Decide filename
-                fname = lu.definition.filename if lu.definition else Path(lu.original_rel_path).name
-                
-                # Write the .par file if we have the data
-                if lu.definition:
-                    lu.definition.to_file(base_dir)
-                
-                # Write line in .def file
-                # CRITICAL: Must be relative from PROJECT ROOT, e.g. "in/landuse/wiese.par"
-                # We assume standard structure:
-                std_path = f"in/landuse/{fname}"
-                f.write(f"{lu.id:<5} {lu.name:<35} {std_path}\n")
\ No newline at end of file
+        files = list(self.iter_export_files())
+        for export_file in files[:-1]:
+            export_file.write(str(base_dir / Path(export_file.rel_path).name))
+        # lu_file.def is always yielded last
+        files[-1].write(def_filepath)
+
+
+def _write_definition(def_lines: List[str], filepath: str):
+    with open(filepath, 'w') as f:
+        f.writelines(def_lines)
@@ -1,6 +1,8 @@
 from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
+from model.export import ExportFile, write_into_parent
 from model.inputs.forcing.landuse.lookup import LandUseLookup
 
 
@@ -49,18 +51,16 @@ class LandUseTimeline:
             
         return cls(p_ts.name, periods)
 
-    def to_file(self, folder: Path, rel_prefix: str = "in/landuse"):
+    def iter_export_files(self, rel_prefix: str = "in/landuse") -> Iterator[ExportFile]:
         """
-        Writes the timeline file AND all referenced lookup files.
-        folder: The 'in/landuse' directory where files should go.
+        Yields the timeline file AND all referenced lookup files.
         rel_prefix: The prefix to write inside the text file (e.g. 'in/landuse/lu_set.dat')
         """
-        folder.mkdir(parents=True, exist_ok=True)
         lines = []
         
         for p in self.periods:
-            # 1. Write the Lookup Object to disk
-            p.lookup.to_file(folder)
+            # 1. The Lookup Object
+            yield ExportFile(f"{rel_prefix}/{p.lookup.filename}", p.lookup, partial(write_into_parent, p.lookup))
             
             # 2. Add entry to timeline
             lines.append(p.start_time)
@@ -71,5 +71,19 @@ class LandUseTimeline:
         if self.end_time:
             lines.append(self.end_time)
         
-        with open(folder / self.filename, 'w') as f:
-            f.write("\n".join(lines))
\ No newline at end of file
+        yield ExportFile(f"{rel_prefix}/{self.filename}", lines, partial(_write_lines, lines))
+
+    def to_file(self, folder: Path, rel_prefix: str = "in/landuse"):
+        """
+        Writes the timeline file AND all referenced lookup files.
+        folder: The 'in/landuse' directory where files should go.
+        rel_prefix: The prefix to write inside the text file (e.g. 'in/landuse/lu_set.dat')
+        """
+        folder.mkdir(parents=True, exist_ok=True)
+        for export_file in self.iter_export_files(rel_prefix):
+            export_file.write(str(folder / Path(export_file.rel_path).name))
+
+
+def _write_lines(lines: List[str], filepath: str):
+    with open(filepath, 'w') as f:
+        f.write("\n".join(lines))
@@ -1,7 +1,10 @@
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List
 import numpy as np
 from dataclasses import dataclass, field
 
+if TYPE_CHECKING:
+    from model.geometry import MeshGeometry
+
 @dataclass
 class HillslopeMeshHeader:
     iacnv: int  # n of vertical nodes (height)
@@ -32,6 +35,8 @@ HILLSLOPE_DTYPE = np.dtype([
     ('iboden', 'i4')  # Soil ID
 ])
 
+PARSE_CHUNK = 4096  # Grid lines converted per pass
+
 LATERAL_VECTOR_DTYPE = np.dtype([
     ('xsi', 'f8'),
     ('xko', 'f8'),
@@ -39,18 +44,126 @@ LATERAL_VECTOR_DTYPE = np.dtype([
     ('varbr', 'f8')
 ])
 
+class MeshDataView:
+    """
+    Structured-array access to a mesh's field arrays. Field lookups return the live arrays, so
+    `mesh.data['hko'][i] += 1` changes the mesh; item assignment writes through as well. Rows
+    and slices are read-only structured copies: `mesh.data[i]['hko'] = 1` raises, write
+    `mesh.data['hko'][i] = 1` or `mesh.data[i] = row` instead. np.asarray gives a writable copy.
+    """
+    def __init__(self, fields: Dict[str, np.ndarray]):
+        self._fields = fields
+
+    @property
+    def shape(self):
+        return self._fields['hko'].shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return HILLSLOPE_DTYPE
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def copy(self) -> np.ndarray:
+        out = np.empty(self.shape, dtype=HILLSLOPE_DTYPE)
+        for name in HILLSLOPE_DTYPE.names:
+            out[name] = self._fields[name]
+        return out
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        out = self.copy()
+        return out if dtype is None else out.astype(dtype)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._fields[key]
+        # Read-only, so `data[i]['hko'] = x` raises instead of silently missing the mesh
+        out = self.copy()
+        out.setflags(write=False)
+        return out[key]
+
+    def __setitem__(self, key, value):
+        if isinstance(key, str):
+            self._fields[key][...] = value
+            return
+        structured = self.copy()
+        structured[key] = value
+        for name in HILLSLOPE_DTYPE.names:
+            self._fields[name][key] = structured[name][key]
+
+
 @dataclass
 class HillslopeMesh:
+    """
+    Node data is kept as struct-of-arrays: one contiguous (iacnl, iacnv) array per HILLSLOPE_DTYPE
+    field in `fields`. `data` still offers the structured layout for older callers.
+    """
     header: HillslopeMeshHeader
     vector_definition: HillslopeMeshCoordsVectors
-    data: np.ndarray = field(init=False)
+    fields: Dict[str, np.ndarray] = field(init=False, default_factory=dict)
 
     def __post_init__(self):
-        if not hasattr(self, 'data'):
-            self.data = np.zeros(
-                (self.header.iacnl, self.header.iacnv), 
-                dtype=HILLSLOPE_DTYPE
-            ) # IF NOT FROM FILE INIT IN CORRECT SHAPE, IF FROM FILE ALSO ACTUALLY THEN POPULATE AfTER
+        if not self.fields:
+            shape = (self.header.iacnl, self.header.iacnv)
+            self.fields = {name: np.zeros(shape, dtype=HILLSLOPE_DTYPE[name]) for name in HILLSLOPE_DTYPE.names}
+
+    def __getstate__(self):
+        # Geometry and storage weights are cheap to rebuild and large, don't pickle them
+        state = self.__dict__.copy()
+        state.pop("_geometry_cache", None)
+        state.pop("_storage_weights_cache", None)
+        return state
+
+    def __setstate__(self, state):
+        # save_binary pickles from before the field split hold one structured `data` array
+        data = state.pop("data", None)
+        self.__dict__.update(state)
+        if data is not None:
+            self.data = data
+
+    @property
+    def shape(self):
+        return self.fields['hko'].shape
+
+    @property
+    def geometry(self) -> 'MeshGeometry':
+        """Node volumes, cell areas, slopes, connectivity and neighbours, cached until the mesh changes"""
+        from model.geometry import mesh_geometry
+        return mesh_geometry(self)
+
+    @property
+    def data(self) -> MeshDataView:
+        """
+        Structured view over the field arrays for older callers: `data['hko']` is the live
+        array, see MeshDataView for what writes through. Assigning a structured array replaces
+        all fields.
+        """
+        return MeshDataView(self.fields)
+
+    @data.setter
+    def data(self, value: 'np.ndarray | MeshDataView'):
+        self.fields = {name: np.array(value[name], dtype=HILLSLOPE_DTYPE[name], order='C')
+                       for name in HILLSLOPE_DTYPE.names}
+
+    @staticmethod
+    def _parse_rows(lines: List[str], n_values: int, chunk: int = PARSE_CHUNK) -> np.ndarray:
+        """
+        (len(lines), n_values) float block. Each chunk of lines is converted in one pass when every
+        line holds exactly n_values tokens; chunking keeps the temporary token lists small.
+        """
+        out = np.empty((len(lines), n_values))
+        for start in range(0, len(lines), chunk):
+            block = lines[start:start + chunk]
+            tokens = " ".join(block).split()
+            if len(tokens) == len(block) * n_values:
+                out[start:start + len(block)] = np.array(tokens, dtype=np.float64).reshape(len(block), n_values)
+                continue
+            rows = [line.split()[:n_values] for line in block]
+            if any(len(r) < n_values for r in rows):
+                raise ValueError(f"Expected {n_values} values per line")
+            out[start:start + len(block)] = np.array(rows, dtype=np.float64)
+        return out
 
     @classmethod
     def from_file(cls, path: str) -> 'HillslopeMesh':
@@ -58,14 +171,13 @@ class HillslopeMesh:
             with open(path, 'r') as f:
                 lines = [l.strip() for l in f if l.strip()]
                 lines = [l for l in lines if not l.startswith('#')]
-
-            # Iterator to consume lines sequentially
-            line_iter = iter(lines)
+            if len(lines) < 3:
+                raise StopIteration
 
             # HEADER
             # Line 1: iacnv, iacnl, w_fix, hangnr
             # "11 17 0.0 1"
-            l1 = next(line_iter).split()
+            l1 = lines[0].split()
             iacnv = int(l1[0])
             iacnl = int(l1[1])
             w_fix = float(l1[2])
@@ -73,7 +185,7 @@ class HillslopeMesh:
 
             # Line 2: xkobez, ykobez, hkobez
             # "3480100. 5445400. 202.0"
-            l2 = next(line_iter).split()
+            l2 = lines[1].split()
             ref_coords = {
                 "xkobez": float(l2[0]),
                 "ykobez": float(l2[1]),
@@ -82,7 +194,7 @@ class HillslopeMesh:
 
             # Line 3: hgobfl, hgbreit, hglang
             # "4. 10. 40."
-            l3 = next(line_iter).split()
+            l3 = lines[2].split()
             hgobfl = float(l3[0])
             hgbreit = float(l3[1])
             hglang = float(l3[2])
@@ -93,40 +205,37 @@ class HillslopeMesh:
                 refrence_kords=ref_coords
             )
 
+            n_nodes = iacnl * iacnv
+            if len(lines) < 3 + iacnv + iacnl + n_nodes:
+                raise StopIteration
+            eta_lines = lines[3:3 + iacnv]
+            xsi_lines = lines[3 + iacnv:3 + iacnv + iacnl]
+            grid_lines = lines[3 + iacnv + iacnl:3 + iacnv + iacnl + n_nodes]
+
             # VECTOR STUFF
 
-            # Block A: Vertical Coordinates (eta) -> 'iacnv' lines
-            etas = np.zeros(iacnv, dtype=float)
-            for i in range(iacnv):
-                etas[i] = float(next(line_iter).split()[0])
+            # Block A: Vertical Coordinates (eta) -> 'iacnv' lines, first value each
+            etas = np.array([l.split()[0] for l in eta_lines], dtype=float)
 
             # Block B: Lateral Coordinates (xsi + geometry) -> 'iacnl' lines
+            lateral = cls._parse_rows(xsi_lines, 4)
             xsis_struct = np.zeros(iacnl, dtype=LATERAL_VECTOR_DTYPE)
-            for i in range(iacnl):
-                parts = next(line_iter).split()
-                xsis_struct[i] = (float(parts[0]), float(parts[1]), float(parts[2]), float(parts[3]))
+            for i, name in enumerate(LATERAL_VECTOR_DTYPE.names):
+                xsis_struct[name] = lateral[:, i]
 
             vectors = HillslopeMeshCoordsVectors(etas=etas, xsis=xsis_struct)
 
             # DATA
-            
-            mesh_instance = cls(header=header, vector_definition=vectors)            
-            mesh_instance.data = np.zeros((iacnl, iacnv), dtype=HILLSLOPE_DTYPE) # ACTUALLY NOT NECESSARY BECAUSE POST INIT BUT TO BE SURE
 
             # Block C: The Grid -> 'iacnl' blocks of 'iacnv' lines
-            for il in range(iacnl):
-                for iv in range(iacnv):
-                    # Line: hko sko f_eta f_xsi w_xsho w_hohr iboden
-                    parts = next(line_iter).split()
-                    mesh_instance.data[il, iv] = (
-                        float(parts[0]), # hko
-                        float(parts[1]), # sko
-                        float(parts[2]), # f_eta
-                        float(parts[3]), # f_xsi
-                        float(parts[4]), # w_xsho
-                        float(parts[5]), # w_hohr
-                        int(parts[6])    # iboden
-                    )
+            # Line: hko sko f_eta f_xsi w_xsho w_hohr iboden
+            grid = cls._parse_rows(grid_lines, 7)
+            mesh_instance = cls(header=header, vector_definition=vectors)
+            for i, name in enumerate(HILLSLOPE_DTYPE.names):
+                column = grid[:, i].reshape(iacnl, iacnv)
+                if name == 'iboden' and np.any(column != np.trunc(column)):
+                    raise ValueError("iboden must be an integer")
+                mesh_instance.fields[name] = column.astype(HILLSLOPE_DTYPE[name])
 
             return mesh_instance
 
@@ -181,23 +290,15 @@ class HillslopeMesh:
 
                 # DATA
                 # Verify data shape matches header
-                if self.data.shape != (h.iacnl, h.iacnv):
-                    raise ValueError(f"Data shape {self.data.shape} does not match header dimensions ({h.iacnl}, {h.iacnv})")
+                if self.shape != (h.iacnl, h.iacnv):
+                    raise ValueError(f"Data shape {self.shape} does not match header dimensions ({h.iacnl}, {h.iacnv})")
 
-                for il in range(h.iacnl):
-                    for iv in range(h.iacnv):
-                        # Get the structured point
-                        d = self.data[il, iv]
-                        
-                        # Format: hko sko f_eta f_xsi w_xsho w_hohr iboden
-                        # Note: iboden is cast to int, others are floats
-                        line = (
-                            f"{d['hko']} {d['sko']} "
-                            f"{d['f_eta']} {d['f_xsi']} "
-                            f"{d['w_xsho']} {d['w_hohr']} "
-                            f"{int(d['iboden'])}"
-                        )
-                        f.write(line + "\n")
+                # Format: hko sko f_eta f_xsi w_xsho w_hohr iboden
+                # Each field is flattened once (contiguous, node order il-major) and formatted
+                # as Python scalars, which print exactly like the numpy scalars did
+                columns = [self.fields[name].ravel().tolist() for name in HILLSLOPE_DTYPE.names[:-1]]
+                columns.append(self.fields['iboden'].astype(int).ravel().tolist())
+                f.writelines(f"{a} {b} {c} {d} {e} {g} {i}\n" for a, b, c, d, e, g, i in zip(*columns))
                         
         except Exception as e:
             raise IOError(f"Failed to write HillslopeMesh file to {filepath}: {e}")
@@ -1,83 +1,270 @@
-import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 import re
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+TIME_PATTERN = re.compile(r'Time:\s+([\d.eE+-]+)')
+
+# bilanz.csv columns (simplified standard set), extra columns are named col_<i>
+BILANZ_COLUMNS = ['hillslope', 'timestep', 'time_s', 'balance_total', 'balance_in', 'balance_sink',
+                  'balance_bound', 'flux_top', 'flux_right', 'flux_bottom', 'flux_left',
+                  'runoff_cum', 'runoff_coeff', 'precip', 'precip2', 'intercept', 'evap', 'transp']
+BILANZ_INT_COLUMNS = ('hillslope', 'timestep')
+
+
+def _csv_engine(chunked: bool) -> str:
+    """pyarrow's multithreaded reader when installed (no chunking support), else the C parser"""
+    if not chunked:
+        try:
+            import pyarrow  # noqa: F401
+            return "pyarrow"
+        except ImportError:
+            pass
+    return "c"
+
+
+def read_bilanz(path: Path, columns: Optional[List[str]] = None, chunksize: Optional[int] = None,
+                hill_id: Optional[int] = None) -> 'pd.DataFrame':
+    """
+    Typed bilanz.csv read: explicit names and dtypes (no inference pass), only the requested
+    columns are converted. With chunksize the file is read in blocks and filtered to hill_id
+    per block, so a multi-hill balance never has to fit in memory unfiltered.
+    """
+    import pandas as pd
+
+    with open(path, 'r') as f:
+        first = f.readline()
+    n_cols = len(first.rstrip('\n').split(';')) if first.strip() else 0
+    if n_cols == 0:
+        return pd.DataFrame(columns=columns or [])
+    names = BILANZ_COLUMNS[:n_cols] + [f"col_{i}" for i in range(len(BILANZ_COLUMNS), n_cols)]
+
+    usecols = names if columns is None else [c for c in names if c in columns]
+    if hill_id is not None and 'hillslope' not in usecols:
+        usecols = ['hillslope'] + usecols
+    dtype = {c: (np.int64 if c in BILANZ_INT_COLUMNS else np.float64) for c in usecols}
+
+    reader = pd.read_csv(
+        path, sep=';', header=None, names=names, usecols=usecols, dtype=dtype,
+        engine=_csv_engine(chunksize is not None), chunksize=chunksize
+    )
+    if chunksize is None:
+        df = reader
+    else:
+        parts = [chunk if hill_id is None else chunk[chunk['hillslope'] == hill_id] for chunk in reader]
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=usecols)
+        hill_id = None
+
+    if hill_id is not None:
+        df = df[df['hillslope'] == hill_id].reset_index(drop=True)
+    if columns is not None:
+        df = df[[c for c in usecols if c in columns]]
+    return df
+
+
+@dataclass
+class FieldSeries:
+    """
+    One spatial output variable over all time steps, stored time-major and contiguous:
+    data[t] is the (n_layers, n_cols) field of times[t], so a field is one block of memory and
+    a node's time series is a single strided read.
+    """
+    times: np.ndarray   # (n_steps,) simulation time [s], ascending
+    data: np.ndarray    # (n_steps, n_layers, n_cols)
+    # Per step summary, filled once at ingestion: name -> (n_steps,)
+    stats: Optional[Dict[str, np.ndarray]] = None
+
+    def __post_init__(self):
+        if self.stats is None:
+            self.stats = self.compute_stats(self.data)
+
+    @staticmethod
+    def compute_stats(data: np.ndarray) -> Dict[str, np.ndarray]:
+        """min / max / mean of every step, reduced over the flattened fields in one pass each"""
+        flat = data.reshape(data.shape[0], int(np.prod(data.shape[1:])))  # -1 can't be inferred for 0 steps
+        if flat.shape[1] == 0:
+            nan = np.full(data.shape[0], np.nan)
+            return {"min": nan, "max": nan.copy(), "mean": nan.copy()}
+        return {"min": flat.min(axis=1), "max": flat.max(axis=1), "mean": flat.mean(axis=1)}
+
+    @classmethod
+    def empty(cls, n_layers: int, n_cols: int) -> 'FieldSeries':
+        return cls(times=np.zeros(0), data=np.zeros((0, n_layers, n_cols)))
+
+    @classmethod
+    def from_blocks(cls, blocks: List[Tuple[float, np.ndarray]], n_layers: int, n_cols: int) -> 'FieldSeries':
+        """Stacks parsed (time, flat values) blocks in time order; duplicate times keep the last block"""
+        by_time = {t: values for t, values in blocks}
+        times = np.array(sorted(by_time), dtype=np.float64)
+        data = np.empty((times.size, n_layers, n_cols))
+        for i, t in enumerate(times):
+            data[i] = by_time[t].reshape(n_layers, n_cols)
+        return cls(times=times, data=data)
+
+    @property
+    def n_steps(self) -> int:
+        return self.times.size
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.data.shape[1], self.data.shape[2]
+
+    # --- Time axis ---
+
+    def nearest_index(self, time: float) -> int:
+        """Index of the output step closest to time (binary search on the sorted axis)"""
+        if self.n_steps == 0:
+            raise IndexError("No output steps")
+        i = int(np.searchsorted(self.times, time))
+        if i == self.n_steps or (i > 0 and time - self.times[i - 1] <= self.times[i] - time):
+            i -= 1
+        return i
+
+    def step_stats(self, step: int) -> Dict[str, float]:
+        return {name: float(values[step]) for name, values in self.stats.items()}
+
+    def as_dict(self) -> Dict[float, np.ndarray]:
+        """time -> (n_layers, n_cols) view, no copies"""
+        return {float(t): self.data[i] for i, t in enumerate(self.times)}
+
+    # --- Probes ---
+
+    def _check_node(self, layers, cols):
+        n_layers, n_cols = self.shape
+        layers, cols = np.asarray(layers), np.asarray(cols)
+        if np.any((layers < 0) | (layers >= n_layers)) or np.any((cols < 0) | (cols >= n_cols)):
+            raise IndexError(f"Node index outside the ({n_layers} layers, {n_cols} columns) grid")
+        return layers, cols
+
+    def node_series(self, layers, cols) -> np.ndarray:
+        """Time series of one node (scalars) or of many nodes at once: (n_steps,) or (n_steps, n_probes)"""
+        layers, cols = self._check_node(layers, cols)
+        return self.data[:, layers, cols]
+
+    def column_profile(self, col: int, step: Optional[int] = None) -> np.ndarray:
+        """Vertical profile of a column: (n_layers,) at one step or (n_steps, n_layers) for all"""
+        self._check_node(0, col)
+        return self.data[:, :, col] if step is None else self.data[step, :, col]
+
+    def layer_profile(self, layer: int, step: Optional[int] = None) -> np.ndarray:
+        """Lateral profile of a layer: (n_cols,) at one step or (n_steps, n_cols) for all"""
+        self._check_node(layer, 0)
+        return self.data[:, layer, :] if step is None else self.data[step, layer, :]
+
+
 @dataclass
 class SimulationResults:
     """
     Holds all output data from a simulation run.
     """
     # Global Time Series (bilanz.csv)
-    water_balance: pd.DataFrame
-    
-    # Spatial Fields (theta.out, psi.out)
-    # Dictionary mapping Time -> 2D Array (Layers x Cols)
-    moisture_fields: Dict[float, np.ndarray]
-    pressure_fields: Dict[float, np.ndarray]
+    water_balance: 'pd.DataFrame'
+
+    # Spatial Fields (theta.out, psi.out), time-major stacks of (Layers x Cols) fields
+    moisture: FieldSeries
+    pressure: FieldSeries
+
+    balance_version = 0  # Not a field: bumped on every water_balance assignment, keys its encoded JSON
+
+    def __setattr__(self, name, value):
+        if name == "water_balance":
+            self.__dict__["balance_version"] = self.balance_version + 1
+            self.__dict__.pop("_balance_json_cache", None)
+        super().__setattr__(name, value)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_balance_json_cache", None)
+        return state
+
+    @property
+    def moisture_fields(self) -> Dict[float, np.ndarray]:
+        """Time -> 2D array (Layers x Cols), views into the stacked store"""
+        return self.moisture.as_dict()
+
+    @property
+    def pressure_fields(self) -> Dict[float, np.ndarray]:
+        return self.pressure.as_dict()
+
+    def variable(self, name: str) -> FieldSeries:
+        if name in ("moisture", "theta"):
+            return self.moisture
+        if name in ("pressure", "psi"):
+            return self.pressure
+        raise KeyError(name)
 
     @classmethod
-    def load_from_folder(cls, folder_path: str, n_layers: int, n_cols: int) -> 'SimulationResults':
+    def load_from_folder(cls, folder_path: str, n_layers: int, n_cols: int,
+                         bilanz_columns: Optional[List[str]] = None,
+                         bilanz_chunksize: Optional[int] = None, compact: bool = False) -> 'SimulationResults':
+        import pandas as pd  # Imported on first results load, not with the server
+
         folder = Path(folder_path)
-        
+
         # 1. Load Bilanz
         bilanz_path = folder / "out/bilanz.csv"
         if bilanz_path.exists():
-            df = pd.read_csv(bilanz_path, sep=';', header=None)
-            # Assign columns (simplified standard set)
-            cols = ['hillslope', 'timestep', 'time_s', 'balance_total', 'balance_in', 'balance_sink', 
-                    'balance_bound', 'flux_top', 'flux_right', 'flux_bottom', 'flux_left', 
-                    'runoff_cum', 'runoff_coeff', 'precip', 'precip2', 'intercept', 'evap', 'transp']
-            # Truncate or extend columns as needed
-            df.columns = cols[:len(df.columns)]
+            df = read_bilanz(bilanz_path, columns=bilanz_columns, chunksize=bilanz_chunksize)
         else:
             df = pd.DataFrame()
 
         # 2. Load Spatial Fields
         theta = cls._parse_spatial_file(folder / "out/theta.out", n_layers, n_cols)
         psi = cls._parse_spatial_file(folder / "out/psi.out", n_layers, n_cols)
-        
-        return cls(water_balance=df, moisture_fields=theta, pressure_fields=psi)
+
+        results = cls(water_balance=df, moisture=theta, pressure=psi)
+        if compact:
+            from model.compact import compact_results
+            compact_results(results)
+        return results
 
     @staticmethod
-    def _parse_spatial_file(path: Path, n_layers: int, n_cols: int) -> Dict[float, np.ndarray]:
-        results = {}
-        if not path.exists(): return results
-        
+    def _parse_block(lines: List[str]) -> np.ndarray:
+        try:
+            return np.array(" ".join(lines).split(), dtype=np.float64)
+        except ValueError:
+            # Stray text lines: keep the numeric ones only
+            values = []
+            for line in lines:
+                try:
+                    values.extend([float(x) for x in line.split()])
+                except ValueError:
+                    pass
+            return np.array(values, dtype=np.float64)
+
+    @classmethod
+    def _parse_spatial_file(cls, path: Path, n_layers: int, n_cols: int) -> FieldSeries:
+        if not path.exists():
+            return FieldSeries.empty(n_layers, n_cols)
+
+        blocks: List[Tuple[float, np.ndarray]] = []
         current_time = None
-        buffer = []
-        
+        buffer: List[str] = []
+
+        def flush():
+            if current_time is not None and buffer:
+                values = cls._parse_block(buffer)
+                # Only keep complete fields (handle partial writes)
+                if values.size == n_layers * n_cols:
+                    blocks.append((current_time, values))
+
         with open(path, 'r') as f:
             for line in f:
                 # Detect "Time: 1234.5"
                 if "Time:" in line:
-                    # Save previous block
-                    if current_time is not None and buffer:
-                        try:
-                            arr = np.array(buffer)
-                            # Only reshape if size matches (handle partial writes)
-                            if arr.size == n_layers * n_cols:
-                                results[current_time] = arr.reshape(n_layers, n_cols)
-                        except: pass
-                    
-                    # Start new block
+                    flush()
+                    match = TIME_PATTERN.search(line)
                     try:
-                        match = re.search(r'Time:\s+([\d.eE+-]+)', line)
                         current_time = float(match.group(1)) if match else 0.0
-                    except: current_time = 0.0
+                    except ValueError:
+                        current_time = 0.0
                     buffer = []
                 else:
-                    # Collect numbers
-                    try:
-                        buffer.extend([float(x) for x in line.split()])
-                    except: pass
-                    
-        # Save last block
-        if current_time is not None and buffer:
-             arr = np.array(buffer)
-             if arr.size == n_layers * n_cols:
-                 results[current_time] = arr.reshape(n_layers, n_cols)
-                 
-        return results
+                    buffer.append(line)
+        flush()
+
+        return FieldSeries.from_blocks(blocks, n_layers, n_cols)
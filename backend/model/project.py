@@ -1,23 +1,33 @@
+from __future__ import annotations
+
 import pickle
 from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import TYPE_CHECKING, Iterator, List, Optional, Dict
 import numpy as np
 
-from model.inputs.boundaries.initital import SoilWaterIC, SoluteIC
-from model.inputs.boundaries.map import BoundaryConditions
-from model.config import GlobalConfig, RunControl
-from model.heterogeneity import HeterogeneityMap
-from model.inputs.assigments.macropores import MacroporeDef
-from model.inputs.assigments.soil import SoilAssignment
-from model.inputs.assigments.surface import SurfaceAssignment
-from model.inputs.controll_volume import ControlVolumeDef
-from model.inputs.forcing.configuration import ForcingConfiguration
-from model.inputs.forcing.landuse.library import LandUseLibrary
-from model.inputs.mesh import HillslopeMesh
-from model.inputs.soil import SoilLibrary
-from model.inputs.wind import WindLibrary
-from model.printout import PrintoutTimes
+from model.timing import NULL_RECORDER, PhaseRecorder
+
+if TYPE_CHECKING:
+    # Component modules are imported on first load / export, not with the server
+    from model.inputs.boundaries.initital import SoilWaterIC, SoluteIC
+    from model.inputs.boundaries.map import BoundaryConditions
+    from model.config import GlobalConfig, RunControl
+    from model.export import ExportFile, ExportWriter
+    from model.fields import EffectiveParameters
+    from model.heterogeneity import HeterogeneityMap
+    from model.inputs.assigments.macropores import MacroporeDef
+    from model.inputs.assigments.soil import SoilAssignment
+    from model.inputs.assigments.surface import SurfaceAssignment
+    from model.inputs.bna import BNA
+    from model.inputs.controll_volume import ControlVolumeDef
+    from model.inputs.forcing.configuration import ForcingConfiguration
+    from model.inputs.forcing.landuse.library import LandUseLibrary
+    from model.inputs.mesh import HillslopeMesh
+    from model.inputs.soil import SoilLibrary
+    from model.inputs.wind import WindLibrary
+    from model.printout import PrintoutTimes
 
 
 @dataclass
@@ -28,6 +38,7 @@ class Hill:
     # 1. Geometry (Master definition)
     mesh: Optional[HillslopeMesh] = None            # hang1.geo
     cv_def: Optional[ControlVolumeDef] = None
+    bna: Optional[BNA] = None                       # hang1.bna (node polygons, next to the .geo)
 
     
     # 2. Spatial Assignments (Map IDs to Nodes)
@@ -44,6 +55,17 @@ class Hill:
     initial_cond_sat: Optional[SoilWaterIC] = None     # rel_sat.ini
     initial_cond_sol: Optional[SoluteIC] = None     # NOT IN PROJECT
     printout: Optional[PrintoutTimes] = None        # printout.prt
+
+    def effective_parameters(self, soil_library: SoilLibrary) -> EffectiveParameters:
+        """Node-wise Ks / theta_s (scaled by heterogeneity and fmac) and VG parameters, cached until an input changes"""
+        from model.fields import effective_parameters
+        return effective_parameters(self, soil_library)
+
+    def __getstate__(self):
+        # Derived data is rebuilt on demand, keep it out of save_binary pickles
+        state = self.__dict__.copy()
+        state.pop("_effective_cache", None)
+        return state
     
 @dataclass
 class CATFLOWProject:
@@ -74,17 +96,44 @@ class CATFLOWProject:
             return pickle.load(f)
 
     @classmethod
-    def from_legacy_folder(cls, folder_path: str) -> 'CATFLOWProject':
+    def from_legacy_folder(cls, folder_path: str, recorder: PhaseRecorder = None) -> 'CATFLOWProject':
         """
         Parses a legacy CATFLOW folder structure.
+        Pass a PhaseRecorder to collect per-file timing spans (wall/CPU time, bytes read, array sizes).
         """
+        from model.inputs.boundaries.initital import SoilWaterIC, SoluteIC
+        from model.inputs.boundaries.map import BoundaryConditions
+        from model.config import GlobalConfig, RunControl
+        from model.heterogeneity import HeterogeneityMap
+        from model.inputs.assigments.macropores import MacroporeDef
+        from model.inputs.assigments.soil import SoilAssignment
+        from model.inputs.assigments.surface import SurfaceAssignment
+        from model.inputs.bna import BNA
+        from model.inputs.controll_volume import ControlVolumeDef
+        from model.inputs.forcing.configuration import ForcingConfiguration
+        from model.inputs.forcing.landuse.library import LandUseLibrary
+        from model.inputs.mesh import HillslopeMesh
+        from model.inputs.soil import SoilLibrary
+        from model.inputs.wind import WindLibrary
+        from model.printout import PrintoutTimes
+
+        rec = recorder or NULL_RECORDER
         folder = Path(folder_path).resolve()
         project = cls(name=folder.name)
         
         print(f"Loading Project from: {folder}")
 
+        def fpath(rel): return str(folder / rel)
+
+        def load(name, rel, parse):
+            with rec.span(name, file=str(rel)) as span:
+                span.read(fpath(rel))
+                component = parse(fpath(rel))
+                span.arrays(component)
+            return component
+
         # 1. Global Config (CATFLOW.IN)
-        project.config = GlobalConfig.from_file(str(folder / "CATFLOW.IN"))
+        project.config = load("config", "CATFLOW.IN", GlobalConfig.from_file)
         
         # 2. Run Control
         run_path = folder / project.config.run_filename
@@ -92,14 +141,12 @@ class CATFLOWProject:
             raise FileNotFoundError(f"Run file missing: {run_path}")
             
         # Load parameters (Time, dt, etc.)
-        project.run_control = RunControl.from_file(str(run_path))
+        project.run_control = load("run_control", project.config.run_filename, RunControl.from_file)
         
         # 3. Parse File Paths from run_01.in (Strict Order)
         with open(run_path, 'r') as f:
             raw_lines = [l.split('%')[0].strip() for l in f if l.split('%')[0].strip()]
             raw_lines = [l for l in raw_lines if not l.startswith('#')]
-
-        def fpath(rel): return str(folder / rel)
         
         # Find the output file block
         idx = 0
@@ -128,22 +175,25 @@ class CATFLOWProject:
         # Global 1: Soils
         p_soils = raw_lines[idx]; idx += 1
         print("  Loading Soil Library...")
-        project.soil_library = SoilLibrary.from_file(fpath(p_soils))
+        project.soil_library = load("soil_library", p_soils, SoilLibrary.from_file)
         
         # Global 2: Forcing
         p_time = raw_lines[idx]; idx += 1
         print("  Loading Forcing Config...")
-        project.forcing = ForcingConfiguration.from_file(fpath(p_time))
+        with rec.span("forcing", file=p_time) as span:
+            span.read(fpath(p_time))
+            project.forcing = ForcingConfiguration.from_file(fpath(p_time), on_read=span.read)
+            span.arrays(project.forcing)
         
         # Global 3: Land Use
         p_lu = raw_lines[idx]; idx += 1
         print("  Loading Land Use Library...")
-        project.land_use_library = LandUseLibrary.from_file(fpath(p_lu), folder)
+        project.land_use_library = load("land_use_library", p_lu, lambda path: LandUseLibrary.from_file(path, folder))
         
         # Global 4: Wind
         p_wind = raw_lines[idx]; idx += 1
         print("  Loading Wind Library...")
-        project.wind_library = WindLibrary.from_file(fpath(p_wind))
+        project.wind_library = load("wind_library", p_wind, WindLibrary.from_file)
         
         # Skip any additional global files
         for _ in range(n_global_inputs - 4):
@@ -161,34 +211,40 @@ class CATFLOWProject:
             # 1. Geometry
             p_geo = raw_lines[idx]; idx += 1
             print(f"    [Hill {h_i+1}] Mesh: {p_geo}")
-            hill.mesh = HillslopeMesh.from_file(fpath(p_geo))
+            h = f"hill_{h_i+1}"
+            hill.mesh = load(f"{h}.mesh", p_geo, HillslopeMesh.from_file)
             
             # Get dimensions
             nl, nc = hill.mesh.header.iacnv, hill.mesh.header.iacnl
+
+            # Node polygons, not listed in run_01.in: the preprocessor writes them next to the .geo
+            p_bna = str(Path(p_geo).with_suffix(".bna"))
+            if (folder / p_bna).exists():
+                hill.bna = load(f"{h}.bna", p_bna, BNA.from_file)
             
             # 2. Soil Map (.bod)
             p_bod = raw_lines[idx]; idx += 1
-            hill.soil_map = SoilAssignment.from_file(fpath(p_bod), nl, nc)
+            hill.soil_map = load(f"{h}.soil_map", p_bod, lambda path: SoilAssignment.from_file(path, nl, nc))
             
             # 3. K-Stat
             p_kstat = raw_lines[idx]; idx += 1
-            hill.k_scaling = HeterogeneityMap.from_file(fpath(p_kstat))
+            hill.k_scaling = load(f"{h}.k_scaling", p_kstat, HeterogeneityMap.from_file)
             
             # 4. Th-Stat
             p_thstat = raw_lines[idx]; idx += 1
-            hill.theta_scaling = HeterogeneityMap.from_file(fpath(p_thstat))
+            hill.theta_scaling = load(f"{h}.theta_scaling", p_thstat, HeterogeneityMap.from_file)
             
             # 5. Macropores
             p_mak = raw_lines[idx]; idx += 1
-            hill.macropores = MacroporeDef.from_file(fpath(p_mak), nl, nc)
+            hill.macropores = load(f"{h}.macropores", p_mak, lambda path: MacroporeDef.from_file(path, nl, nc))
             
             # 6. Control Volume
             p_cv = raw_lines[idx]; idx += 1
-            hill.cv_def = ControlVolumeDef.from_file(fpath(p_cv))
+            hill.cv_def = load(f"{h}.cv_def", p_cv, ControlVolumeDef.from_file)
 
             # 7. Initial Conditions - Water
             p_ini = raw_lines[idx]; idx += 1
-            hill.initial_cond_sat = SoilWaterIC.from_file(fpath(p_ini), nl, nc)
+            hill.initial_cond_sat = load(f"{h}.initial_cond_sat", p_ini, lambda path: SoilWaterIC.from_file(path, nl, nc))
             
             # 8. Initial Conditions - Solute (OPTIONAL)
             # Check if the next file looks like a solute IC file
@@ -199,41 +255,45 @@ class CATFLOWProject:
                     # Expect solute IC file
                     p_sol_ini = raw_lines[idx]; idx += 1
                     try:
-                        hill.initial_cond_sol = SoluteIC.from_file(fpath(p_sol_ini), nl, nc)
+                        hill.initial_cond_sol = load(f"{h}.initial_cond_sol", p_sol_ini, lambda path: SoluteIC.from_file(path, nl, nc))
                     except:
                         print(f"    Warning: Failed to load solute IC from {p_sol_ini}")
                         pass
             
             # 9. Printout
             p_prt = raw_lines[idx]; idx += 1
-            hill.printout = PrintoutTimes.from_file(fpath(p_prt))
+            hill.printout = load(f"{h}.printout", p_prt, PrintoutTimes.from_file)
             
             # 10. Surface Map
             p_pob = raw_lines[idx]; idx += 1
-            hill.surface_map = SurfaceAssignment.from_file(fpath(p_pob), nc)
+            hill.surface_map = load(f"{h}.surface_map", p_pob, lambda path: SurfaceAssignment.from_file(path, nc))
             
             # 11. Boundary Map
             p_rb = raw_lines[idx]; idx += 1
-            hill.boundary = BoundaryConditions.from_file(fpath(p_rb), nl, nc)
+            hill.boundary = load(f"{h}.boundary", p_rb, lambda path: BoundaryConditions.from_file(path, nl, nc))
             
             project.hills.append(hill)
             
+        rec.finish()
         print("✓ Project Loaded Successfully")
         return project
 
 
-    def write_to_folder(self, folder_path: str, source_folder: str = None):
+    def iter_export_files(self, source_folder: str = None) -> Iterator[ExportFile]:
         """
-        Reconstructs the full folder structure and files.
+        Yields every file of the full folder structure (paths relative to the project root).
+        run_01.in comes last, its file list depends on everything before it.
         """
-        base = Path(folder_path)
-        base.mkdir(parents=True, exist_ok=True)
-        
-        print(f"Writing Project to {base}...")
-        
-        # 1. Write Global Config (CATFLOW.IN)
+        from model.export import ExportFile
+
+        # Ensure run_control exists
+        if not self.run_control:
+            # Should create a default one if missing, but raising error is safer
+            raise ValueError("Cannot write project: RunControl is missing.")
+
+        # 1. Global Config (CATFLOW.IN)
         if self.config:
-            self.config.to_file(str(base / "CATFLOW.IN"))
+            yield ExportFile("CATFLOW.IN", self.config, self.config.to_file)
             
         # 2. Define Standard Global Paths
         # These are the relative paths we will write into run_01.in
@@ -241,42 +301,23 @@ class CATFLOWProject:
         p_time = "in/control/timeser.def"
         p_lu = "in/landuse/lu_file.def"
         p_wind = "in/climate/winddir.def"
-        
-        # Ensure parent directories exist
-        (base / p_soils).parent.mkdir(parents=True, exist_ok=True)
-        (base / p_time).parent.mkdir(parents=True, exist_ok=True)
-        (base / p_lu).parent.mkdir(parents=True, exist_ok=True)
-        (base / p_wind).parent.mkdir(parents=True, exist_ok=True)
 
-        # 3. Write Global Libraries
-        # We explicitly call to_file() on each library object if it exists.
-        
+        # 3. Global Libraries
         if self.soil_library: 
-            self.soil_library.to_file(str(base / p_soils))
+            yield ExportFile(p_soils, self.soil_library, self.soil_library.to_file)
             
         if self.forcing:
-            # Forcing writes timeser.def AND all referenced .dat files
-            self.forcing.to_file(str(base / p_time))
+            # Forcing yields timeser.def AND all referenced .dat files
+            yield from self.forcing.iter_export_files(p_time)
             
         if self.land_use_library:
-            self.land_use_library.to_file(str(base / p_lu))
-            # If we still rely on external .par files (haven't modeled them fully yet), copy them:
-            if source_folder:
-                src = Path(source_folder)
-                for lu in self.land_use_library.types:
-                    # Copy parameter files if they exist in source
-                    # lu.param_file might be "in/landuse/wiese.par"
-                    s = src / lu.param_file
-                    d = base / lu.param_file
-                    if s.exists():
-                        d.parent.mkdir(parents=True, exist_ok=True)
-                        import shutil
-                        shutil.copy2(s, d)
+            # If we still rely on external .par files (haven't modeled them fully yet), they are copied from source
+            yield from self.land_use_library.iter_export_files(p_lu, Path(source_folder) if source_folder else None)
             
         if self.wind_library:
-            self.wind_library.to_file(str(base / p_wind))
+            yield ExportFile(p_wind, self.wind_library, self.wind_library.to_file)
             
-        # 4. Write Hills
+        # 4. Hills
         hill_file_lines = [] # Lines to append to run_01.in
         
         # Hill count line (Negative means standard CATFLOW format)
@@ -284,12 +325,12 @@ class CATFLOWProject:
         
         for i, hill in enumerate(self.hills):
             prefix = f"in/hill_{i+1}"
-            (base / prefix).mkdir(parents=True, exist_ok=True)
             
             # Define standard filenames for this hill
             # We enforce this naming convention for the new project structure
             files = {
                 'geo': f"{prefix}/hang.geo",
+                'bna': f"{prefix}/hang.bna",
                 'bod': f"{prefix}/soils.bod",
                 'kstat': f"{prefix}/kstat.dat",
                 'thstat': f"{prefix}/thstat.dat",
@@ -301,17 +342,18 @@ class CATFLOWProject:
                 'rb': f"{prefix}/boundary.rb"
             }
             
-            # Write objects to files (Check existence first)
-            if hill.mesh: hill.mesh.to_file(str(base / files['geo']))
-            if hill.soil_map: hill.soil_map.to_file(str(base / files['bod']))
-            if hill.k_scaling: hill.k_scaling.to_file(str(base / files['kstat']))
-            if hill.theta_scaling: hill.theta_scaling.to_file(str(base / files['thstat']))
-            if hill.macropores: hill.macropores.to_file(str(base / files['mak']))
-            if hill.cv_def: hill.cv_def.to_file(str(base / files['cv']))
-            if hill.initial_cond_sat: hill.initial_cond_sat.to_file(str(base / files['ini']))
-            if hill.printout: hill.printout.to_file(str(base / files['prt']))
-            if hill.surface_map: hill.surface_map.to_file(str(base / files['pob']))
-            if hill.boundary: hill.boundary.to_file(str(base / files['rb']))
+            # Objects to files (Check existence first)
+            if hill.mesh: yield ExportFile(files['geo'], hill.mesh, hill.mesh.to_file)
+            if hill.bna: yield ExportFile(files['bna'], hill.bna, hill.bna.to_file)
+            if hill.soil_map: yield ExportFile(files['bod'], hill.soil_map, hill.soil_map.to_file)
+            if hill.k_scaling: yield ExportFile(files['kstat'], hill.k_scaling, hill.k_scaling.to_file)
+            if hill.theta_scaling: yield ExportFile(files['thstat'], hill.theta_scaling, hill.theta_scaling.to_file)
+            if hill.macropores: yield ExportFile(files['mak'], hill.macropores, hill.macropores.to_file)
+            if hill.cv_def: yield ExportFile(files['cv'], hill.cv_def, hill.cv_def.to_file)
+            if hill.initial_cond_sat: yield ExportFile(files['ini'], hill.initial_cond_sat, hill.initial_cond_sat.to_file)
+            if hill.printout: yield ExportFile(files['prt'], hill.printout, hill.printout.to_file)
+            if hill.surface_map: yield ExportFile(files['pob'], hill.surface_map, hill.surface_map.to_file)
+            if hill.boundary: yield ExportFile(files['rb'], hill.boundary, hill.boundary.to_file)
             
             # Append paths to the run file list (Order determines how Fortran reads them)
             # The order MUST match the 'run_01.in' loop:
@@ -327,26 +369,54 @@ class CATFLOWProject:
             hill_file_lines.append(files['pob'])
             hill_file_lines.append(files['rb'])
 
-        # 5. Write run_01.in
-        rc_path = str(base / "run_01.in")
-        
-        # Ensure run_control exists
-        if not self.run_control:
-            # Should create a default one if missing, but raising error is safer
-            raise ValueError("Cannot write project: RunControl is missing.")
+        # 5. run_01.in
+        global_files = [p_soils, p_time, p_lu, p_wind]
+        yield ExportFile(
+            "run_01.in",
+            (self.run_control, global_files, hill_file_lines),
+            partial(_write_run_file, self.run_control, global_files, hill_file_lines)
+        )
+
+    def write_to_folder(self, folder_path: str, source_folder: str = None, force: bool = False,
+                        max_workers: int = 0, use_processes: bool = False,
+                        recorder: PhaseRecorder = None) -> ExportWriter:
+        """
+        Reconstructs the full folder structure and files.
+        Files whose content is unchanged since the last export to this folder
+        (see .catflow_manifest.json) are skipped unless force=True.
+        max_workers > 0 serializes files concurrently into a temporary folder which
+        replaces the target only once everything succeeded (use_processes for a process pool).
+        Pass a PhaseRecorder to collect per-file timing spans.
+        """
+        from model.export import ExportWriter
 
-        self.run_control.to_file(rc_path) # Writes header + params + output files
+        base = Path(folder_path)
         
-        # Now append the INPUT file section manually
-        with open(rc_path, 'a') as f:
-            f.write("\n\t  4\n") # Global file count (Always 4 in this structure)
-            f.write(f"{p_soils}\n")
-            f.write(f"{p_time}\n")
-            f.write(f"{p_lu}\n")
-            f.write(f"{p_wind}\n")
-            
-            for line in hill_file_lines:
-                f.write(f"{line}\n")
+        print(f"Writing Project to {base}...")
+        
+        writer = ExportWriter(str(base), force=force, max_workers=max_workers, use_processes=use_processes,
+                              recorder=recorder)
+        try:
+            for export_file in self.iter_export_files(source_folder):
+                writer.write(export_file)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
+        writer.recorder.finish()
         
-        print("✓ Export Complete")
+        print(f"✓ Export Complete ({len(writer.written)} written, {len(writer.skipped)} unchanged)")
+        return writer
+
 
+def _write_run_file(run_control: RunControl, global_files: List[str], hill_file_lines: List[str], filepath: str):
+    run_control.to_file(filepath) # Writes header + params + output files
+    
+    # Now append the INPUT file section manually
+    with open(filepath, 'a') as f:
+        f.write(f"\n\t  {len(global_files)}\n") # Global file count (Always 4 in this structure)
+        for p in global_files:
+            f.write(f"{p}\n")
+        
+        for line in hill_file_lines:
+            f.write(f"{line}\n")
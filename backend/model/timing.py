@@ -0,0 +1,190 @@
+import json
+import os
+import time
+from dataclasses import dataclass, field, fields, is_dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+TIMING_ENV = "CATFLOW_TIMING"
+
+
+def timing_enabled(requested: bool = False) -> bool:
+    """Timing is opt-in per call, or switched on for everything with CATFLOW_TIMING=1"""
+    return requested or os.environ.get(TIMING_ENV, "") not in ("", "0", "false")
+
+
+@dataclass
+class Span:
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    array_bytes: int = 0
+    array_shapes: Dict[str, List[int]] = field(default_factory=dict)
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def read(self, path: str):
+        self.bytes_read += _size(path)
+
+    def wrote(self, path: str):
+        self.bytes_written += _size(path)
+
+    def arrays(self, component: Any):
+        """Records size and shape of every ndarray held by a (nested) model component"""
+        for name, arr in _iter_arrays(component):
+            self.array_bytes += arr.nbytes
+            self.array_shapes[name] = list(arr.shape)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {"name": self.name, "wall_s": round(self.wall_s, 6), "cpu_s": round(self.cpu_s, 6)}
+        for key in ("bytes_read", "bytes_written", "array_bytes"):
+            if getattr(self, key):
+                d[key] = getattr(self, key)
+        if self.array_shapes:
+            d["array_shapes"] = self.array_shapes
+        d.update(self.meta)
+        return d
+
+
+class _ActiveSpan:
+    """Context manager measuring wall and thread CPU time of one span"""
+    __slots__ = ("recorder", "span", "_t0", "_c0")
+
+    def __init__(self, recorder: 'PhaseRecorder', span: Span):
+        self.recorder = recorder
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._t0 = time.perf_counter()
+        self._c0 = time.thread_time()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.wall_s = time.perf_counter() - self._t0
+        self.span.cpu_s = time.thread_time() - self._c0
+        if exc_type is not None:
+            self.span.meta["error"] = exc_type.__name__
+        self.recorder.spans.append(self.span)
+        return False
+
+
+class PhaseRecorder:
+    """
+    Collects timing spans of one operation (project load, export).
+    Spans are flat, nesting is expressed by dotted names ("hill_1.mesh").
+    """
+    enabled = True
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.spans: List[Span] = []
+        self._t0 = time.perf_counter()
+        self._c0 = time.process_time()
+        self._wall_s: Optional[float] = None
+        self._cpu_s: Optional[float] = None
+
+    def span(self, name: str, **meta) -> _ActiveSpan:
+        return _ActiveSpan(self, Span(name, meta=meta))
+
+    def add(self, name: str, wall_s: float, cpu_s: float, **meta) -> Span:
+        """Adds a span that was measured elsewhere (e.g. in a worker thread/process)"""
+        span = Span(name, wall_s=wall_s, cpu_s=cpu_s, meta=meta)
+        self.spans.append(span)
+        return span
+
+    def finish(self) -> 'PhaseRecorder':
+        self._wall_s = time.perf_counter() - self._t0
+        self._cpu_s = time.process_time() - self._c0
+        return self
+
+    def report(self) -> Dict[str, Any]:
+        if self._wall_s is None:
+            self.finish()
+        return {
+            "operation": self.operation,
+            "wall_s": round(self._wall_s, 6),
+            "cpu_s": round(self._cpu_s, 6),
+            "bytes_read": sum(s.bytes_read for s in self.spans),
+            "bytes_written": sum(s.bytes_written for s in self.spans),
+            "spans": [s.to_dict() for s in self.spans],
+        }
+
+    def log(self):
+        print(json.dumps({"timing": self.report()}))
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def read(self, path): pass
+    def wrote(self, path): pass
+    def arrays(self, component): pass
+
+
+class NullRecorder:
+    """Drop-in recorder that records nothing (the default, costs one attribute lookup per span)"""
+    enabled = False
+    _span = _NullSpan()
+
+    def span(self, name: str, **meta) -> _NullSpan:
+        return self._span
+
+    def add(self, name: str, wall_s: float, cpu_s: float, **meta) -> _NullSpan:
+        return self._span
+
+    def finish(self) -> 'NullRecorder':
+        return self
+
+    def report(self) -> None:
+        return None
+
+    def log(self):
+        pass
+
+
+NULL_RECORDER = NullRecorder()
+
+
+def timed_call(fn, *args):
+    """Runs fn(*args) and returns (wall_s, cpu_s); picklable for process pools"""
+    t0, c0 = time.perf_counter(), time.thread_time()
+    fn(*args)
+    return time.perf_counter() - t0, time.thread_time() - c0
+
+
+def array_nbytes(component: Any) -> int:
+    """Total bytes of all ndarrays held by a (nested) model component"""
+    return sum(arr.nbytes for _, arr in _iter_arrays(component))
+
+
+def _size(path: str) -> int:
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def _iter_arrays(obj: Any, prefix: str = ""):
+    if isinstance(obj, np.ndarray):
+        yield prefix or "data", obj
+    elif is_dataclass(obj) and not isinstance(obj, type):
+        for f in fields(obj):
+            yield from _iter_arrays(getattr(obj, f.name, None), f"{prefix}.{f.name}" if prefix else f.name)
+        # Fields declared init=False but set later (mesh/macropore data) are in fields() too
+    elif isinstance(obj, dict):
+        # Struct-of-arrays stores (mesh.fields)
+        for key, value in obj.items():
+            if isinstance(value, np.ndarray):
+                yield f"{prefix}.{key}" if prefix else str(key), value
+    elif isinstance(obj, (list, tuple)):
+        for i, item in enumerate(obj):
+            if isinstance(item, np.ndarray) or is_dataclass(item):
+                yield from _iter_arrays(item, f"{prefix}[{i}]")
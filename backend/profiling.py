@@ -0,0 +1,127 @@
+"""
+On-demand cProfile capture of single API requests.
+
+Only active when the server runs with CATFLOW_PROFILING=1. A request is then profiled if it
+carries the header "X-CATFLOW-Profile: 1" or the query flag "?profile=1". The pstats dump and a
+text summary are stored in ./storage/profiles, the response carries the id in "X-CATFLOW-Profile-Id".
+
+cProfile follows the event-loop thread: async endpoints (numpy_to_list, pydantic validation, ...)
+are fully covered, work pushed to a thread pool is not. Profiled requests are serialized;
+unprofiled requests running at the same time on the loop can show up in a profile.
+"""
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+PROFILING_ENV = "CATFLOW_PROFILING"
+PROFILE_HEADER = b"x-catflow-profile"
+PROFILE_ID_HEADER = b"x-catflow-profile-id"
+SUMMARY_LINES = 60
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILING_ENV, "") not in ("", "0", "false")
+
+
+class ProfileStore:
+    """Keeps the last max_profiles captures (<id>.prof + <id>.txt)"""
+    def __init__(self, storage_dir: str = "./storage/profiles", max_profiles: int = 50):
+        self.storage_dir = Path(storage_dir)
+        self.max_profiles = max_profiles
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, method: str, path: str, wall_s: float):
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(self.storage_dir / f"{profile_id}.prof"))
+
+        out = io.StringIO()
+        out.write(f"{method} {path}\nwall time: {wall_s:.4f} s\n\n")
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_LINES)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(SUMMARY_LINES // 2)
+        with open(self.storage_dir / f"{profile_id}.txt", 'w') as f:
+            f.write(out.getvalue())
+
+        self._prune()
+
+    def _prune(self):
+        profiles = sorted(self.storage_dir.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+        for old in profiles[:-self.max_profiles]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".txt").unlink(missing_ok=True)
+
+    def list(self) -> List[Dict]:
+        if not self.storage_dir.exists():
+            return []
+        entries = []
+        for prof in sorted(self.storage_dir.glob("*.prof"), reverse=True):
+            summary = prof.with_suffix(".txt")
+            request = ""
+            if summary.exists():
+                with open(summary, 'r') as f:
+                    request = f.readline().strip()
+            entries.append({"id": prof.stem, "request": request, "bytes": prof.stat().st_size})
+        return entries
+
+    def path(self, profile_id: str, suffix: str) -> Optional[Path]:
+        # Ids are generated by us, reject anything that could escape the folder
+        if not profile_id or "/" in profile_id or "\\" in profile_id or profile_id.startswith("."):
+            return None
+        path = self.storage_dir / f"{profile_id}{suffix}"
+        return path if path.is_file() else None
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER:
+                return value.strip() not in (b"", b"0", b"false")
+        flag = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile")
+        return bool(flag) and flag[-1] not in ("", "0", "false")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiling_enabled() or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        async with self._lock:
+            profile_id = self.store.new_id()
+            profiler = cProfile.Profile()
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((PROFILE_ID_HEADER, profile_id.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            t0 = time.perf_counter()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+                wall_s = time.perf_counter() - t0
+                await asyncio.to_thread(
+                    self.store.save, profile_id, profiler, scope.get("method", ""), scope.get("path", ""), wall_s
+                )
+                print(f"Profiled {scope.get('method')} {scope.get('path')} in {wall_s:.3f}s -> {profile_id}")
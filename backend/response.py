@@ -1,8 +1,10 @@
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 
 class ProjectLoadRequest(BaseModel):
     path: str
+    timing: bool = False    # Return per-phase timing spans with the response
+    compact: bool = False   # Narrow ID maps to int8/int16 (see model.compact)
     
 class ProjectSummary(BaseModel):
     name: str
@@ -79,3 +81,15 @@ class WritePreview(BaseModel):
     total_files: int
     warnings: List[str]
 
+
+
+class ProbeRequest(BaseModel):
+    """Batch of result probes: nodes as [layer, col] pairs, profiles by column / layer index"""
+    nodes: List[Tuple[int, int]] = []
+    columns: List[int] = []
+    layers: List[int] = []
+
+
+class PointsRequest(BaseModel):
+    """Points as [x, y] pairs, in the coordinates of the hills' BNA polygons"""
+    points: List[Tuple[float, float]]
@@ -1,6 +1,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from metrics import MetricsMiddleware
+from profiling import ProfilingMiddleware
+
 
 app = FastAPI(title="CATFLOW Project API")
 import state
@@ -12,8 +15,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
-from api import project, hills, soil, forcing, export, wind, results
+from api import project, hills, soil, forcing, export, wind, results, diagnostic, metrics as metrics_api, profiling as profiling_api
 from state import current_project
 
 app.include_router(project.router)
@@ -23,6 +28,9 @@ app.include_router(forcing.router)
 app.include_router(export.router)
 app.include_router(wind.router)
 app.include_router(results.router)
+app.include_router(diagnostic.router)
+app.include_router(metrics_api.router)
+app.include_router(profiling_api.router)
 
 @app.get("/")
 async def root():
@@ -1,16 +1,18 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from fastapi import HTTPException
 
-from model.project import CATFLOWProject
+if TYPE_CHECKING:
+    from model.project import CATFLOWProject
+
 TEMPLATE_FOLDER: Optional[str] = "IN_TEMPLATEs"
-current_project: Optional[CATFLOWProject] = None
+current_project: Optional['CATFLOWProject'] = None
 project_source_path: Optional[str] = None
 
 def set_current_project(project):
     global current_project
     current_project = project
 
-def get_project_or_404() -> CATFLOWProject:
+def get_project_or_404() -> 'CATFLOWProject':
     if current_project is None:
         raise HTTPException(status_code=404, detail="No project loaded")
     return current_project